@@ -19,7 +19,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 
 from ..config.app_config import AppConfig
-from ..data.models.cache import CachedFolder, CachedMessage
+from ..data.models.cache import CachedFolder, CachedMessage, pack_flags
 from .email.imap_client import FolderInfo, EmailMessage, EmailHeader
 
 
@@ -517,7 +517,7 @@ class CacheManager:
                     account_id=account_id,
                     name=folder.name,
                     delimiter=folder.delimiter,
-                    flags=json.dumps(folder.flags),
+                    flags=list(folder.flags),
                     exists=folder.exists,
                     recent=folder.recent,
                     unseen=folder.unseen,
@@ -554,7 +554,7 @@ class CacheManager:
                 folder = FolderInfo(
                     name=cached.name,
                     delimiter=cached.delimiter,
-                    flags=json.loads(cached.flags) if cached.flags else [],
+                    flags=cached.flags or [],
                     exists=cached.exists,
                     recent=cached.recent,
                     unseen=cached.unseen,
@@ -605,52 +605,28 @@ class CacheManager:
             messages: List of EmailMessage objects to cache
         """
         try:
-            # Get existing cached messages for this folder
-            existing_uids = set()
-            existing_messages = self.db_session.query(CachedMessage).filter(
-                and_(
-                    CachedMessage.account_id == account_id,
-                    CachedMessage.folder_name == folder_name
-                )
-            ).all()
-            
-            # Create a map of existing messages by UID
-            existing_map = {msg.uid: msg for msg in existing_messages}
-            
-            # Process new messages
+            # Insert new UIDs and refresh known ones in one statement
+            now = datetime.utcnow()
+            rows = []
             for message in messages:
-                if message.uid in existing_map:
-                    # Update existing message
-                    cached_msg = existing_map[message.uid]
-                    cached_msg.subject = message.headers.subject
-                    cached_msg.from_addr = message.headers.from_addr
-                    cached_msg.to_addrs = json.dumps(message.headers.to_addrs)
-                    cached_msg.cc_addrs = json.dumps(message.headers.cc_addrs)
-                    cached_msg.date = message.headers.date
-                    cached_msg.flags = json.dumps(message.flags)
-                    cached_msg.size = message.size
-                    cached_msg.has_attachments = bool(message.attachments)
-                    cached_msg.last_updated = datetime.utcnow()
-                else:
-                    # Add new message
-                    cached_msg = CachedMessage(
-                        account_id=account_id,
-                        folder_name=folder_name,
-                        uid=message.uid,
-                        message_id=message.headers.message_id,
-                        subject=message.headers.subject,
-                        from_addr=message.headers.from_addr,
-                        to_addrs=json.dumps(message.headers.to_addrs),
-                        cc_addrs=json.dumps(message.headers.cc_addrs),
-                        date=message.headers.date,
-                        flags=json.dumps(message.flags),
-                        size=message.size,
-                        has_attachments=bool(message.attachments),
-                        last_updated=datetime.utcnow()
-                    )
-                    self.db_session.add(cached_msg)
-                
-                existing_uids.add(message.uid)
+                flags, keywords = pack_flags(message.flags)
+                rows.append({
+                    'account_id': account_id,
+                    'folder_name': folder_name,
+                    'uid': message.uid,
+                    'message_id': message.headers.message_id,
+                    'subject': message.headers.subject,
+                    'from_addr': message.headers.from_addr,
+                    'to_addrs': list(message.headers.to_addrs),
+                    'cc_addrs': list(message.headers.cc_addrs),
+                    'date': message.headers.date,
+                    'flags': flags,
+                    'keywords': keywords,
+                    'size': message.size,
+                    'has_attachments': bool(message.attachments),
+                    'last_updated': now
+                })
+            CachedMessage.bulk_upsert(self.db_session, rows)
             
             # Remove messages that are no longer on the server (optional)
             # For now, we'll keep old messages to avoid data loss
@@ -689,8 +665,8 @@ class CacheManager:
                     message_id=cached.message_id or "",
                     subject=cached.subject or "",
                     from_addr=cached.from_addr or "",
-                    to_addrs=json.loads(cached.to_addrs) if cached.to_addrs else [],
-                    cc_addrs=json.loads(cached.cc_addrs) if cached.cc_addrs else [],
+                    to_addrs=cached.to_addrs or [],
+                    cc_addrs=cached.cc_addrs or [],
                     date=cached.date or datetime.utcnow()
                 )
                 
@@ -700,7 +676,7 @@ class CacheManager:
                     sequence_num=0,  # Not cached
                     folder=folder_name,
                     headers=headers,
-                    flags=json.loads(cached.flags) if cached.flags else [],
+                    flags=cached.flag_names,
                     size=cached.size,
                     attachments=[]  # Attachment details not cached for headers
                 )
@@ -191,17 +191,18 @@ class AccountManager:
         account_data["outgoing_auth_required"] = True
         account_data["auth_method"] = AuthMethod.PASSWORD
     
-    def get_all_accounts(self, enabled_only: bool = True) -> List[Account]:
+    def get_all_accounts(self, enabled_only: bool = True, summary: bool = False) -> List[Account]:
         """
         Get all configured accounts.
         
         Args:
             enabled_only: If True, return only enabled accounts
+            summary: If True, load only the columns needed to list accounts
         
         Returns:
             List[Account]: List of accounts
         """
-        return self.repository.get_all_accounts(enabled_only)
+        return self.repository.get_all_accounts(enabled_only, summary)
     
     def get_default_account(self) -> Optional[Account]:
         """
@@ -212,6 +213,15 @@ class AccountManager:
         """
         return self.repository.get_default_account()
     
+    def has_default_account(self) -> bool:
+        """
+        Check whether a default account is set.
+        
+        Returns:
+            bool: True if a default account is set, False otherwise
+        """
+        return self.repository.has_default_account()
+    
     def set_default_account(self, account_id: int) -> bool:
         """
         Set an account as the default.
@@ -0,0 +1,401 @@
+"""
+Asynchronous IMAP client for Adelfa PIM suite.
+
+Mirrors the read side of IMAPClient on top of aioimaplib so that folders
+and accounts can be synchronized concurrently from a single event loop
+instead of one blocking connection at a time.
+"""
+
+import asyncio
+import concurrent.futures
+import re
+import threading
+from typing import Any, Coroutine, Dict, List, Optional, Sequence
+
+import aioimaplib
+
+from ...utils.logging_setup import get_logger
+from ...data.models.accounts import Account, SecurityType
+from .credential_manager import CredentialManager
+from .imap_client import (
+    EmailHeader, FolderInfo, IMAPClient, IMAPClientError,
+    _HEADER_PARSER, _LITERAL_RE, _apply_folder_status, _mailbox_arg
+)
+
+logger = get_logger(__name__)
+
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+_SELECT_EXISTS_RE = re.compile(rb'^(\d+) EXISTS')
+
+
+def _collect_literals(lines: Sequence[Any]) -> Dict[int, bytes]:
+    """
+    Pair each FETCH literal with the UID of its response.
+
+    aioimaplib returns untagged FETCH responses as a flat line list where a
+    line ending in ``{n}`` is followed by the literal itself; the UID item
+    may appear before or after the literal.
+
+    Args:
+        lines: Response lines from a UID FETCH command
+
+    Returns:
+        Dict[int, bytes]: Literal payload by UID
+    """
+    results: Dict[int, bytes] = {}
+    uid: Optional[int] = None
+    literal: Optional[bytes] = None
+    expect_literal = False
+
+    for line in lines:
+        if expect_literal:
+            literal = bytes(line)
+            expect_literal = False
+            continue
+
+        if not isinstance(line, (bytes, bytearray)):
+            continue
+
+        if b' FETCH ' in line:
+            if uid is not None and literal is not None:
+                results[uid] = literal
+            uid, literal = None, None
+
+        match = _FETCH_UID_RE.search(line)
+        if match:
+            uid = int(match.group(1))
+        expect_literal = _LITERAL_RE.search(line) is not None
+
+    if uid is not None and literal is not None:
+        results[uid] = literal
+    return results
+
+
+class AsyncIMAPClient:
+    """
+    Asynchronous IMAP client for concurrent synchronization.
+
+    Each instance owns one connection, so one folder is selected at a time;
+    run one client per folder or account and await them together to sync
+    in parallel. IMAPClient remains the client for blocking callers.
+    """
+
+    # Header parsing is shared with the synchronous client
+    _parse_headers = IMAPClient._parse_headers
+
+    def __init__(self, account: Account, credential_manager: CredentialManager):
+        """
+        Initialize asynchronous IMAP client.
+
+        Args:
+            account: Email account configuration
+            credential_manager: Credential manager for password retrieval
+        """
+        self.account = account
+        self.credential_manager = credential_manager
+        self.imap: Optional[aioimaplib.IMAP4] = None
+        self.current_folder: Optional[str] = None
+        self.logger = logger
+
+    async def connect(self) -> bool:
+        """
+        Connect to IMAP server.
+
+        Returns:
+            bool: True if connection successful
+        """
+        imap = None
+        try:
+            if self.account.incoming_security == SecurityType.STARTTLS:
+                raise IMAPClientError("STARTTLS is not supported by the async client")
+
+            if self.account.incoming_security == SecurityType.TLS_SSL:
+                imap = aioimaplib.IMAP4_SSL(
+                    self.account.incoming_server,
+                    self.account.incoming_port,
+                    timeout=30
+                )
+            else:
+                imap = aioimaplib.IMAP4(
+                    self.account.incoming_server,
+                    self.account.incoming_port,
+                    timeout=30
+                )
+            await imap.wait_hello_from_server()
+
+            password = self.credential_manager.retrieve_password(
+                self.account.incoming_password_key
+            )
+            if not password:
+                raise IMAPClientError("No password available")
+
+            response = await imap.login(self.account.incoming_username, password)
+            if response.result != 'OK':
+                raise IMAPClientError("Authentication failed")
+
+            self.imap = imap
+            self.current_folder = None
+
+            self.logger.info(f"Connected to IMAP server {self.account.incoming_server}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"IMAP connection failed: {e}")
+            if imap:
+                await self._logout(imap)
+            return False
+
+    async def disconnect(self):
+        """Disconnect from IMAP server."""
+        imap, self.imap = self.imap, None
+        self.current_folder = None
+
+        if imap:
+            await self._logout(imap)
+            self.logger.info("Disconnected from IMAP server")
+
+    def is_connected(self) -> bool:
+        """Check if a connection has been established."""
+        return self.imap is not None
+
+    async def select_folder(self, folder_name: str = 'INBOX') -> FolderInfo:
+        """
+        Select a folder for operations.
+
+        Args:
+            folder_name: Name of folder to select
+
+        Returns:
+            FolderInfo: Folder information
+        """
+        if not self.is_connected():
+            raise IMAPClientError("Not connected to server")
+
+        try:
+            response = await self.imap.select(_mailbox_arg(folder_name))
+            if response.result != 'OK':
+                raise IMAPClientError(f"Failed to select folder {folder_name}")
+
+            self.current_folder = folder_name
+
+            folder_info = FolderInfo(
+                name=folder_name,
+                delimiter="/",
+                flags=[]
+            )
+            for line in response.lines:
+                match = _SELECT_EXISTS_RE.match(line)
+                if match:
+                    folder_info.exists = int(match.group(1))
+
+            await self._read_folder_status(folder_info)
+            return folder_info
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to select folder: {e}")
+
+    async def search_messages(self, criteria: str = 'ALL') -> List[int]:
+        """
+        Search for messages in current folder.
+
+        Args:
+            criteria: IMAP search criteria (e.g., 'UNSEEN', 'FROM user@example.com')
+
+        Returns:
+            List[int]: Message UIDs matching criteria
+        """
+        if not self.current_folder:
+            raise IMAPClientError("No folder selected")
+
+        try:
+            response = await self.imap.uid_search(criteria, charset=None)
+            if response.result != 'OK':
+                raise IMAPClientError(f"Search failed: {criteria}")
+
+            if not response.lines or not response.lines[0]:
+                return []
+
+            uids = response.lines[0].decode('utf-8').split()
+            return [int(uid) for uid in uids if uid.isdigit()]
+
+        except Exception as e:
+            raise IMAPClientError(f"Search error: {e}")
+
+    async def uid_fetch(self, uids: Sequence[int], items: str = '(BODY.PEEK[HEADER])') -> Dict[int, bytes]:
+        """
+        Fetch one literal item for a set of messages.
+
+        Args:
+            uids: Message UIDs to fetch
+            items: FETCH item list returning a single literal per message
+
+        Returns:
+            Dict[int, bytes]: Fetched literal by UID
+        """
+        if not self.current_folder:
+            raise IMAPClientError("No folder selected")
+        if not uids:
+            return {}
+
+        try:
+            uid_set = ','.join(str(uid) for uid in uids)
+            response = await self.imap.uid('fetch', uid_set, items)
+            if response.result != 'OK':
+                raise IMAPClientError(f"Failed to fetch UIDs {uid_set}")
+
+            return _collect_literals(response.lines)
+
+        except IMAPClientError:
+            raise
+        except Exception as e:
+            raise IMAPClientError(f"Fetch error: {e}")
+
+    async def get_message_headers(self, uids: Sequence[int], batch_size: int = 100) -> Dict[int, EmailHeader]:
+        """
+        Get headers for many messages, pipelining the batches.
+
+        Args:
+            uids: Message UIDs
+            batch_size: Number of UIDs per FETCH command
+
+        Returns:
+            Dict[int, EmailHeader]: Parsed headers by UID
+        """
+        batches = [uids[i:i + batch_size] for i in range(0, len(uids), batch_size)]
+        results = await asyncio.gather(*(self.uid_fetch(batch) for batch in batches))
+
+        headers: Dict[int, EmailHeader] = {}
+        for literals in results:
+            for uid, data in literals.items():
+                headers[uid] = self._parse_headers(_HEADER_PARSER.parsebytes(data))
+        return headers
+
+    async def fetch_folder_headers(self, folder_name: str = 'INBOX', criteria: str = 'ALL',
+                                   batch_size: int = 100) -> Dict[int, EmailHeader]:
+        """
+        Select a folder and fetch headers of all matching messages.
+
+        Args:
+            folder_name: Name of folder to synchronize
+            criteria: IMAP search criteria
+            batch_size: Number of UIDs per FETCH command
+
+        Returns:
+            Dict[int, EmailHeader]: Parsed headers by UID
+        """
+        await self.select_folder(folder_name)
+        uids = await self.search_messages(criteria)
+        return await self.get_message_headers(uids, batch_size)
+
+    async def _read_folder_status(self, folder_info: FolderInfo):
+        """Fill counters of a selected folder from a STATUS response."""
+        try:
+            response = await self.imap.status(
+                _mailbox_arg(folder_info.name),
+                '(MESSAGES RECENT UNSEEN UIDVALIDITY UIDNEXT)'
+            )
+            if response.result == 'OK' and response.lines:
+                _apply_folder_status(bytes(response.lines[0]), folder_info)
+        except Exception as e:
+            self.logger.debug(f"STATUS {folder_info.name} failed: {e}")
+
+    async def _logout(self, imap: aioimaplib.IMAP4):
+        """Log out of a connection that is no longer used."""
+        try:
+            await imap.logout()
+        except Exception:
+            pass
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.disconnect()
+
+
+class AsyncIMAPLoop:
+    """
+    Event loop running on a background thread.
+
+    Lets the UI thread submit IMAP coroutines without blocking; results are
+    delivered through concurrent.futures.Future objects.
+    """
+
+    def __init__(self):
+        """Initialize an unstarted loop."""
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.logger = logger
+
+    def start(self):
+        """Start the loop thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="adelfa-imap-loop",
+                daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the background loop.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the coroutine result
+        """
+        if not self._loop or not self._loop.is_running():
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop the loop and wait for its thread to exit.
+
+        Args:
+            timeout: Seconds to wait for the thread
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
+        if thread:
+            thread.join(timeout)
+        if loop and not loop.is_running():
+            loop.close()
+
+
+async def sync_folders(clients: Sequence[AsyncIMAPClient], folder_name: str = 'INBOX',
+                       criteria: str = 'ALL') -> List[Dict[int, EmailHeader]]:
+    """
+    Fetch folder headers from several connections concurrently.
+
+    Args:
+        clients: Connected clients, one per account or folder
+        folder_name: Name of folder to synchronize on every client
+        criteria: IMAP search criteria
+
+    Returns:
+        List[Dict[int, EmailHeader]]: Headers by UID per client, empty on failure
+    """
+    async def sync_one(client: AsyncIMAPClient) -> Dict[int, EmailHeader]:
+        try:
+            return await client.fetch_folder_headers(folder_name, criteria)
+        except Exception as e:
+            logger.error(f"Sync of {folder_name} failed for {client.account.email_address}: {e}")
+            return {}
+
+    return list(await asyncio.gather(*(sync_one(client) for client in clients)))
@@ -0,0 +1,185 @@
+"""
+Asynchronous SMTP client for Adelfa PIM suite.
+
+Mirrors the sending side of SMTPClient on top of aiosmtplib so that
+messages for several accounts can be sent concurrently from a single
+event loop instead of one blocking session at a time.
+"""
+
+import asyncio
+from typing import List, Optional, Sequence
+
+import aiosmtplib
+
+from ...utils.logging_setup import get_logger
+from ...data.models.accounts import Account, SecurityType
+from .credential_manager import CredentialManager
+from .smtp_client import OutgoingEmail, SMTPClient, SMTPClientError, _ssl_context
+
+logger = get_logger(__name__)
+
+
+class AsyncSMTPClient:
+    """
+    Asynchronous SMTP client for concurrent sending.
+
+    Each instance owns one session, on which aiosmtplib runs one command
+    at a time; run one client per account and await them together to send
+    in parallel. SMTPClient remains the client for blocking callers, and
+    AsyncIMAPLoop can drive this client from the UI thread.
+    """
+
+    # MIME construction is shared with the synchronous client
+    _build_mime_message = SMTPClient._build_mime_message
+    _add_attachment_to_message = SMTPClient._add_attachment_to_message
+    _set_attachment_headers = staticmethod(SMTPClient._set_attachment_headers)
+
+    def __init__(self, account: Account, credential_manager: CredentialManager):
+        """
+        Initialize asynchronous SMTP client.
+
+        Args:
+            account: Email account configuration
+            credential_manager: Credential manager for password retrieval
+        """
+        self.account = account
+        self.credential_manager = credential_manager
+        self.smtp: Optional[aiosmtplib.SMTP] = None
+        self.logger = logger
+
+    async def connect(self) -> bool:
+        """
+        Connect to SMTP server.
+
+        Returns:
+            bool: True if connection successful
+        """
+        smtp = None
+        try:
+            if self.smtp:
+                await self.disconnect()
+
+            security = self.account.outgoing_security
+            smtp = aiosmtplib.SMTP(
+                hostname=self.account.outgoing_server,
+                port=self.account.outgoing_port,
+                use_tls=security == SecurityType.TLS_SSL,
+                start_tls=security == SecurityType.STARTTLS,
+                tls_context=_ssl_context(),
+                timeout=30
+            )
+            await smtp.connect()
+
+            # Authenticate if required
+            if self.account.outgoing_auth_required:
+                password = self.credential_manager.retrieve_password(
+                    self.account.outgoing_password_key
+                )
+                if not password:
+                    raise SMTPClientError("No password available")
+
+                username = self.account.outgoing_username or self.account.incoming_username
+                await smtp.login(username, password)
+
+            self.smtp = smtp
+            self.logger.info(f"Connected to SMTP server {self.account.outgoing_server}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"SMTP connection failed: {e}")
+            if smtp and smtp.is_connected:
+                smtp.close()
+            return False
+
+    async def disconnect(self):
+        """Disconnect from SMTP server."""
+        smtp, self.smtp = self.smtp, None
+        if smtp:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+            self.logger.info("Disconnected from SMTP server")
+
+    def is_connected(self) -> bool:
+        """Check if a connection has been established."""
+        return self.smtp is not None and self.smtp.is_connected
+
+    async def send_email(self, email_msg: OutgoingEmail) -> bool:
+        """
+        Send an email message.
+
+        Args:
+            email_msg: Email message to send
+
+        Returns:
+            bool: True if sent successfully
+        """
+        if not self.is_connected():
+            raise SMTPClientError("Not connected to server")
+
+        # Attachments are base64-encoded here, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        mime_msg = await loop.run_in_executor(None, self._build_mime_message, email_msg)
+        return await self._send_mime(email_msg, mime_msg)
+
+    async def send_many(self, emails: Sequence[OutgoingEmail]) -> List[bool]:
+        """
+        Send several messages over this session.
+
+        All messages are built concurrently in worker threads; the session
+        then transmits them back to back without reconnecting.
+
+        Args:
+            emails: Email messages to send
+
+        Returns:
+            List[bool]: Send result per message, False on failure
+        """
+        if not self.is_connected():
+            raise SMTPClientError("Not connected to server")
+
+        loop = asyncio.get_running_loop()
+        built = await asyncio.gather(
+            *(loop.run_in_executor(None, self._build_mime_message, email_msg) for email_msg in emails),
+            return_exceptions=True
+        )
+
+        results = []
+        for email_msg, mime_msg in zip(emails, built):
+            try:
+                if isinstance(mime_msg, Exception):
+                    raise mime_msg
+                results.append(await self._send_mime(email_msg, mime_msg))
+            except Exception as e:
+                self.logger.error(f"Failed to send '{email_msg.subject}': {e}")
+                results.append(False)
+        return results
+
+    async def _send_mime(self, email_msg: OutgoingEmail, mime_msg) -> bool:
+        """Send a built MIME message and report whether it was accepted."""
+        recipients = [addr.email for addr in email_msg.iter_all_recipients()]
+        try:
+            refused, _ = await self.smtp.send_message(
+                mime_msg,
+                sender=email_msg.from_addr.email,
+                recipients=recipients
+            )
+        except aiosmtplib.SMTPException as e:
+            raise SMTPClientError(f"Failed to send email: {e}")
+
+        if refused:
+            self.logger.warning(f"Some recipients refused: {refused}")
+            return len(refused) < len(recipients)  # Partial success
+
+        self.logger.info(f"Email sent successfully to {len(recipients)} recipients")
+        return True
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.disconnect()
@@ -5,6 +5,7 @@ Handles secure storage and retrieval of account passwords, OAuth tokens,
 and other sensitive credentials using the system keyring.
 """
 
+import functools
 import keyring
 import keyring.errors
 from typing import Optional, Dict, Any
@@ -249,18 +250,16 @@ class CredentialStorageError(Exception):
     pass
 
 
-# Global credential manager instance
-_credential_manager: Optional[CredentialManager] = None
-
-
+@functools.lru_cache(maxsize=None)
 def get_credential_manager() -> CredentialManager:
     """
     Get the global credential manager instance.
     
+    Creating the manager probes the keyring with a full write, read and
+    delete cycle, so it is created on first use and then shared by every
+    repository and dialog in the process.
+    
     Returns:
         CredentialManager: Global credential manager instance
     """
-    global _credential_manager
-    if _credential_manager is None:
-        _credential_manager = CredentialManager()
-    return _credential_manager 
\ No newline at end of file
+    return CredentialManager() 
\ No newline at end of file
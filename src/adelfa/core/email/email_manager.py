@@ -6,6 +6,7 @@ and account management functionality with local caching for fast startup.
 """
 
 import threading
+from concurrent.futures import Future
 from typing import List, Optional, Dict, Callable, Any
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
@@ -17,7 +18,7 @@ from ...data.models.accounts import Account, EmailProtocol
 from ..cache_manager import CacheManager
 from .credential_manager import CredentialManager
 from .imap_client import IMAPClient, EmailMessage, FolderInfo, IMAPClientError
-from .smtp_client import SMTPClient, OutgoingEmail, EmailAddress, SMTPClientError
+from .smtp_client import SMTPClient, OutgoingEmail, EmailAddress, SMTPClientError, close_pool
 
 logger = get_logger(__name__)
 
@@ -202,6 +203,7 @@ class EmailManager:
                 email_account.imap_client.disconnect()
             
             if email_account.smtp_client:
+                email_account.smtp_client.shutdown()
                 email_account.smtp_client.disconnect()
             
             email_account.is_connected = False
@@ -220,6 +222,7 @@ class EmailManager:
         """Disconnect from all accounts."""
         for account_id in list(self.accounts.keys()):
             self.disconnect_account(account_id)
+        close_pool()
     
     def get_folders(self, account_id: Optional[int] = None, use_cache: bool = True) -> List[FolderInfo]:
         """
@@ -341,7 +344,65 @@ class EmailManager:
         except Exception as e:
             self.logger.error(f"Failed to get message {uid}: {e}")
             return None
-    
+
+    def get_message_preview(self, uid: int, folder: str = 'INBOX', max_bytes: int = 64 * 1024,
+                            account_id: Optional[int] = None) -> Optional[str]:
+        """
+        Get the beginning of a message body without downloading attachments.
+
+        Args:
+            uid: Message UID
+            folder: Folder containing the message
+            max_bytes: Maximum number of body bytes to fetch
+            account_id: Account ID, or None for default account
+
+        Returns:
+            str: Preview text or None if unavailable
+        """
+        account_id = account_id or self.default_account_id
+        if not account_id or account_id not in self.accounts:
+            return None
+
+        email_account = self.accounts[account_id]
+        if not email_account.imap_client:
+            return None
+
+        try:
+            email_account.imap_client.select_folder(folder)
+            return email_account.imap_client.get_message_preview(uid, max_bytes)
+        except Exception as e:
+            self.logger.error(f"Failed to get preview for message {uid}: {e}")
+            return None
+
+    def get_attachment(self, uid: int, part_number: str, folder: str = 'INBOX',
+                       account_id: Optional[int] = None) -> Optional[bytes]:
+        """
+        Download a single attachment part of a message.
+
+        Args:
+            uid: Message UID
+            part_number: IMAP part specifier of the attachment
+            folder: Folder containing the message
+            account_id: Account ID, or None for default account
+
+        Returns:
+            bytes: Attachment content or None if unavailable
+        """
+        account_id = account_id or self.default_account_id
+        if not account_id or account_id not in self.accounts:
+            return None
+
+        email_account = self.accounts[account_id]
+        if not email_account.imap_client:
+            return None
+
+        try:
+            email_account.imap_client.select_folder(folder)
+            return email_account.imap_client.get_attachment(uid, part_number)
+        except Exception as e:
+            self.logger.error(f"Failed to get attachment {part_number} of message {uid}: {e}")
+            return None
+
     def get_recent_messages(self, folder: str = 'INBOX', limit: int = 50,
                            account_id: Optional[int] = None, use_cache: bool = True) -> List[EmailMessage]:
         """
@@ -443,6 +504,27 @@ class EmailManager:
             self.logger.error(f"Failed to send email: {e}")
             raise EmailManagerError(f"Failed to send email: {e}")
     
+    def send_email_async(self, email: OutgoingEmail, account_id: Optional[int] = None) -> Future:
+        """
+        Send an email message in the background.
+        
+        Args:
+            email: Email message to send
+            account_id: Account ID, or None for default account
+        
+        Returns:
+            Future: Resolves to True if sent successfully, or raises SMTPClientError
+        """
+        account_id = account_id or self.default_account_id
+        if not account_id or account_id not in self.accounts:
+            raise EmailManagerError("No account available for sending")
+        
+        email_account = self.accounts[account_id]
+        if not email_account.smtp_client:
+            raise EmailManagerError("No SMTP client available")
+        
+        return email_account.smtp_client.send_email_async(email)
+    
     def mark_as_read(self, uid: int, folder: str = 'INBOX', account_id: Optional[int] = None):
         """Mark message as read."""
         account_id = account_id or self.default_account_id
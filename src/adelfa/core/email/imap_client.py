@@ -7,18 +7,19 @@ message operations, and real-time synchronization using IDLE.
 
 import imaplib
 import email
-import email.header
+import email.parser
 import email.utils
 import ssl
 import socket
 import threading
 import time
-from typing import Dict, List, Optional, Tuple, Any, Callable, Union
+from typing import Dict, List, Optional, Set, Tuple, Any, Callable, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from email.message import EmailMessage
 import re
 import base64
+import binascii
 import quopri
 
 from ...utils.logging_setup import get_logger
@@ -45,13 +46,45 @@ class EmailHeader:
 
 @dataclass
 class EmailAttachment:
-    """Email attachment information."""
+    """
+    Email attachment information.
+
+    Content is not kept in memory; ``load()`` fetches it on demand through
+    ``fetcher`` (normally a single BODY.PEEK of ``part_number``).
+    """
     filename: str
     content_type: str
     size: int
     content_id: Optional[str] = None
     is_inline: bool = False
-    data: Optional[bytes] = None
+    part_number: Optional[str] = None
+    fetcher: Optional[Callable[[], bytes]] = field(default=None, repr=False, compare=False)
+
+    def load(self) -> bytes:
+        """Fetch the attachment content."""
+        if self.fetcher is None:
+            raise IMAPClientError(f"Attachment {self.filename} cannot be loaded")
+        return self.fetcher()
+
+
+@dataclass
+class MessagePart:
+    """Leaf MIME part described by a BODYSTRUCTURE response."""
+    part_number: str
+    content_type: str
+    charset: Optional[str] = None
+    encoding: str = '7bit'
+    size: int = 0
+    filename: Optional[str] = None
+    content_id: Optional[str] = None
+    disposition: Optional[str] = None
+
+    @property
+    def is_attachment(self) -> bool:
+        """Check if part is an attachment rather than displayable body."""
+        return self.disposition == 'attachment' or (
+            self.filename is not None and not self.content_type.startswith('text/')
+        )
 
 
 @dataclass
@@ -95,6 +128,15 @@ class FolderInfo:
     unseen: int = 0
     uidvalidity: int = 0
     uidnext: int = 0
+    highestmodseq: int = 0
+
+
+@dataclass
+class FolderChanges:
+    """Folder changes reported by the server since a known MODSEQ."""
+    changed: Dict[int, List[str]] = field(default_factory=dict)
+    vanished: Set[int] = field(default_factory=set)
+    highestmodseq: int = 0
 
 
 class IMAPClientError(Exception):
@@ -102,6 +144,440 @@ class IMAPClientError(Exception):
     pass
 
 
+_LITERAL_RE = re.compile(rb'\{(\d+)\}\s*$')
+_FOLDER_RE = re.compile(r'\(([^)]*)\)\s+"([^"]*)"\s+"?([^"]*)"?')
+_ATOM_DELIMITERS = b' ()"\r\n'
+
+# STATUS response items and the folder status keys they fill
+_STATUS_RE = re.compile(rb'(MESSAGES|RECENT|UNSEEN|UIDVALIDITY|UIDNEXT|HIGHESTMODSEQ) (\d+)')
+_STATUS_FIELDS = {
+    b'MESSAGES': 'exists',
+    b'RECENT': 'recent',
+    b'UNSEEN': 'unseen',
+    b'UIDVALIDITY': 'uidvalidity',
+    b'UIDNEXT': 'uidnext',
+    b'HIGHESTMODSEQ': 'highestmodseq',
+}
+
+# Transfer encodings whose payload is the content itself
+_IDENTITY_ENCODINGS = frozenset({'7bit', '8bit', 'binary'})
+_ASCII_COMPATIBLE_CHARSETS = frozenset({
+    'us-ascii', 'ascii', 'utf-8', 'utf8', 'iso-8859-1', 'latin-1', 'windows-1252'
+})
+
+
+def _join_fetch_response(data: List[Any]) -> bytes:
+    """Rebuild a raw FETCH response, inlining literals as quoted strings."""
+    chunks = []
+    for item in data:
+        if isinstance(item, tuple):
+            chunks.append(_LITERAL_RE.sub(b'', item[0]))
+            literal = item[1].replace(b'\\', b'\\\\').replace(b'"', b'\\"')
+            chunks.append(b'"' + literal + b'"')
+        elif isinstance(item, bytes):
+            chunks.append(item)
+    return b''.join(chunks)
+
+
+def _parse_imap_list(data: bytes) -> List[Any]:
+    """
+    Parse a parenthesized IMAP response into nested lists.
+
+    Atoms and quoted strings become bytes, NIL becomes None.
+    """
+    stack: List[List[Any]] = [[]]
+    i, length = 0, len(data)
+    while i < length:
+        char = data[i]
+        if char == 0x28:  # (
+            stack.append([])
+            i += 1
+        elif char == 0x29:  # )
+            if len(stack) > 1:
+                closed = stack.pop()
+                stack[-1].append(closed)
+            i += 1
+        elif char == 0x22:  # "
+            value = bytearray()
+            j = i + 1
+            while j < length:
+                end = data.find(b'"', j)
+                escape = data.find(b'\\', j, end if end != -1 else length)
+                if escape != -1:
+                    value += data[j:escape]
+                    value += data[escape + 1:escape + 2]
+                    j = escape + 2
+                    continue
+                if end == -1:
+                    end = length
+                value += data[j:end]
+                j = end + 1
+                break
+            stack[-1].append(bytes(value))
+            i = j
+        elif char in b' \r\n':
+            i += 1
+        else:
+            j = i
+            while j < length and data[j] not in _ATOM_DELIMITERS:
+                j += 1
+            atom = data[i:j]
+            stack[-1].append(None if atom.upper() == b'NIL' else atom)
+            i = j
+    return stack[0]
+
+
+def _fetch_item(response: List[Any], name: bytes) -> Any:
+    """Return the value following ``name`` in a parsed FETCH response."""
+    for element in response:
+        if isinstance(element, list):
+            for key, value in zip(element[::2], element[1::2]):
+                if isinstance(key, bytes) and key.upper() == name:
+                    return value
+    return None
+
+
+def _apply_folder_status(status: bytes, folder_info: 'FolderInfo'):
+    """Copy STATUS counters onto folder info in a single scan."""
+    for match in _STATUS_RE.finditer(status):
+        setattr(folder_info, _STATUS_FIELDS[match.group(1)], int(match.group(2)))
+
+
+def _parse_uid_set(text: str) -> Set[int]:
+    """Expand an IMAP sequence set such as '41,43:116' into UIDs."""
+    uids: Set[int] = set()
+    for chunk in text.split(','):
+        chunk = chunk.strip()
+        if ':' in chunk:
+            start, end = (int(bound) for bound in chunk.split(':', 1))
+            uids.update(range(min(start, end), max(start, end) + 1))
+        elif chunk.isdigit():
+            uids.add(int(chunk))
+    return uids
+
+
+def _decode_modified_utf7(name: str) -> str:
+    """Decode an RFC 3501 modified UTF-7 mailbox name (e.g. 'Entw&APw-rfe')."""
+    if '&' not in name:
+        return name
+
+    decoded = []
+    i = 0
+    while i < len(name):
+        start = name.find('&', i)
+        if start == -1:
+            decoded.append(name[i:])
+            break
+        end = name.find('-', start)
+        if end == -1:
+            decoded.append(name[i:])
+            break
+        decoded.append(name[i:start])
+        chunk = name[start + 1:end]
+        if not chunk:
+            decoded.append('&')
+        else:
+            chunk = chunk.replace(',', '/')
+            chunk += '=' * (-len(chunk) % 4)
+            try:
+                decoded.append(base64.b64decode(chunk).decode('utf-16-be'))
+            except (ValueError, UnicodeDecodeError):
+                decoded.append(name[start:end + 1])
+        i = end + 1
+    return ''.join(decoded)
+
+
+def _encode_modified_utf7(name: str) -> str:
+    """Encode a mailbox name to RFC 3501 modified UTF-7."""
+    if name.isascii() and '&' not in name:
+        return name
+
+    encoded = []
+    pending = []
+
+    def flush():
+        if pending:
+            chunk = base64.b64encode(''.join(pending).encode('utf-16-be')).decode('ascii')
+            encoded.append('&' + chunk.rstrip('=').replace('/', ',') + '-')
+            pending.clear()
+
+    for char in name:
+        if 0x20 <= ord(char) <= 0x7e:
+            flush()
+            encoded.append('&-' if char == '&' else char)
+        else:
+            pending.append(char)
+    flush()
+    return ''.join(encoded)
+
+
+def _quote_mailbox(name: str) -> str:
+    """Quote a mailbox name for use inside a command argument."""
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _mailbox_arg(name: str) -> str:
+    """Encode and quote a folder name as a command argument."""
+    return _quote_mailbox(_encode_modified_utf7(name))
+
+
+def _parse_list_response(item: Any) -> Optional[Tuple[List[str], str, str]]:
+    """
+    Parse one LIST response line into (flags, delimiter, name).
+
+    Handles quoted names with spaces or escapes, literal names and NIL
+    delimiters; the folder name is decoded from modified UTF-7.
+    """
+    raw = _join_fetch_response([item]) if isinstance(item, tuple) else item
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    if not isinstance(raw, bytes):
+        return None
+
+    tokens = _parse_imap_list(raw)
+    if len(tokens) >= 3 and isinstance(tokens[0], list) and isinstance(tokens[2], bytes):
+        flags = [_text(flag) for flag in tokens[0] if isinstance(flag, bytes)]
+        delimiter = _text(tokens[1]) or ''
+        return flags, delimiter, _decode_modified_utf7(_text(tokens[2]))
+
+    # Fall back to the simple pattern for anything the tokenizer rejects
+    match = _FOLDER_RE.match(raw.decode('utf-8', errors='ignore'))
+    if not match:
+        return None
+    flags_str, delimiter, name = match.groups()
+    return flags_str.split(), delimiter, _decode_modified_utf7(name)
+
+
+def _text(value: Any) -> Optional[str]:
+    """Decode a BODYSTRUCTURE string value."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return None
+
+
+def _params(value: Any) -> Dict[str, str]:
+    """Convert a BODYSTRUCTURE parameter list into a lowercase-keyed dict."""
+    if not isinstance(value, list):
+        return {}
+    return {
+        _text(key).lower(): _text(val)
+        for key, val in zip(value[::2], value[1::2])
+        if isinstance(key, bytes) and isinstance(val, bytes)
+    }
+
+
+def _walk_body_structure(node: List[Any], part_number: str, parts: List[MessagePart]):
+    """Collect leaf parts of a parsed BODYSTRUCTURE in part-number order."""
+    if node and isinstance(node[0], list):
+        index = 1
+        for child in node:
+            if not isinstance(child, list):
+                break
+            _walk_body_structure(child, f"{part_number}.{index}" if part_number else str(index), parts)
+            index += 1
+        return
+
+    if len(node) < 7:
+        return
+
+    maintype = (_text(node[0]) or 'application').lower()
+    subtype = (_text(node[1]) or 'octet-stream').lower()
+    params = _params(node[2])
+
+    # Extension data starts after the type-specific fields
+    if maintype == 'text':
+        extension = 8
+    elif maintype == 'message' and subtype == 'rfc822':
+        extension = 10
+    else:
+        extension = 7
+
+    disposition = None
+    filename = params.get('name')
+    if len(node) > extension + 1 and isinstance(node[extension + 1], list) and node[extension + 1]:
+        disposition_node = node[extension + 1]
+        disposition = (_text(disposition_node[0]) or '').lower() or None
+        if len(disposition_node) > 1:
+            filename = _params(disposition_node[1]).get('filename') or filename
+
+    try:
+        size = int(node[6]) if node[6] else 0
+    except ValueError:
+        size = 0
+
+    parts.append(MessagePart(
+        part_number=part_number or '1',
+        content_type=f"{maintype}/{subtype}",
+        charset=params.get('charset'),
+        encoding=(_text(node[5]) or '7bit').lower(),
+        size=size,
+        filename=filename,
+        content_id=_text(node[3]),
+        disposition=disposition
+    ))
+
+
+_HEADER_PARSER = email.parser.BytesHeaderParser()
+_RFC2047_RE = re.compile(r'=\?([^?]+)\?([BbQq])\?([^?]*)\?=')
+_RFC2047_GAP_RE = re.compile(r'(?<=\?=)[ \t]+(?==\?)')
+
+
+def _unfold(value: str) -> str:
+    """Remove header folding line breaks."""
+    if '\n' in value:
+        return value.replace('\r\n', '').replace('\n', '')
+    return value
+
+
+def _decode_encoded_word(match: 're.Match') -> str:
+    """Decode a single RFC 2047 encoded word."""
+    charset, encoding, text = match.groups()
+    charset = charset.split('*', 1)[0]  # Drop RFC 2231 language suffix
+    try:
+        if encoding in 'Bb':
+            data = base64.b64decode(text + '=' * (-len(text) % 4))
+        else:
+            data = binascii.a2b_qp(text.encode('ascii', errors='ignore'), header=True)
+        return data.decode(charset, errors='ignore')
+    except (LookupError, ValueError):
+        return match.group(0)
+
+
+def _decode_header_value(value: str) -> str:
+    """
+    Decode a raw header value to text.
+
+    Pure ASCII values without encoded words are returned as-is; otherwise
+    all RFC 2047 encoded words are decoded in a single substitution pass.
+    """
+    if not value:
+        return ""
+
+    value = _unfold(value)
+    if not value.isascii():
+        # Raw 8-bit headers from the bytes parser are kept as surrogate
+        # escapes; in practice they are UTF-8
+        try:
+            value = value.encode('ascii', 'surrogateescape').decode('utf-8', errors='ignore')
+        except UnicodeEncodeError:
+            pass
+
+    if '=?' not in value:
+        return value
+
+    # Whitespace between adjacent encoded words is not part of the text
+    value = _RFC2047_GAP_RE.sub('', value)
+    return _RFC2047_RE.sub(_decode_encoded_word, value)
+
+
+# Multiparts nested deeper than this are yielded whole as one leaf part
+_MAX_MIME_DEPTH = 10
+
+
+def _split_header(raw: bytes, start: int, end: int) -> Tuple[int, int]:
+    """Return (header_end, body_start) offsets of a MIME entity."""
+    if raw.startswith(b'\r\n', start):
+        return start, start + 2
+    if raw.startswith(b'\n', start):
+        return start, start + 1
+
+    crlf = raw.find(b'\r\n\r\n', start, end)
+    lf = raw.find(b'\n\n', start, end)
+    if crlf != -1 and (lf == -1 or crlf < lf):
+        return crlf + 2, crlf + 4
+    if lf != -1:
+        return lf + 1, lf + 2
+    return end, end
+
+
+def _find_delimiter(raw: bytes, delimiter: bytes, start: int, end: int) -> int:
+    """Find a boundary delimiter that starts a line."""
+    pos = raw.find(delimiter, start, end)
+    while pos != -1 and pos != start and raw[pos - 1] != 0x0a:
+        pos = raw.find(delimiter, pos + 1, end)
+    return pos
+
+
+def _iter_mime_parts(raw: bytes, start: int = 0, end: Optional[int] = None,
+                     depth: int = 0, part_number: str = ''):
+    """
+    Yield (part_number, headers, body) for every leaf part of a raw MIME entity.
+
+    Only part headers are parsed; bodies are returned as memoryview slices
+    of ``raw`` so nothing is copied or decoded until the caller asks. Part
+    numbers follow IMAP section numbering ("1", "2.1", ...).
+    """
+    if end is None:
+        end = len(raw)
+
+    header_end, body_start = _split_header(raw, start, end)
+    headers = _HEADER_PARSER.parsebytes(raw[start:header_end])
+    boundary = headers.get_boundary() if headers.get_content_maintype() == 'multipart' else None
+
+    if not boundary or depth >= _MAX_MIME_DEPTH:
+        yield part_number or '1', headers, memoryview(raw)[body_start:end]
+        return
+
+    index = 1
+
+    delimiter = b'--' + boundary.encode('ascii', errors='ignore')
+    pos = _find_delimiter(raw, delimiter, body_start, end)
+    while pos != -1:
+        after = pos + len(delimiter)
+        if raw.startswith(b'--', after):
+            break  # Closing delimiter
+
+        line_end = raw.find(b'\n', after, end)
+        if line_end == -1:
+            break
+        part_start = line_end + 1
+
+        next_pos = _find_delimiter(raw, delimiter, part_start, end)
+        part_end = next_pos if next_pos != -1 else end
+
+        # The line break before a delimiter belongs to the delimiter
+        if next_pos != -1 and part_end > part_start and raw[part_end - 1] == 0x0a:
+            part_end -= 1
+            if part_end > part_start and raw[part_end - 1] == 0x0d:
+                part_end -= 1
+
+        child_number = f"{part_number}.{index}" if part_number else str(index)
+        yield from _iter_mime_parts(raw, part_start, part_end, depth + 1, child_number)
+        index += 1
+        pos = next_pos
+
+
+def _transfer_encoding(headers: email.message.Message) -> str:
+    """Return the normalized Content-Transfer-Encoding of a part."""
+    return str(headers.get('Content-Transfer-Encoding', '7bit')).strip().lower()
+
+
+def _estimate_decoded_size(encoded_size: int, encoding: str) -> int:
+    """Estimate decoded size without decoding (base64 lines are 76+2 bytes)."""
+    if encoding == 'base64':
+        return encoded_size * 57 // 78
+    return encoded_size
+
+
+def _decode_transfer_encoding(data: bytes, encoding: str, partial: bool = False) -> bytes:
+    """
+    Undo Content-Transfer-Encoding on a fetched part.
+
+    Args:
+        data: Raw part bytes as sent by the server
+        encoding: Transfer encoding from BODYSTRUCTURE
+        partial: Whether ``data`` may be truncated mid-encoding
+    """
+    if encoding == 'base64':
+        if not partial:
+            return base64.decodebytes(data)
+        compact = b''.join(data.split())
+        return base64.b64decode(compact[:len(compact) - len(compact) % 4])
+    if encoding == 'quoted-printable':
+        return quopri.decodestring(data)
+    return data
+
+
 class IMAPIdleHandler:
     """Handles IMAP IDLE for real-time email notifications."""
     
@@ -177,90 +653,119 @@ class IMAPClient:
         self.current_folder: Optional[str] = None
         self.idle_handler: Optional[IMAPIdleHandler] = None
         self.logger = logger
-        self._lock = threading.Lock()
+        # Guards connection state swaps only, never held across network I/O
+        self._lock = threading.RLock()
+        self._capabilities: frozenset = frozenset()
+        self._enabled: frozenset = frozenset()
     
     def connect(self) -> bool:
         """
         Connect to IMAP server.
         
+        Network I/O happens outside ``_lock``; the lock is only held while
+        the new connection is swapped in.
+        
         Returns:
             bool: True if connection successful
         """
+        imap = None
         try:
-            with self._lock:
-                if self.imap:
-                    self.disconnect()
-                
-                # Create connection
-                if self.account.incoming_security == SecurityType.TLS_SSL:
-                    self.imap = imaplib.IMAP4_SSL(
-                        self.account.incoming_server,
-                        self.account.incoming_port,
-                        timeout=30
-                    )
-                else:
-                    self.imap = imaplib.IMAP4(
-                        self.account.incoming_server,
-                        self.account.incoming_port,
-                        timeout=30
-                    )
-                    
-                    if self.account.incoming_security == SecurityType.STARTTLS:
-                        self.imap.starttls()
-                
-                # Authenticate
-                password = self.credential_manager.retrieve_password(
-                    self.account.incoming_password_key
+            # Create connection
+            if self.account.incoming_security == SecurityType.TLS_SSL:
+                imap = imaplib.IMAP4_SSL(
+                    self.account.incoming_server,
+                    self.account.incoming_port,
+                    timeout=30
+                )
+            else:
+                imap = imaplib.IMAP4(
+                    self.account.incoming_server,
+                    self.account.incoming_port,
+                    timeout=30
                 )
-                if not password:
-                    raise IMAPClientError("No password available")
-                
-                self.imap.login(self.account.incoming_username, password)
                 
-                self.logger.info(f"Connected to IMAP server {self.account.incoming_server}")
-                return True
+                if self.account.incoming_security == SecurityType.STARTTLS:
+                    imap.starttls()
+            
+            # Authenticate
+            password = self.credential_manager.retrieve_password(
+                self.account.incoming_password_key
+            )
+            if not password:
+                raise IMAPClientError("No password available")
+            
+            imap.login(self.account.incoming_username, password)
+
+            # Capabilities can change after authentication, so query once here
+            capabilities = self._load_capabilities(imap)
+            enabled = self._enable_extensions(imap, capabilities)
+
+            with self._lock:
+                previous, self.imap = self.imap, imap
+                self.current_folder = None
+                self._capabilities = capabilities
+                self._enabled = enabled
+
+            if previous:
+                self._logout(previous)
+
+            self.logger.info(f"Connected to IMAP server {self.account.incoming_server}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"IMAP connection failed: {e}")
-            self.imap = None
+            if imap:
+                self._logout(imap)
             return False
     
     def disconnect(self):
         """Disconnect from IMAP server."""
         try:
             with self._lock:
-                if self.idle_handler:
-                    self.idle_handler.stop()
-                    self.idle_handler = None
-                
-                if self.imap:
-                    try:
-                        self.imap.logout()
-                    except:
-                        pass
-                    self.imap = None
-                
+                idle_handler, self.idle_handler = self.idle_handler, None
+                imap, self.imap = self.imap, None
                 self.current_folder = None
-                self.logger.info("Disconnected from IMAP server")
+                self._capabilities = frozenset()
+                self._enabled = frozenset()
+
+            if idle_handler:
+                idle_handler.stop()
+
+            if imap:
+                self._logout(imap)
+
+            self.logger.info("Disconnected from IMAP server")
                 
         except Exception as e:
             self.logger.error(f"Error during disconnect: {e}")
     
     def is_connected(self) -> bool:
         """Check if connected to server."""
+        imap = self.imap
+        if not imap:
+            return False
+
         try:
-            with self._lock:
-                if not self.imap:
-                    return False
-                
-                # Try a simple command
-                status, _ = self.imap.noop()
-                return status == 'OK'
+            # Try a simple command
+            status, _ = imap.noop()
+            return status == 'OK'
                 
         except Exception as e:
             self.logger.debug(f"Connection check failed: {e}")
             return False
     
+    def has_capability(self, name: str) -> bool:
+        """
+        Check if the server advertised a capability.
+
+        Args:
+            name: Capability name (e.g. 'MOVE', 'IDLE', 'CONDSTORE', 'QRESYNC')
+
+        Returns:
+            bool: True if supported by the connected server
+        """
+        return name.upper() in self._capabilities
+
     def get_folders(self) -> List[FolderInfo]:
         """
         Get list of available folders.
@@ -278,16 +783,10 @@ class IMAPClient:
             
             folder_list = []
             for folder_data in folders:
-                if isinstance(folder_data, bytes):
-                    folder_str = folder_data.decode('utf-8')
-                else:
-                    folder_str = folder_data
-                
-                # Parse folder response: (flags) "delimiter" "name"
-                match = re.match(r'\(([^)]*)\)\s+"([^"]*)"\s+"?([^"]*)"?', folder_str)
-                if match:
-                    flags_str, delimiter, name = match.groups()
-                    flags = [f.strip() for f in flags_str.split() if f.strip()]
+                # Parse folder response: (flags) "delimiter" name
+                parsed = _parse_list_response(folder_data)
+                if parsed:
+                    flags, delimiter, name = parsed
                     
                     folder_info = FolderInfo(
                         name=name,
@@ -315,7 +814,7 @@ class IMAPClient:
             raise IMAPClientError("Not connected to server")
         
         try:
-            status, data = self.imap.select(folder_name)
+            status, data = self.imap.select(_mailbox_arg(folder_name))
             if status != 'OK':
                 raise IMAPClientError(f"Failed to select folder {folder_name}")
             
@@ -326,35 +825,102 @@ class IMAPClient:
                 name=folder_name,
                 delimiter="/",  # Will be updated from folder list if needed
                 flags=[],
-                exists=int(data[0]) if data else 0
+                exists=int(data[0]) if data and data[0] else 0
             )
-            
-            # Get additional folder status
-            try:
-                status, status_data = self.imap.status(
-                    folder_name, 
-                    '(MESSAGES RECENT UNSEEN UIDVALIDITY UIDNEXT)'
-                )
-                if status == 'OK' and status_data:
-                    status_str = status_data[0].decode('utf-8')
-                    # Parse status response
-                    if 'MESSAGES' in status_str:
-                        folder_info.exists = int(re.search(r'MESSAGES (\d+)', status_str).group(1))
-                    if 'RECENT' in status_str:
-                        folder_info.recent = int(re.search(r'RECENT (\d+)', status_str).group(1))
-                    if 'UNSEEN' in status_str:
-                        folder_info.unseen = int(re.search(r'UNSEEN (\d+)', status_str).group(1))
-                    if 'UIDVALIDITY' in status_str:
-                        folder_info.uidvalidity = int(re.search(r'UIDVALIDITY (\d+)', status_str).group(1))
-                    if 'UIDNEXT' in status_str:
-                        folder_info.uidnext = int(re.search(r'UIDNEXT (\d+)', status_str).group(1))
-            except:
-                pass  # Status command failed, use basic info
+            self._read_folder_status(folder_info)
             
             return folder_info
             
         except Exception as e:
             raise IMAPClientError(f"Failed to select folder: {e}")
+
+    def select_folder_qresync(self, folder_name: str, uidvalidity: int,
+                              modseq: int) -> Tuple[FolderInfo, FolderChanges]:
+        """
+        Re-select a folder and fetch everything changed since the last sync.
+
+        Uses SELECT ... (QRESYNC (uidvalidity modseq)) so flag changes and
+        expunged UIDs arrive in the same round-trip as the select. If the
+        returned folder UIDVALIDITY differs from ``uidvalidity`` the cached
+        state is invalid and a full resync is required.
+
+        Args:
+            folder_name: Name of folder to select
+            uidvalidity: UIDVALIDITY recorded at the last sync
+            modseq: HIGHESTMODSEQ recorded at the last sync
+
+        Returns:
+            Tuple of folder information and the changes since ``modseq``
+        """
+        if not self.is_connected():
+            raise IMAPClientError("Not connected to server")
+        if 'QRESYNC' not in self._enabled:
+            raise IMAPClientError("Server does not support QRESYNC")
+
+        try:
+            # imaplib sends the mailbox argument verbatim, which lets the
+            # QRESYNC select parameter ride along with the quoted name
+            mailbox = f'{_mailbox_arg(folder_name)} (QRESYNC ({uidvalidity} {modseq}))'
+            status, data = self.imap.select(mailbox)
+            if status != 'OK':
+                raise IMAPClientError(f"Failed to select folder {folder_name}")
+
+            self.current_folder = folder_name
+
+            folder_info = FolderInfo(
+                name=folder_name,
+                delimiter="/",
+                flags=[],
+                exists=int(data[0]) if data and data[0] else 0
+            )
+            self._read_folder_status(folder_info)
+
+            changes = FolderChanges(highestmodseq=modseq)
+            _, fetch_data = self.imap.response('FETCH')
+            self._collect_changes(fetch_data, changes)
+            self._collect_vanished(changes)
+            changes.highestmodseq = max(changes.highestmodseq, folder_info.highestmodseq)
+
+            return folder_info, changes
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to resync folder: {e}")
+
+    def sync_since(self, modseq: int) -> FolderChanges:
+        """
+        Get flag changes and expunges in the current folder since a MODSEQ.
+
+        Only messages modified after ``modseq`` are returned, so an
+        incremental refresh costs O(changed) instead of O(total messages).
+
+        Args:
+            modseq: HIGHESTMODSEQ recorded at the last sync
+
+        Returns:
+            FolderChanges: Changed flags per UID and vanished UIDs
+        """
+        if not self.current_folder:
+            raise IMAPClientError("No folder selected")
+        if not self.has_capability('CONDSTORE'):
+            raise IMAPClientError("Server does not support CONDSTORE")
+
+        try:
+            if 'QRESYNC' in self._enabled:
+                modifier = f'(CHANGEDSINCE {modseq} VANISHED)'
+            else:
+                modifier = f'(CHANGEDSINCE {modseq})'
+
+            status, data = self.imap.uid('fetch', '1:*', '(UID FLAGS)', modifier)
+            if status != 'OK':
+                raise IMAPClientError(f"Failed to fetch changes since {modseq}")
+
+            changes = FolderChanges(highestmodseq=modseq)
+            self._collect_changes(data, changes)
+            self._collect_vanished(changes)
+            return changes
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to sync changes: {e}")
     
     def search_messages(self, criteria: str = 'ALL') -> List[int]:
         """
@@ -402,13 +968,12 @@ class IMAPClient:
                 raise IMAPClientError(f"Failed to fetch headers for UID {uid}")
             
             header_data = data[0][1]
-            if isinstance(header_data, bytes):
-                header_str = header_data.decode('utf-8', errors='ignore')
-            else:
-                header_str = header_data
             
             # Parse headers
-            msg = email.message_from_string(header_str)
+            if isinstance(header_data, bytes):
+                msg = _HEADER_PARSER.parsebytes(header_data)
+            else:
+                msg = email.message_from_string(header_data)
             
             return self._parse_headers(msg)
             
@@ -479,18 +1044,23 @@ class IMAPClient:
             if size_match:
                 size = int(size_match.group(1))
             
-            # Parse email content
-            if isinstance(message_content, bytes):
-                email_str = message_content.decode('utf-8', errors='ignore')
-            else:
-                email_str = message_content
-            
-            msg = email.message_from_string(email_str)
-            
+            # Work on the raw bytes so parts keep their original encoding
+            # and no full-message str copy or Message tree is built
+            if isinstance(message_content, str):
+                message_content = message_content.encode('utf-8', 'surrogateescape')
+
+            header_end, _ = _split_header(message_content, 0, len(message_content))
+            msg = _HEADER_PARSER.parsebytes(message_content[:header_end])
+
             # Build EmailMessage object
             headers = self._parse_headers(msg)
-            text_content, html_content, attachments = self._parse_body(msg, include_attachments)
-            
+            text_content, html_content, attachments = self._parse_body_bytes(
+                message_content, include_attachments, self.current_folder, uid
+            )
+
+            # Drop the raw message before building the result
+            del data, message_data, message_content, msg
+
             # Get sequence number
             seq_num = self._get_sequence_number(uid)
             
@@ -511,7 +1081,88 @@ class IMAPClient:
             
         except Exception as e:
             raise IMAPClientError(f"Failed to get message: {e}")
-    
+
+    def get_body_structure(self, uid: int) -> List[MessagePart]:
+        """
+        Get the MIME layout of a message without downloading it.
+
+        Args:
+            uid: Message UID
+
+        Returns:
+            List[MessagePart]: Leaf parts in part-number order
+        """
+        if not self.current_folder:
+            raise IMAPClientError("No folder selected")
+
+        try:
+            status, data = self.imap.uid('fetch', str(uid), '(BODYSTRUCTURE)')
+            if status != 'OK' or not data or data[0] is None:
+                raise IMAPClientError(f"Failed to fetch body structure for UID {uid}")
+
+            structure = _fetch_item(_parse_imap_list(_join_fetch_response(data)), b'BODYSTRUCTURE')
+            parts: List[MessagePart] = []
+            if isinstance(structure, list):
+                _walk_body_structure(structure, '', parts)
+            return parts
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to get body structure: {e}")
+
+    def get_message_preview(self, uid: int, max_bytes: int = 64 * 1024) -> Optional[str]:
+        """
+        Get the beginning of a message's text body.
+
+        Only the first ``max_bytes`` of the displayable part are transferred,
+        so large attachments never cross the wire.
+
+        Args:
+            uid: Message UID
+            max_bytes: Maximum number of raw body bytes to fetch
+
+        Returns:
+            str: Preview text, or None if the message has no text part
+        """
+        parts = self.get_body_structure(uid)
+        body_parts = [part for part in parts if not part.is_attachment]
+        part = next((p for p in body_parts if p.content_type == 'text/plain'), None)
+        if part is None:
+            part = next((p for p in body_parts if p.content_type == 'text/html'), None)
+        if part is None:
+            return None
+
+        try:
+            section = f'BODY.PEEK[{part.part_number}]<0.{max_bytes}>'
+            status, data = self.imap.uid('fetch', str(uid), f'({section})')
+            if status != 'OK' or not data:
+                raise IMAPClientError(f"Failed to fetch preview for UID {uid}")
+
+            raw = self._fetch_literal(data)
+            partial = part.size > max_bytes
+            payload = _decode_transfer_encoding(raw, part.encoding, partial=partial)
+            return payload.decode(part.charset or 'utf-8', errors='ignore')
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to get message preview: {e}")
+
+    def get_attachment(self, uid: int, part_number: str) -> bytes:
+        """
+        Download a single MIME part of a message.
+
+        Args:
+            uid: Message UID
+            part_number: IMAP part specifier (e.g. "2" or "2.1")
+
+        Returns:
+            bytes: Decoded part content
+        """
+        parts = self.get_body_structure(uid)
+        part = next((p for p in parts if p.part_number == part_number), None)
+        if part is None:
+            raise IMAPClientError(f"Part {part_number} not found in UID {uid}")
+
+        return self._fetch_part(uid, part_number, part.encoding)
+
     def mark_as_read(self, uid: int):
         """Mark message as read."""
         self._set_flags(uid, ['\\Seen'], add=True)
@@ -552,16 +1203,15 @@ class IMAPClient:
             raise IMAPClientError("No folder selected")
         
         try:
-            # Use MOVE command if available, otherwise copy+delete
-            try:
-                status, _ = self.imap.uid('move', str(uid), target_folder)
-                if status == 'OK':
-                    return
-            except:
-                pass  # MOVE not supported, fall back to copy+delete
-            
+            # Use MOVE command if available (RFC 6851), otherwise copy+delete
+            if self.has_capability('MOVE'):
+                status, _ = self.imap.uid('move', str(uid), _mailbox_arg(target_folder))
+                if status != 'OK':
+                    raise IMAPClientError(f"Failed to move message to {target_folder}")
+                return
+
             # Copy to target folder
-            status, _ = self.imap.uid('copy', str(uid), target_folder)
+            status, _ = self.imap.uid('copy', str(uid), _mailbox_arg(target_folder))
             if status != 'OK':
                 raise IMAPClientError(f"Failed to copy message to {target_folder}")
             
@@ -619,6 +1269,115 @@ class IMAPClient:
         except Exception as e:
             raise IMAPClientError(f"Flag operation failed: {e}")
     
+    def _fetch_part(self, uid: int, part_number: str, encoding: str) -> bytes:
+        """Download and decode one MIME part of a message in the current folder."""
+        try:
+            status, data = self.imap.uid('fetch', str(uid), f'(BODY.PEEK[{part_number}])')
+            if status != 'OK' or not data:
+                raise IMAPClientError(f"Failed to fetch part {part_number} for UID {uid}")
+
+            return _decode_transfer_encoding(self._fetch_literal(data), encoding)
+
+        except Exception as e:
+            raise IMAPClientError(f"Failed to get attachment: {e}")
+
+    def _part_fetcher(self, folder: str, uid: int, part_number: str,
+                      encoding: str) -> Callable[[], bytes]:
+        """Build a lazy loader for one attachment part."""
+        def fetch() -> bytes:
+            if self.current_folder != folder:
+                self.select_folder(folder)
+            return self._fetch_part(uid, part_number, encoding)
+        return fetch
+
+    def _load_capabilities(self, imap: imaplib.IMAP4) -> frozenset:
+        """Query the server capability list once per connection."""
+        try:
+            status, data = imap.capability()
+            if status == 'OK' and data and data[0]:
+                return frozenset(data[0].decode('ascii', errors='ignore').upper().split())
+        except Exception as e:
+            self.logger.debug(f"CAPABILITY command failed: {e}")
+        return frozenset(cap.upper() for cap in getattr(imap, 'capabilities', ()))
+
+    def _enable_extensions(self, imap: imaplib.IMAP4, capabilities: frozenset) -> frozenset:
+        """Enable QRESYNC (or CONDSTORE) so the server tracks MODSEQ values."""
+        if 'ENABLE' not in capabilities:
+            return frozenset()
+
+        if 'QRESYNC' in capabilities:
+            extension = 'QRESYNC'
+        elif 'CONDSTORE' in capabilities:
+            extension = 'CONDSTORE'
+        else:
+            return frozenset()
+
+        try:
+            status, _ = imap.enable(extension)
+            if status == 'OK':
+                # QRESYNC implies CONDSTORE (RFC 7162)
+                return frozenset({extension, 'CONDSTORE'})
+        except Exception as e:
+            self.logger.debug(f"ENABLE {extension} failed: {e}")
+        return frozenset()
+
+    def _logout(self, imap: imaplib.IMAP4):
+        """Log out of a connection that is no longer shared."""
+        try:
+            imap.logout()
+        except Exception:
+            pass
+
+    def _read_folder_status(self, folder_info: FolderInfo):
+        """Fill counters of a selected folder from a STATUS response."""
+        items = 'MESSAGES RECENT UNSEEN UIDVALIDITY UIDNEXT'
+        if self.has_capability('CONDSTORE'):
+            items += ' HIGHESTMODSEQ'
+
+        try:
+            status, status_data = self.imap.status(_mailbox_arg(folder_info.name), f'({items})')
+            if status == 'OK' and status_data:
+                _apply_folder_status(status_data[0], folder_info)
+        except:
+            pass  # Status command failed, use basic info
+
+    def _collect_changes(self, data: List[Any], changes: FolderChanges):
+        """Record UID/FLAGS/MODSEQ items from untagged FETCH responses."""
+        for item in data or []:
+            if item is None:
+                continue
+            raw = _join_fetch_response([item]) if isinstance(item, tuple) else item
+            if not isinstance(raw, bytes):
+                continue
+
+            parsed = _parse_imap_list(raw)
+            uid = _fetch_item(parsed, b'UID')
+            if uid is None or not uid.isdigit():
+                continue
+
+            flags = _fetch_item(parsed, b'FLAGS') or []
+            changes.changed[int(uid)] = [_text(flag) for flag in flags if isinstance(flag, bytes)]
+
+            modseq = _fetch_item(parsed, b'MODSEQ')
+            if isinstance(modseq, list) and modseq and modseq[0] and modseq[0].isdigit():
+                changes.highestmodseq = max(changes.highestmodseq, int(modseq[0]))
+
+    def _collect_vanished(self, changes: FolderChanges):
+        """Record UIDs from untagged VANISHED responses (QRESYNC)."""
+        _, data = self.imap.response('VANISHED')
+        for item in data or []:
+            if not item:
+                continue
+            text = item.decode('ascii', errors='ignore') if isinstance(item, bytes) else str(item)
+            changes.vanished |= _parse_uid_set(text.replace('(EARLIER)', ''))
+
+    def _fetch_literal(self, data: List[Any]) -> bytes:
+        """Extract the first literal payload from a FETCH response."""
+        for item in data:
+            if isinstance(item, tuple) and len(item) >= 2:
+                return item[1]
+        return b''
+
     def _get_sequence_number(self, uid: int) -> int:
         """Get sequence number for UID."""
         try:
@@ -632,54 +1391,45 @@ class IMAPClient:
     def _parse_headers(self, msg: email.message.EmailMessage) -> EmailHeader:
         """Parse email headers into EmailHeader object."""
         try:
-            # Helper function to decode header values
-            def decode_header(header_value):
-                if not header_value:
-                    return ""
-                
-                decoded_parts = []
-                for part, encoding in email.header.decode_header(header_value):
-                    if isinstance(part, bytes):
-                        if encoding:
-                            decoded_parts.append(part.decode(encoding, errors='ignore'))
-                        else:
-                            decoded_parts.append(part.decode('utf-8', errors='ignore'))
-                    else:
-                        decoded_parts.append(part)
-                
-                return ''.join(decoded_parts)
-            
+            # Index each header once; raw values avoid Header object wrapping
+            raw_headers: Dict[str, str] = {}
+            for name, value in msg.raw_items():
+                raw_headers.setdefault(name.lower(), value)
+
+            def raw(name: str) -> str:
+                return _unfold(raw_headers.get(name, ''))
+
             # Parse basic headers
-            message_id = msg.get('Message-ID', '')
-            subject = decode_header(msg.get('Subject', ''))
-            from_addr = decode_header(msg.get('From', ''))
+            message_id = raw('message-id')
+            subject = _decode_header_value(raw_headers.get('subject', ''))
+            from_addr = _decode_header_value(raw_headers.get('from', ''))
             
             # Parse address lists
             to_addrs = []
-            if msg.get('To'):
-                to_addrs = [addr.strip() for addr in decode_header(msg.get('To')).split(',')]
+            if raw_headers.get('to'):
+                to_addrs = [addr.strip() for addr in _decode_header_value(raw_headers['to']).split(',')]
             
             cc_addrs = []
-            if msg.get('Cc'):
-                cc_addrs = [addr.strip() for addr in decode_header(msg.get('Cc')).split(',')]
+            if raw_headers.get('cc'):
+                cc_addrs = [addr.strip() for addr in _decode_header_value(raw_headers['cc']).split(',')]
             
             bcc_addrs = []
-            if msg.get('Bcc'):
-                bcc_addrs = [addr.strip() for addr in decode_header(msg.get('Bcc')).split(',')]
+            if raw_headers.get('bcc'):
+                bcc_addrs = [addr.strip() for addr in _decode_header_value(raw_headers['bcc']).split(',')]
             
             # Parse date
             date = datetime.now(timezone.utc)
-            if msg.get('Date'):
+            if raw_headers.get('date'):
                 try:
-                    date = email.utils.parsedate_to_datetime(msg.get('Date'))
+                    date = email.utils.parsedate_to_datetime(raw('date'))
                 except:
                     pass
             
             # Parse threading headers
-            in_reply_to = msg.get('In-Reply-To', '')
+            in_reply_to = raw('in-reply-to')
             references = []
-            if msg.get('References'):
-                references = [ref.strip() for ref in msg.get('References').split()]
+            if raw_headers.get('references'):
+                references = [ref.strip() for ref in raw('references').split()]
             
             return EmailHeader(
                 message_id=message_id,
@@ -702,6 +1452,71 @@ class IMAPClient:
                 to_addrs=[]
             )
     
+    def _parse_body_bytes(self, raw: bytes, include_attachments: bool = False,
+                          folder: Optional[str] = None,
+                          uid: Optional[int] = None) -> Tuple[Optional[str], Optional[str], List[EmailAttachment]]:
+        """
+        Parse email body and attachments from raw message bytes.
+
+        Parts are located with a single pass over the boundaries and only
+        the bodies that are kept get decoded. Unless ``include_attachments``
+        is set, attachments get a lazy fetcher for ``uid`` in ``folder``
+        instead of their content. Falls back to the full email.message
+        parser if the raw structure cannot be split.
+        """
+        text_content = None
+        html_content = None
+        attachments = []
+
+        try:
+            for part_number, part_headers, body in _iter_mime_parts(raw):
+                content_type = part_headers.get_content_type()
+                content_disposition = str(part_headers.get('Content-Disposition', ''))
+
+                if content_type == 'text/plain' and 'attachment' not in content_disposition:
+                    if text_content is None:
+                        text_content = self._decode_body(part_headers, body)
+                elif content_type == 'text/html' and 'attachment' not in content_disposition:
+                    if html_content is None:
+                        html_content = self._decode_body(part_headers, body)
+                elif content_disposition.startswith('attachment') or part_headers.get_filename():
+                    # This is an attachment
+                    filename = part_headers.get_filename() or f"attachment_{len(attachments) + 1}"
+                    encoding = _transfer_encoding(part_headers)
+
+                    attachment = EmailAttachment(
+                        filename=filename,
+                        content_type=content_type,
+                        size=_estimate_decoded_size(len(body), encoding),
+                        content_id=part_headers.get('Content-ID'),
+                        is_inline='inline' in content_disposition,
+                        part_number=part_number
+                    )
+
+                    if include_attachments:
+                        data = bytes(_decode_transfer_encoding(body, encoding))
+                        attachment.size = len(data)
+                        attachment.fetcher = lambda data=data: data
+                    elif uid is not None:
+                        attachment.fetcher = self._part_fetcher(folder, uid, part_number, encoding)
+
+                    attachments.append(attachment)
+
+        except Exception as e:
+            self.logger.debug(f"Raw MIME split failed, using full parser: {e}")
+            return self._parse_body(email.message_from_bytes(raw), include_attachments)
+
+        return text_content, html_content, attachments
+
+    def _decode_body(self, part_headers: email.message.Message, body: memoryview) -> str:
+        """Decode a raw leaf part body to text using its declared charset."""
+        payload = _decode_transfer_encoding(body, _transfer_encoding(part_headers))
+        charset = part_headers.get_content_charset() or 'utf-8'
+        try:
+            return str(payload, charset, 'ignore')
+        except LookupError:
+            return str(payload, 'utf-8', 'ignore')
+
     def _parse_body(self, msg: email.message.EmailMessage, include_attachments: bool = False) -> Tuple[Optional[str], Optional[str], List[EmailAttachment]]:
         """Parse email body and attachments."""
         text_content = None
@@ -723,19 +1538,19 @@ class IMAPClient:
                     elif content_disposition.startswith('attachment') or part.get_filename():
                         # This is an attachment
                         filename = part.get_filename() or f"attachment_{len(attachments) + 1}"
-                        size = len(part.get_payload(decode=True) or b'')
-                        
+                        data = part.get_payload(decode=True) or b''
+
                         attachment = EmailAttachment(
                             filename=filename,
                             content_type=content_type,
-                            size=size,
+                            size=len(data),
                             content_id=part.get('Content-ID'),
                             is_inline='inline' in content_disposition
                         )
-                        
+
                         if include_attachments:
-                            attachment.data = part.get_payload(decode=True)
-                        
+                            attachment.fetcher = lambda data=data: data
+
                         attachments.append(attachment)
             else:
                 # Single part message
@@ -752,14 +1567,40 @@ class IMAPClient:
     
     def _decode_part_content(self, part: email.message.EmailMessage) -> str:
         """Decode content of an email part."""
+        if part.is_multipart():
+            # Never render a sub-part tree as text
+            return ""
         try:
+            raw = part.get_payload(decode=False)
+            if isinstance(raw, str):
+                charset = part.get_content_charset() or 'utf-8'
+                encoding = str(part.get('Content-Transfer-Encoding', '7bit')).strip().lower()
+
+                # Already text: skip the bytes round-trip entirely
+                if (encoding in _IDENTITY_ENCODINGS and raw.isascii()
+                        and charset in _ASCII_COMPATIBLE_CHARSETS):
+                    return raw
+
+                try:
+                    # Bytes parser keeps 8-bit data as surrogate escapes
+                    payload = raw.encode('ascii', 'surrogateescape')
+                except UnicodeEncodeError:
+                    payload = None
+
+                if payload is not None:
+                    if encoding not in _IDENTITY_ENCODINGS:
+                        payload = _decode_transfer_encoding(payload, encoding)
+                    return payload.decode(charset, errors='ignore')
+
+                # Undecodable as bytes: already plain text
+                return raw
+
             payload = part.get_payload(decode=True)
             if isinstance(payload, bytes):
                 # Try to get charset from content type
                 charset = part.get_content_charset() or 'utf-8'
                 return payload.decode(charset, errors='ignore')
-            else:
-                return str(payload)
+            return ""
         except Exception as e:
             self.logger.error(f"Failed to decode part content: {e}")
             return "[Content decode error]"
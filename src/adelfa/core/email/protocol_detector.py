@@ -5,26 +5,243 @@ Automatically detects email server settings (IMAP/POP3/SMTP) and
 calendar/contact server settings (CalDAV/CardDAV) for common providers.
 """
 
+import asyncio
+import errno
 import imaplib
 import poplib
 import smtplib
 import socket
 import ssl
+import os
 import re
-from typing import Dict, List, Optional, Tuple, Any
+import selectors
+import sys
+import threading
+import time
+import functools
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
+import certifi
 import requests
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
 
 from ...utils.logging_setup import get_logger
 from ...data.models.accounts import SecurityType, EmailProtocol, AuthMethod
 
 logger = get_logger(__name__)
 
+# Server error text mapped to user-facing messages, checked in order
+_IMAP_AUTH_ERRORS = (
+    (re.compile(r"authentication failed", re.IGNORECASE),
+     "Authentication failed. Please check your credentials."),
+    (re.compile(r"invalid credentials", re.IGNORECASE), "Invalid credentials."),
+)
+_POP3_AUTH_FAIL_RE = re.compile(r"authentication failed|invalid", re.IGNORECASE)
 
-@dataclass
+# RFC 8305 delay before racing the next address of a dual-stack host
+_HAPPY_EYEBALLS_DELAY = 0.25  # seconds
+
+
+def _interleave_families(infos: List[Tuple]) -> List[Tuple]:
+    """Alternate address families, keeping the resolver's first choice first."""
+    by_family: 'OrderedDict[int, List[Tuple]]' = OrderedDict()
+    for info in infos:
+        by_family.setdefault(info[0], []).append(info)
+    
+    interleaved = []
+    queues = list(by_family.values())
+    while any(queues):
+        for queue in queues:
+            if queue:
+                interleaved.append(queue.pop(0))
+    return interleaved
+
+
+def _happy_eyeballs_connect(host: str, port: int, timeout: float,
+                            delay: float = _HAPPY_EYEBALLS_DELAY) -> socket.socket:
+    """
+    Open a TCP connection, racing the host's IPv6 and IPv4 addresses.
+    
+    A new attempt starts every ``delay`` seconds (or as soon as the previous
+    one fails) and the first connection to complete wins, so a blackholed
+    address family costs ``delay`` instead of the whole timeout (RFC 8305).
+    
+    Args:
+        host: Host name
+        port: TCP port
+        timeout: Overall time allowed for the race
+        delay: Stagger between attempts
+    
+    Returns:
+        socket.socket: Connected blocking socket
+    
+    Raises:
+        OSError: If no address could be connected within the timeout
+    """
+    addresses = _interleave_families(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+    deadline = time.monotonic() + timeout
+    selector = selectors.DefaultSelector()
+    attempts: List[socket.socket] = []
+    winner: Optional[socket.socket] = None
+    last_error: OSError = OSError(f"No addresses for {host}")
+    
+    try:
+        while winner is None:
+            if addresses:
+                family, sock_type, proto, _, address = addresses.pop(0)
+                sock = socket.socket(family, sock_type, proto)
+                sock.setblocking(False)
+                attempts.append(sock)
+                result = sock.connect_ex(address)
+                if result == 0:
+                    winner = sock
+                    break
+                if result in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    selector.register(sock, selectors.EVENT_WRITE)
+                else:
+                    last_error = OSError(result, os.strerror(result))
+                    continue
+            
+            if not selector.get_map():
+                raise last_error
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Connection to {host}:{port} timed out")
+            
+            for key, _ in selector.select(min(delay, remaining) if addresses else remaining):
+                sock = key.fileobj
+                selector.unregister(sock)
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0:
+                    winner = sock
+                    break
+                last_error = OSError(error, os.strerror(error))
+        
+        winner.setblocking(True)
+        return winner
+    
+    finally:
+        selector.close()
+        for sock in attempts:
+            if sock is not winner:
+                sock.close()
+
+
+# One client context for every probe: building a default context parses the
+# system CA bundle, which would otherwise happen on each TLS handshake
+_SSL_CTX = ssl.create_default_context()
+
+# HTTPS probes trust the same certifi bundle requests verifies against by
+# default, not the system store, which bundled builds may not have
+_HTTP_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+
+class _SharedContextAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections verify against the shared HTTPS context."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = _HTTP_SSL_CTX
+        super().init_poolmanager(*args, **kwargs)
+    
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True:
+            # _HTTP_SSL_CTX already holds requests' default bundle; a CA path
+            # here would make urllib3 reload it into the context per connection
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+
+class _ConnectedIMAP4(imaplib.IMAP4):
+    """IMAP4 over an already connected socket."""
+    
+    def __init__(self, sock: socket.socket, host: str, port: int):
+        self._connected_sock = sock
+        super().__init__(host, port, timeout=sock.gettimeout())
+    
+    def _create_socket(self, timeout):
+        return self._connected_sock
+
+
+class _ConnectedIMAP4_SSL(imaplib.IMAP4_SSL):
+    """IMAP4 over TLS on an already connected socket."""
+    
+    def __init__(self, sock: socket.socket, host: str, port: int):
+        self._connected_sock = sock
+        super().__init__(host, port, ssl_context=_SSL_CTX, timeout=sock.gettimeout())
+    
+    def _create_socket(self, timeout):
+        return self.ssl_context.wrap_socket(self._connected_sock, server_hostname=self.host)
+
+
+class _ConnectedSMTP(smtplib.SMTP):
+    """SMTP over an already connected socket."""
+    
+    def __init__(self, sock: socket.socket, host: str, port: int):
+        self._connected_sock = sock
+        super().__init__(host, port, timeout=sock.gettimeout())
+    
+    def _get_socket(self, host, port, timeout):
+        return self._connected_sock
+
+
+class _ConnectedSMTP_SSL(smtplib.SMTP_SSL):
+    """SMTP over TLS on an already connected socket."""
+    
+    def __init__(self, sock: socket.socket, host: str, port: int):
+        self._connected_sock = sock
+        super().__init__(host, port, context=_SSL_CTX, timeout=sock.gettimeout())
+    
+    def _get_socket(self, host, port, timeout):
+        return self.context.wrap_socket(self._connected_sock, server_hostname=host)
+
+
+# Per-process detection caches shared by all detectors
+_DETECTION_CACHE_SIZE = 256
+_DEAD_HOST_TTL = 300  # seconds
+_detection_cache: 'OrderedDict[Tuple[str, str], Any]' = OrderedDict()
+_dead_hosts: Dict[Tuple[str, int, SecurityType], float] = {}
+_cache_lock = threading.Lock()
+
+
+def _cached_detection(method: Callable) -> Callable:
+    """
+    Remember successful per-domain detections in an LRU cache.
+    
+    Failed detections are not cached, so a domain whose servers were
+    unreachable is probed again on the next call.
+    """
+    @functools.wraps(method)
+    def wrapper(self, domain: str):
+        key = (domain, method.__name__)
+        with _cache_lock:
+            if key in _detection_cache:
+                _detection_cache.move_to_end(key)
+                return _detection_cache[key]
+        
+        result = method(self, domain)
+        found = any(result) if isinstance(result, tuple) else result is not None
+        if found:
+            with _cache_lock:
+                _detection_cache[key] = result
+                while len(_detection_cache) > _DETECTION_CACHE_SIZE:
+                    _detection_cache.popitem(last=False)
+        return result
+    
+    return wrapper
+
+
+@dataclass(frozen=True, slots=True)
 class ServerSettings:
     """Server configuration settings."""
     server: str
@@ -34,7 +251,7 @@ class ServerSettings:
     auth_method: AuthMethod = AuthMethod.PASSWORD
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DetectionResult:
     """Result of protocol detection."""
     success: bool
@@ -45,6 +262,65 @@ class DetectionResult:
     provider_name: Optional[str] = None
 
 
+# Common provider configurations, keyed by casefolded domain
+_PROVIDER_CONFIGS = {
+    "gmail.com": {
+        "name": "Gmail",
+        "imap": ServerSettings("imap.gmail.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp.gmail.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://apidata.googleusercontent.com/caldav/v2/",
+        "carddav": "https://www.google.com/.well-known/carddav",
+        "auth_method": AuthMethod.OAUTH2
+    },
+    "outlook.com": {
+        "name": "Outlook.com",
+        "imap": ServerSettings("outlook.office365.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp-mail.outlook.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://outlook.office365.com/EWS/Exchange.asmx",
+        "carddav": None,  # Uses Exchange Web Services
+        "auth_method": AuthMethod.OAUTH2
+    },
+    "hotmail.com": {
+        "name": "Hotmail",
+        "imap": ServerSettings("outlook.office365.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp-mail.outlook.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://outlook.office365.com/EWS/Exchange.asmx",
+        "carddav": None,
+        "auth_method": AuthMethod.OAUTH2
+    },
+    "yahoo.com": {
+        "name": "Yahoo Mail",
+        "imap": ServerSettings("imap.mail.yahoo.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp.mail.yahoo.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://caldav.calendar.yahoo.com/",
+        "carddav": "https://carddav.address.yahoo.com/",
+        "auth_method": AuthMethod.PASSWORD
+    },
+    "icloud.com": {
+        "name": "iCloud",
+        "imap": ServerSettings("imap.mail.me.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp.mail.me.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://caldav.icloud.com/",
+        "carddav": "https://contacts.icloud.com/",
+        "auth_method": AuthMethod.PASSWORD
+    },
+    "me.com": {
+        "name": "iCloud",
+        "imap": ServerSettings("imap.mail.me.com", 993, SecurityType.TLS_SSL),
+        "smtp": ServerSettings("smtp.mail.me.com", 587, SecurityType.STARTTLS),
+        "caldav": "https://caldav.icloud.com/",
+        "carddav": "https://contacts.icloud.com/",
+        "auth_method": AuthMethod.PASSWORD
+    }
+}
+
+# Read-only view shared by every detector; settings are frozen dataclasses
+PROVIDER_CONFIGS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    sys.intern(domain): MappingProxyType(config)
+    for domain, config in _PROVIDER_CONFIGS.items()
+})
+
+
 class ProtocolDetector:
     """
     Detects email, calendar, and contact server settings.
@@ -54,66 +330,68 @@ class ProtocolDetector:
     """
     
     # Common provider configurations
-    PROVIDER_CONFIGS = {
-        "gmail.com": {
-            "name": "Gmail",
-            "imap": ServerSettings("imap.gmail.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp.gmail.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://apidata.googleusercontent.com/caldav/v2/",
-            "carddav": "https://www.google.com/.well-known/carddav",
-            "auth_method": AuthMethod.OAUTH2
-        },
-        "outlook.com": {
-            "name": "Outlook.com",
-            "imap": ServerSettings("outlook.office365.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp-mail.outlook.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://outlook.office365.com/EWS/Exchange.asmx",
-            "carddav": None,  # Uses Exchange Web Services
-            "auth_method": AuthMethod.OAUTH2
-        },
-        "hotmail.com": {
-            "name": "Hotmail",
-            "imap": ServerSettings("outlook.office365.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp-mail.outlook.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://outlook.office365.com/EWS/Exchange.asmx",
-            "carddav": None,
-            "auth_method": AuthMethod.OAUTH2
-        },
-        "yahoo.com": {
-            "name": "Yahoo Mail",
-            "imap": ServerSettings("imap.mail.yahoo.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp.mail.yahoo.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://caldav.calendar.yahoo.com/",
-            "carddav": "https://carddav.address.yahoo.com/",
-            "auth_method": AuthMethod.PASSWORD
-        },
-        "icloud.com": {
-            "name": "iCloud",
-            "imap": ServerSettings("imap.mail.me.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp.mail.me.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://caldav.icloud.com/",
-            "carddav": "https://contacts.icloud.com/",
-            "auth_method": AuthMethod.PASSWORD
-        },
-        "me.com": {
-            "name": "iCloud",
-            "imap": ServerSettings("imap.mail.me.com", 993, SecurityType.TLS_SSL),
-            "smtp": ServerSettings("smtp.mail.me.com", 587, SecurityType.STARTTLS),
-            "caldav": "https://caldav.icloud.com/",
-            "carddav": "https://contacts.icloud.com/",
-            "auth_method": AuthMethod.PASSWORD
-        }
-    }
+    PROVIDER_CONFIGS = PROVIDER_CONFIGS
     
     # Common port combinations to try
     IMAP_PORTS = [(993, SecurityType.TLS_SSL), (143, SecurityType.STARTTLS), (143, SecurityType.NONE)]
     POP3_PORTS = [(995, SecurityType.TLS_SSL), (110, SecurityType.STARTTLS), (110, SecurityType.NONE)]
     SMTP_PORTS = [(587, SecurityType.STARTTLS), (465, SecurityType.TLS_SSL), (25, SecurityType.NONE)]
     
+    # RFC 6186 service records to query before guessing host names
+    IMAP_SRV = [("_imaps._tcp", SecurityType.TLS_SSL), ("_imap._tcp", SecurityType.STARTTLS)]
+    SMTP_SRV = [("_submissions._tcp", SecurityType.TLS_SSL), ("_submission._tcp", SecurityType.STARTTLS)]
+    
+    # Domains detected side by side by detect_settings_many
+    MAX_PARALLEL_DOMAINS = 4
+    
+    # Depth 0 PROPFIND used to confirm DAV endpoints without downloading a page
+    PROPFIND_HEADERS = {"Depth": "0", "Content-Type": "application/xml; charset=utf-8"}
+    PROPFIND_BODY = (
+        b'<?xml version="1.0" encoding="utf-8"?>'
+        b'<propfind xmlns="DAV:"><prop><current-user-principal/></prop></propfind>'
+    )
+    DAV_STATUS_CODES = frozenset({200, 207, 301, 302, 307, 308, 401})
+    
+    # Mozilla autoconfig sources: the provider's own file, then the ISP database
+    AUTOCONFIG_URLS = [
+        "https://autoconfig.{domain}/mail/config-v1.1.xml",
+        "https://autoconfig.thunderbird.net/v1.1/{domain}",
+    ]
+    AUTOCONFIG_SOCKET_TYPES = {
+        "SSL": SecurityType.TLS_SSL,
+        "STARTTLS": SecurityType.STARTTLS,
+        "plain": SecurityType.NONE,
+    }
+    
     def __init__(self):
         """Initialize the protocol detector."""
         self.logger = logger
-        self.timeout = 10  # seconds
+        # Per-phase timeouts in seconds, so an unreachable candidate fails fast
+        self.connect_timeout = 3  # TCP connect and DNS lookups
+        self.tls_timeout = 5  # TLS handshake and protocol exchange
+        self.http_timeout = 5  # HTTP response read
+        # Probes are I/O bound, so the whole candidate matrix runs at once
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="adelfa-probe")
+        # Phases wait on probes, so they must not share the probe pool
+        self._phase_executor = ThreadPoolExecutor(
+            max_workers=3 * self.MAX_PARALLEL_DOMAINS, thread_name_prefix="adelfa-detect"
+        )
+        # Keep-alive pool so probes to the same host share one TLS connection
+        self._http = requests.Session()
+        adapter = _SharedContextAdapter(pool_connections=8, pool_maxsize=16)
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+        # Credential tests by protocol; anything else is tested as SMTP
+        self._AUTH_DISPATCH = {
+            EmailProtocol.IMAP: self._test_imap_auth,
+            EmailProtocol.POP3: self._test_pop3_auth,
+        }
+    
+    def close(self):
+        """Shut down the probe pools and the HTTP session."""
+        self._phase_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
     
     def detect_settings(self, email_address: str) -> DetectionResult:
         """
@@ -126,14 +404,7 @@ class ProtocolDetector:
             DetectionResult: Detection results
         """
         try:
-            domain = email_address.split('@')[1].lower()
-            
-            # Check if we have predefined settings for this domain
-            if domain in self.PROVIDER_CONFIGS:
-                return self._get_predefined_settings(domain)
-            
-            # Try generic detection
-            return self._detect_generic_settings(domain)
+            return self.detect_settings_for_domain(self._email_domain(email_address))
             
         except Exception as e:
             self.logger.error(f"Failed to detect settings for {email_address}: {e}")
@@ -142,63 +413,186 @@ class ProtocolDetector:
                 error_message=f"Detection failed: {str(e)}"
             )
     
-    def _get_predefined_settings(self, domain: str) -> DetectionResult:
-        """Get predefined settings for known providers."""
+    def detect_settings_for_domain(self, domain: str) -> DetectionResult:
+        """
+        Detect server settings for a mail domain.
+        
+        Args:
+            domain: Domain part of an email address
+        
+        Returns:
+            DetectionResult: Detection results
+        """
+        domain = domain.casefold()
+        
+        # Check if we have predefined settings for this domain
+        config = self.PROVIDER_CONFIGS.get(domain)
+        if config is not None:
+            return self._get_predefined_settings(config)
+        
+        # Try generic detection
+        return self._detect_generic_settings(domain)
+    
+    def detect_settings_many(self, email_addresses: Iterable[str]) -> Dict[str, DetectionResult]:
+        """
+        Detect server settings for many addresses at once.
+        
+        Each distinct domain is detected once, several domains in parallel,
+        and the result is shared by every address on that domain.
+        
+        Args:
+            email_addresses: Email addresses to detect settings for
+        
+        Returns:
+            Dict[str, DetectionResult]: Detection results by address
+        """
+        results: Dict[str, DetectionResult] = {}
+        addresses_by_domain: Dict[str, List[str]] = defaultdict(list)
+        
+        for email_address in email_addresses:
+            try:
+                addresses_by_domain[self._email_domain(email_address)].append(email_address)
+            except ValueError as e:
+                results[email_address] = DetectionResult(
+                    success=False,
+                    error_message=f"Detection failed: {str(e)}"
+                )
+        
+        if not addresses_by_domain:
+            return results
+        
+        # Domain tasks block on phases and probes, so they get their own pool
+        domains = list(addresses_by_domain)
+        workers = min(self.MAX_PARALLEL_DOMAINS, len(domains))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="adelfa-domain") as pool:
+            for domain, result in zip(domains, pool.map(self.detect_settings_for_domain, domains)):
+                for email_address in addresses_by_domain[domain]:
+                    results[email_address] = result
+        
+        return results
+    
+    async def detect_settings_async(self, email_address: str) -> DetectionResult:
+        """
+        Detect server settings for an email address on the running event loop.
+        
+        Mail server probes are non-blocking connections driven by asyncio, so
+        the whole candidate matrix runs without a thread per probe.
+        Autoconfig and DAV lookups reuse the pooled HTTP session on worker
+        threads.
+        
+        Args:
+            email_address: Email address to detect settings for
+        
+        Returns:
+            DetectionResult: Detection results
+        """
         try:
-            config = self.PROVIDER_CONFIGS[domain]
+            domain = self._email_domain(email_address)
             
-            email_settings = {}
-            if "imap" in config:
-                email_settings["imap"] = config["imap"]
-            if "smtp" in config:
-                email_settings["smtp"] = config["smtp"]
+            config = self.PROVIDER_CONFIGS.get(domain)
+            if config is not None:
+                return self._get_predefined_settings(config)
             
-            return DetectionResult(
-                success=True,
-                email_settings=email_settings,
-                caldav_url=config.get("caldav"),
-                carddav_url=config.get("carddav"),
-                provider_name=config["name"]
-            )
+            return await self._detect_generic_settings_async(domain)
             
         except Exception as e:
-            self.logger.error(f"Failed to get predefined settings for {domain}: {e}")
+            self.logger.error(f"Failed to detect settings for {email_address}: {e}")
             return DetectionResult(
                 success=False,
-                error_message=f"Failed to get predefined settings: {str(e)}"
+                error_message=f"Detection failed: {str(e)}"
             )
     
+    def _email_domain(self, email_address: str) -> str:
+        """Extract the casefolded domain of an email address."""
+        _, at, domain = email_address.rpartition('@')
+        if not at or not domain:
+            raise ValueError(f"Invalid email address: {email_address}")
+        return domain.casefold()
+    
+    def _get_predefined_settings(self, config: Mapping[str, Any]) -> DetectionResult:
+        """Get predefined settings for known providers."""
+        email_settings = {}
+        if "imap" in config:
+            email_settings["imap"] = config["imap"]
+        if "smtp" in config:
+            email_settings["smtp"] = config["smtp"]
+        
+        return DetectionResult(
+            success=True,
+            email_settings=email_settings,
+            caldav_url=config.get("caldav"),
+            carddav_url=config.get("carddav"),
+            provider_name=config["name"]
+        )
+    
     def _detect_generic_settings(self, domain: str) -> DetectionResult:
         """Detect settings using generic methods."""
         try:
-            email_settings = {}
+            # The phases are independent, so run them side by side
+            dav_future = self._phase_executor.submit(self._detect_dav_settings, domain)
+            
+            # One autoconfig document can replace both mail probe phases
+            autoconfig = self._detect_autoconfig(domain)
+            email_settings = dict(autoconfig.email_settings) if autoconfig else {}
+            
+            imap_future = None
+            if "imap" not in email_settings:
+                imap_future = self._phase_executor.submit(self._detect_imap_settings, domain)
+            smtp_future = None
+            if "smtp" not in email_settings:
+                smtp_future = self._phase_executor.submit(self._detect_smtp_settings, domain)
             
             # Try to detect IMAP settings
-            imap_settings = self._detect_imap_settings(domain)
-            if imap_settings:
-                email_settings["imap"] = imap_settings
+            if imap_future:
+                imap_settings = imap_future.result()
+                if imap_settings:
+                    email_settings["imap"] = imap_settings
             
             # Try to detect SMTP settings
-            smtp_settings = self._detect_smtp_settings(domain)
-            if smtp_settings:
-                email_settings["smtp"] = smtp_settings
+            if smtp_future:
+                smtp_settings = smtp_future.result()
+                if smtp_settings:
+                    email_settings["smtp"] = smtp_settings
             
             # Try to detect CalDAV/CardDAV settings
-            caldav_url, carddav_url = self._detect_dav_settings(domain)
-            
-            if email_settings or caldav_url or carddav_url:
-                return DetectionResult(
-                    success=True,
-                    email_settings=email_settings if email_settings else None,
-                    caldav_url=caldav_url,
-                    carddav_url=carddav_url
+            caldav_url, carddav_url = dav_future.result()
+            
+            return self._generic_result(email_settings, caldav_url, carddav_url, autoconfig)
+                
+        except Exception as e:
+            self.logger.error(f"Generic detection failed for {domain}: {e}")
+            return DetectionResult(
+                success=False,
+                error_message=f"Generic detection failed: {str(e)}"
+            )
+    
+    async def _detect_generic_settings_async(self, domain: str) -> DetectionResult:
+        """Detect settings using generic methods on the event loop."""
+        try:
+            dav_task = asyncio.create_task(asyncio.to_thread(self._detect_dav_settings, domain))
+            
+            autoconfig = await asyncio.to_thread(self._detect_autoconfig, domain)
+            email_settings = dict(autoconfig.email_settings) if autoconfig else {}
+            
+            phases = {}
+            if "imap" not in email_settings:
+                phases["imap"] = self._detect_mail_settings_async(
+                    domain, "imap", self.IMAP_SRV, self.IMAP_PORTS, EmailProtocol.IMAP
                 )
-            else:
-                return DetectionResult(
-                    success=False,
-                    error_message="Could not detect any server settings"
+            if "smtp" not in email_settings:
+                phases["smtp"] = self._detect_mail_settings_async(
+                    domain, "smtp", self.SMTP_SRV, self.SMTP_PORTS
                 )
-                
+            
+            detected = await asyncio.gather(*phases.values())
+            for name, settings in zip(phases, detected):
+                if settings:
+                    email_settings[name] = settings
+            
+            caldav_url, carddav_url = await dav_task
+            
+            return self._generic_result(email_settings, caldav_url, carddav_url, autoconfig)
+            
         except Exception as e:
             self.logger.error(f"Generic detection failed for {domain}: {e}")
             return DetectionResult(
@@ -206,100 +600,591 @@ class ProtocolDetector:
                 error_message=f"Generic detection failed: {str(e)}"
             )
     
+    def _generic_result(self, email_settings: Dict[str, ServerSettings], caldav_url: Optional[str],
+                        carddav_url: Optional[str],
+                        autoconfig: Optional[DetectionResult]) -> DetectionResult:
+        """Combine the outcome of the generic detection phases."""
+        if email_settings or caldav_url or carddav_url:
+            return DetectionResult(
+                success=True,
+                email_settings=email_settings if email_settings else None,
+                caldav_url=caldav_url,
+                carddav_url=carddav_url,
+                provider_name=autoconfig.provider_name if autoconfig else None
+            )
+        else:
+            return DetectionResult(
+                success=False,
+                error_message="Could not detect any server settings"
+            )
+    
+    def _detect_autoconfig(self, domain: str) -> Optional[DetectionResult]:
+        """
+        Detect mail settings from a Mozilla autoconfig document.
+        
+        Args:
+            domain: Email domain
+        
+        Returns:
+            Optional[DetectionResult]: IMAP/SMTP settings from the first
+            source that describes at least one of them
+        """
+        urls = [url.format(domain=domain) for url in self.AUTOCONFIG_URLS]
+        futures = [self._executor.submit(self._fetch_autoconfig, url, domain) for url in urls]
+        
+        try:
+            for future in futures:
+                result = future.result()
+                if result:
+                    return result
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return None
+    
+    def _fetch_autoconfig(self, url: str, domain: str) -> Optional[DetectionResult]:
+        """Download and parse one autoconfig document."""
+        try:
+            response = self._http.get(
+                url, timeout=(self.connect_timeout, self.http_timeout), verify=True
+            )
+            if response.status_code != 200:
+                return None
+            return self._parse_autoconfig(response.content, domain)
+        
+        except (requests.RequestException, ET.ParseError) as e:
+            self.logger.debug(f"Autoconfig lookup {url} failed: {e}")
+            return None
+    
+    def _parse_autoconfig(self, document: bytes, domain: str) -> Optional[DetectionResult]:
+        """
+        Parse a config-v1.1 autoconfig document.
+        
+        Args:
+            document: Raw XML document
+            domain: Email domain, substituted for %EMAILDOMAIN%
+        
+        Returns:
+            Optional[DetectionResult]: Settings, or None if no usable server
+        """
+        provider = ET.fromstring(document).find("emailProvider")
+        if provider is None:
+            return None
+        
+        email_settings = {}
+        imap = self._autoconfig_server(provider.find("incomingServer[@type='imap']"), domain)
+        if imap:
+            email_settings["imap"] = ServerSettings(imap[0], imap[1], imap[2], EmailProtocol.IMAP)
+        smtp = self._autoconfig_server(provider.find("outgoingServer[@type='smtp']"), domain)
+        if smtp:
+            email_settings["smtp"] = ServerSettings(*smtp)
+        
+        if not email_settings:
+            return None
+        
+        return DetectionResult(
+            success=True,
+            email_settings=email_settings,
+            provider_name=provider.findtext("displayName")
+        )
+    
+    def _autoconfig_server(self, element: Optional[ET.Element],
+                           domain: str) -> Optional[Tuple[str, int, SecurityType]]:
+        """Extract (host, port, security) from an autoconfig server element."""
+        if element is None:
+            return None
+        
+        hostname = (element.findtext("hostname") or "").strip().replace("%EMAILDOMAIN%", domain)
+        port = (element.findtext("port") or "").strip()
+        security = self.AUTOCONFIG_SOCKET_TYPES.get((element.findtext("socketType") or "").strip())
+        
+        # Host names depending on the local part cannot be resolved from the domain
+        if not hostname or "%" in hostname or not port.isdigit() or security is None:
+            return None
+        
+        return hostname, int(port), security
+    
+    @staticmethod
+    def clear_cache():
+        """Forget cached detections and unreachable hosts."""
+        with _cache_lock:
+            _detection_cache.clear()
+            _dead_hosts.clear()
+    
+    @_cached_detection
     def _detect_imap_settings(self, domain: str) -> Optional[ServerSettings]:
         """Detect IMAP server settings."""
+        # Published SRV records are authoritative, no probing needed
+        srv_settings = self._detect_srv_settings(domain, self.IMAP_SRV, EmailProtocol.IMAP)
+        if srv_settings:
+            return srv_settings
+        
         # Try common IMAP server names
-        server_candidates = [
-            f"imap.{domain}",
-            f"mail.{domain}",
-            f"mx.{domain}",
-            domain
-        ]
+        server_candidates = self._host_candidates("imap", domain)
         
-        for server in server_candidates:
-            for port, security in self.IMAP_PORTS:
-                if self._test_imap_connection(server, port, security):
-                    return ServerSettings(server, port, security, EmailProtocol.IMAP)
+        # Resolve each name once instead of once per port attempt
+        candidates = [
+            (server, port, security)
+            for server in self._resolvable_hosts(server_candidates)
+            for port, security in self.IMAP_PORTS
+        ]
+        futures = self._submit_probes(self._test_imap_connection, candidates)
+        found = self._first_success(futures, candidates)
+        if found:
+            server, port, security = found
+            return ServerSettings(server, port, security, EmailProtocol.IMAP)
         
         return None
     
+    @_cached_detection
     def _detect_smtp_settings(self, domain: str) -> Optional[ServerSettings]:
         """Detect SMTP server settings."""
+        srv_settings = self._detect_srv_settings(domain, self.SMTP_SRV)
+        if srv_settings:
+            return srv_settings
+        
         # Try common SMTP server names
-        server_candidates = [
-            f"smtp.{domain}",
-            f"mail.{domain}",
-            f"mx.{domain}",
-            domain
+        server_candidates = self._host_candidates("smtp", domain)
+        
+        # Resolve each name once instead of once per port attempt
+        candidates = [
+            (server, port, security)
+            for server in self._resolvable_hosts(server_candidates)
+            for port, security in self.SMTP_PORTS
         ]
+        futures = self._submit_probes(self._test_smtp_connection, candidates)
+        found = self._first_success(futures, candidates)
+        if found:
+            server, port, security = found
+            return ServerSettings(server, port, security)
         
-        for server in server_candidates:
-            for port, security in self.SMTP_PORTS:
-                if self._test_smtp_connection(server, port, security):
-                    return ServerSettings(server, port, security)
+        return None
+    
+    def _host_candidates(self, service: str, domain: str) -> List[str]:
+        """Host names to try for a service, most likely first."""
+        return [f"{service}.{domain}", f"mail.{domain}", f"mx.{domain}", domain]
+    
+    async def _detect_mail_settings_async(self, domain: str, service: str,
+                                          srv_services: List[Tuple[str, SecurityType]],
+                                          ports: List[Tuple[int, SecurityType]],
+                                          protocol: Optional[EmailProtocol] = None) -> Optional[ServerSettings]:
+        """
+        Detect IMAP or SMTP settings with asyncio probes.
+        
+        Args:
+            domain: Email domain
+            service: 'imap' or 'smtp'
+            srv_services: RFC 6186 SRV labels with their security
+            ports: Port/security combinations to probe
+            protocol: Protocol to record on the returned settings
+        
+        Returns:
+            Optional[ServerSettings]: Detected settings
+        """
+        for srv_service, security in srv_services:
+            targets = await self._lookup_srv_async(f"{srv_service}.{domain}")
+            if targets:
+                server, port = targets[0]
+                return ServerSettings(server, port, security, protocol)
+        
+        servers = self._host_candidates(service, domain)
+        resolved = await asyncio.gather(*(self._resolves_async(server) for server in servers))
+        candidates = [
+            (server, port, security)
+            for server, ok in zip(servers, resolved) if ok
+            for port, security in ports
+        ]
+        
+        found = await self._first_success_async(
+            [self._probe_async(server, port, security, service) for server, port, security in candidates],
+            candidates
+        )
+        if found:
+            server, port, security = found
+            return ServerSettings(server, port, security, protocol)
         
         return None
     
+    @_cached_detection
     def _detect_dav_settings(self, domain: str) -> Tuple[Optional[str], Optional[str]]:
         """Detect CalDAV and CardDAV server settings."""
-        caldav_url = None
-        carddav_url = None
+        # SRV records (RFC 6764) take precedence over probing
+        caldav_url = self._detect_dav_srv_url("_caldavs._tcp", domain, "caldav")
+        carddav_url = self._detect_dav_srv_url("_carddavs._tcp", domain, "carddav")
         
-        # Try well-known URIs (RFC 5785)
+        # Try well-known URIs (RFC 5785) for whatever SRV did not provide
         base_urls = [f"https://{domain}", f"https://mail.{domain}"]
         
-        for base_url in base_urls:
-            # Try CalDAV well-known URI
-            caldav_candidate = urljoin(base_url, "/.well-known/caldav")
-            if self._test_url_accessibility(caldav_candidate):
-                caldav_url = caldav_candidate
-            
-            # Try CardDAV well-known URI
-            carddav_candidate = urljoin(base_url, "/.well-known/carddav")
-            if self._test_url_accessibility(carddav_candidate):
-                carddav_url = carddav_candidate
+        caldav_candidates = [] if caldav_url else [
+            (f"{base_url}/.well-known/caldav",) for base_url in base_urls
+        ]
+        carddav_candidates = [] if carddav_url else [
+            (f"{base_url}/.well-known/carddav",) for base_url in base_urls
+        ]
+        
+        # Submit both probe sets before waiting on either
+        caldav_futures = self._submit_probes(self._test_url_accessibility, caldav_candidates)
+        carddav_futures = self._submit_probes(self._test_url_accessibility, carddav_candidates)
+        
+        caldav = self._first_success(caldav_futures, caldav_candidates)
+        carddav = self._first_success(carddav_futures, carddav_candidates)
+        
+        if caldav:
+            caldav_url = caldav[0]
+        if carddav:
+            carddav_url = carddav[0]
         
         return caldav_url, carddav_url
     
+    def _detect_srv_settings(self, domain: str, services: List[Tuple[str, SecurityType]],
+                             protocol: Optional[EmailProtocol] = None) -> Optional[ServerSettings]:
+        """
+        Detect a mail service from RFC 6186 SRV records.
+        
+        Args:
+            domain: Email domain
+            services: SRV service labels with their security, in preference order
+            protocol: Protocol to record on the returned settings
+        
+        Returns:
+            Optional[ServerSettings]: Settings of the best advertised server
+        """
+        for service, security in services:
+            targets = self._lookup_srv(f"{service}.{domain}")
+            if targets:
+                server, port = targets[0]
+                return ServerSettings(server, port, security, protocol)
+        
+        return None
+    
+    def _detect_dav_srv_url(self, service: str, domain: str, name: str) -> Optional[str]:
+        """Build a DAV well-known URL from an SRV record, if published."""
+        targets = self._lookup_srv(f"{service}.{domain}")
+        if not targets:
+            return None
+        
+        server, port = targets[0]
+        host = server if port == 443 else f"{server}:{port}"
+        return f"https://{host}/.well-known/{name}"
+    
+    def _lookup_srv(self, name: str) -> List[Tuple[str, int]]:
+        """
+        Resolve SRV records ordered by priority and weight (RFC 2782).
+        
+        Args:
+            name: Fully qualified service name, e.g. _imaps._tcp.example.com
+        
+        Returns:
+            List[Tuple[str, int]]: (host, port) targets, best first
+        """
+        try:
+            answers = dns.resolver.resolve(name, "SRV", lifetime=self.connect_timeout)
+        except dns.exception.DNSException:
+            return []
+        
+        return self._srv_targets(answers)
+    
+    async def _lookup_srv_async(self, name: str) -> List[Tuple[str, int]]:
+        """Resolve SRV records without blocking the event loop."""
+        try:
+            answers = await dns.asyncresolver.resolve(name, "SRV", lifetime=self.connect_timeout)
+        except dns.exception.DNSException:
+            return []
+        
+        return self._srv_targets(answers)
+    
+    def _srv_targets(self, answers) -> List[Tuple[str, int]]:
+        """Order SRV answers by priority and weight, dropping "." targets."""
+        targets = []
+        for record in sorted(answers, key=lambda r: (r.priority, -r.weight)):
+            target = record.target.to_text().rstrip('.')
+            # A target of "." means the service is deliberately not offered
+            if target:
+                targets.append((target, record.port))
+        
+        return targets
+    
+    def _resolvable_hosts(self, servers: Sequence[str]) -> List[str]:
+        """Return the host names that resolve, looking them up concurrently."""
+        resolved = list(self._executor.map(self._resolves, servers))
+        return [server for server, ok in zip(servers, resolved) if ok]
+    
+    def _resolves(self, server: str) -> bool:
+        """Check that a host name has at least one address."""
+        try:
+            return bool(socket.getaddrinfo(server, None, proto=socket.IPPROTO_TCP))
+        except (socket.gaierror, UnicodeError):
+            return False
+    
+    async def _resolves_async(self, server: str) -> bool:
+        """Check that a host name has at least one address, without blocking."""
+        try:
+            loop = asyncio.get_running_loop()
+            return bool(await loop.getaddrinfo(server, None, proto=socket.IPPROTO_TCP))
+        except (socket.gaierror, UnicodeError):
+            return False
+    
+    def _submit_probes(self, probe: Callable[..., bool], candidates: Sequence[Tuple]) -> List[Future]:
+        """Start one probe per candidate on the shared executor."""
+        return [self._executor.submit(probe, *candidate) for candidate in candidates]
+    
+    def _first_success(self, futures: List[Future], candidates: Sequence[Tuple]) -> Optional[Tuple]:
+        """
+        Wait for probes and return the most preferred successful candidate.
+        
+        Candidates are ordered by preference, so a success is only returned
+        once every candidate ahead of it has failed; the remaining probes
+        are cancelled.
+        
+        Args:
+            futures: Probe futures, in the same order as candidates
+            candidates: Probe arguments ordered by preference
+        
+        Returns:
+            The winning candidate, or None if every probe failed
+        """
+        index = {future: i for i, future in enumerate(futures)}
+        results: List[Optional[bool]] = [None] * len(futures)
+        preferred = 0
+        
+        try:
+            for future in as_completed(futures):
+                results[index[future]] = bool(future.result())
+                
+                while preferred < len(results) and results[preferred] is False:
+                    preferred += 1
+                if preferred == len(results):
+                    return None
+                if results[preferred]:
+                    return candidates[preferred]
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return None
+    
+    async def _first_success_async(self, probes: List[Any], candidates: Sequence[Tuple]) -> Optional[Tuple]:
+        """
+        Await probe coroutines and return the most preferred success.
+        
+        Same preference rules as _first_success; unfinished probes are
+        cancelled once the answer is known.
+        
+        Args:
+            probes: Probe coroutines, in the same order as candidates
+            candidates: Probe arguments ordered by preference
+        
+        Returns:
+            The winning candidate, or None if every probe failed
+        """
+        tasks = [asyncio.ensure_future(probe) for probe in probes]
+        index = {task: i for i, task in enumerate(tasks)}
+        results: List[Optional[bool]] = [None] * len(tasks)
+        preferred = 0
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[index[task]] = bool(task.result())
+                
+                while preferred < len(results) and results[preferred] is False:
+                    preferred += 1
+                if preferred == len(results):
+                    return None
+                if results[preferred]:
+                    return candidates[preferred]
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return None
+    
+    async def _probe_async(self, server: str, port: int, security: SecurityType, service: str) -> bool:
+        """
+        Check for an IMAP or SMTP server with a non-blocking connection.
+        
+        Args:
+            server: Host name
+            port: TCP port
+            security: Security mode to negotiate
+            service: 'imap' or 'smtp', selecting the expected greeting
+        
+        Returns:
+            bool: True if the server greeted and negotiated the security mode
+        """
+        if self._is_dead_host(server, port, security):
+            return False
+        
+        writer = None
+        try:
+            tls = _SSL_CTX if security == SecurityType.TLS_SSL else None
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    server, port, ssl=tls,
+                    happy_eyeballs_delay=_HAPPY_EYEBALLS_DELAY, interleave=1
+                ),
+                self.connect_timeout + (self.tls_timeout if tls else 0)
+            )
+            
+            greeting = await asyncio.wait_for(reader.readline(), self.tls_timeout)
+            if service == "imap":
+                ok = greeting.startswith((b"* OK", b"* PREAUTH"))
+            else:
+                ok = greeting.startswith(b"220")
+            
+            if ok and security == SecurityType.STARTTLS:
+                ok = await asyncio.wait_for(self._starttls_async(reader, writer, service), self.tls_timeout)
+            
+            self._record_host(server, port, security, reachable=ok)
+            return ok
+            
+        except (OSError, asyncio.TimeoutError):
+            self._record_host(server, port, security, reachable=False)
+            return False
+            
+        finally:
+            if writer:
+                writer.close()
+    
+    async def _starttls_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                              service: str) -> bool:
+        """Upgrade a greeted plain connection with STARTTLS."""
+        if service == "imap":
+            writer.write(b"a1 STARTTLS\r\n")
+            await writer.drain()
+            line = await reader.readline()
+            while line.startswith(b"*"):
+                line = await reader.readline()
+            if not line.startswith(b"a1 OK"):
+                return False
+        else:
+            writer.write(f"EHLO {socket.gethostname()}\r\n".encode("ascii", "replace"))
+            await writer.drain()
+            line = await reader.readline()
+            while line[3:4] == b"-":
+                line = await reader.readline()
+            if not line.startswith(b"250"):
+                return False
+            
+            writer.write(b"STARTTLS\r\n")
+            await writer.drain()
+            if not (await reader.readline()).startswith(b"220"):
+                return False
+        
+        await writer.start_tls(_SSL_CTX)
+        return True
+    
     def _test_imap_connection(self, server: str, port: int, security: SecurityType) -> bool:
         """Test IMAP connection."""
+        if self._is_dead_host(server, port, security):
+            return False
+        
+        # Most candidates do not listen at all; skip the TLS handshake for them
+        sock = self._connect(server, port)
+        if sock is None:
+            self._record_host(server, port, security, reachable=False)
+            return False
+        
         try:
             if security == SecurityType.TLS_SSL:
-                conn = imaplib.IMAP4_SSL(server, port, timeout=self.timeout)
+                conn = _ConnectedIMAP4_SSL(sock, server, port)
             else:
-                conn = imaplib.IMAP4(server, port, timeout=self.timeout)
+                conn = _ConnectedIMAP4(sock, server, port)
                 if security == SecurityType.STARTTLS:
-                    conn.starttls()
+                    conn.starttls(ssl_context=_SSL_CTX)
             
             conn.logout()
+            self._record_host(server, port, security, reachable=True)
             return True
             
-        except Exception:
+        except (OSError, imaplib.IMAP4.error):
+            # Covers timeouts and TLS failures; programming errors propagate
+            sock.close()
+            self._record_host(server, port, security, reachable=False)
             return False
     
     def _test_smtp_connection(self, server: str, port: int, security: SecurityType) -> bool:
         """Test SMTP connection."""
+        if self._is_dead_host(server, port, security):
+            return False
+        
+        # Most candidates do not listen at all; skip the TLS handshake for them
+        sock = self._connect(server, port)
+        if sock is None:
+            self._record_host(server, port, security, reachable=False)
+            return False
+        
         try:
             if security == SecurityType.TLS_SSL:
-                conn = smtplib.SMTP_SSL(server, port, timeout=self.timeout)
+                conn = _ConnectedSMTP_SSL(sock, server, port)
             else:
-                conn = smtplib.SMTP(server, port, timeout=self.timeout)
+                conn = _ConnectedSMTP(sock, server, port)
                 if security == SecurityType.STARTTLS:
-                    conn.starttls()
+                    conn.starttls(context=_SSL_CTX)
             
             conn.quit()
+            self._record_host(server, port, security, reachable=True)
             return True
             
-        except Exception:
+        except (OSError, smtplib.SMTPException):
+            sock.close()
+            self._record_host(server, port, security, reachable=False)
             return False
     
+    def _connect(self, server: str, port: int) -> Optional[socket.socket]:
+        """
+        Open the TCP connection a probe will run over.
+        
+        Dual-stack hosts are raced with Happy Eyeballs within
+        ``connect_timeout``; the returned socket uses ``tls_timeout`` for the
+        protocol exchange that follows.
+        
+        Returns:
+            Optional[socket.socket]: Connected socket, or None if unreachable
+        """
+        try:
+            sock = _happy_eyeballs_connect(server, port, self.connect_timeout)
+        except (OSError, UnicodeError):
+            # UnicodeError: host name that cannot be IDNA-encoded
+            return None
+        
+        sock.settimeout(self.tls_timeout)
+        return sock
+    
+    def _is_dead_host(self, server: str, port: int, security: SecurityType) -> bool:
+        """Check whether a probe of this endpoint failed recently."""
+        with _cache_lock:
+            failed_at = _dead_hosts.get((server, port, security))
+        return failed_at is not None and time.monotonic() - failed_at < _DEAD_HOST_TTL
+    
+    def _record_host(self, server: str, port: int, security: SecurityType, reachable: bool):
+        """Remember a failed probe, or forget it once the endpoint answers."""
+        with _cache_lock:
+            if reachable:
+                _dead_hosts.pop((server, port, security), None)
+            else:
+                _dead_hosts[(server, port, security)] = time.monotonic()
+    
     def _test_url_accessibility(self, url: str) -> bool:
         """Test if a URL is accessible."""
         try:
-            response = requests.get(url, timeout=self.timeout, verify=True)
-            return response.status_code in [200, 301, 302, 401]  # 401 might indicate auth required
+            # A bodiless PROPFIND only answers 207 from an actual DAV server
+            response = self._http.request(
+                "PROPFIND",
+                url,
+                headers=self.PROPFIND_HEADERS,
+                data=self.PROPFIND_BODY,
+                timeout=(self.connect_timeout, self.http_timeout),
+                verify=True,
+                allow_redirects=False
+            )
+            # 401 might indicate auth required, redirects point at the real context path
+            return response.status_code in self.DAV_STATUS_CODES
             
-        except Exception:
+        except requests.RequestException:
             return False
     
     def test_connection(self, settings: ServerSettings, username: str, password: str) -> Tuple[bool, Optional[str]]:
@@ -315,39 +1200,9 @@ class ProtocolDetector:
             Tuple of (success, error_message)
         """
         try:
-            if settings.protocol == EmailProtocol.IMAP:
-                return self._test_imap_auth(settings, username, password)
-            elif settings.protocol == EmailProtocol.POP3:
-                return self._test_pop3_auth(settings, username, password)
-            else:  # SMTP
-                return self._test_smtp_auth(settings, username, password)
-                
-        except Exception as e:
-            return False, str(e)
-    
-    def _test_imap_auth(self, settings: ServerSettings, username: str, password: str) -> Tuple[bool, Optional[str]]:
-        """Test IMAP authentication."""
-        try:
-            if settings.security == SecurityType.TLS_SSL:
-                conn = imaplib.IMAP4_SSL(settings.server, settings.port, timeout=self.timeout)
-            else:
-                conn = imaplib.IMAP4(settings.server, settings.port, timeout=self.timeout)
-                if settings.security == SecurityType.STARTTLS:
-                    conn.starttls()
+            test_auth = self._AUTH_DISPATCH.get(settings.protocol, self._test_smtp_auth)
+            return test_auth(settings, username, password)
             
-            conn.login(username, password)
-            conn.logout()
-            return True, None
-            
-        except imaplib.IMAP4.error as e:
-            error_msg = str(e).lower()
-            if "authentication failed" in error_msg:
-                return False, "Authentication failed. Please check your credentials."
-            elif "invalid credentials" in error_msg:
-                return False, "Invalid credentials."
-            else:
-                return False, f"IMAP error: {str(e)}"
-                
         except socket.timeout:
             return False, "Connection timed out."
             
@@ -360,50 +1215,64 @@ class ProtocolDetector:
         except Exception as e:
             return False, f"Connection error: {str(e)}"
     
+    def _open_conn(self, cls_ssl: Callable, cls_plain: Callable, settings: ServerSettings,
+                   starttls: str = "starttls", context_arg: str = "context"):
+        """
+        Open a credential-test connection in the configured security mode.
+        
+        Args:
+            cls_ssl: Client class for implicit TLS
+            cls_plain: Client class for plain and STARTTLS connections
+            settings: Server settings to connect to
+            starttls: Name of the client's STARTTLS method
+            context_arg: Keyword the client takes its SSL context under
+        
+        Returns:
+            Connected client instance
+        """
+        tls = {context_arg: _SSL_CTX}
+        if settings.security == SecurityType.TLS_SSL:
+            return cls_ssl(settings.server, settings.port, timeout=self.tls_timeout, **tls)
+        
+        conn = cls_plain(settings.server, settings.port, timeout=self.tls_timeout)
+        if settings.security == SecurityType.STARTTLS:
+            getattr(conn, starttls)(**tls)
+        return conn
+    
+    def _test_imap_auth(self, settings: ServerSettings, username: str, password: str) -> Tuple[bool, Optional[str]]:
+        """Test IMAP authentication."""
+        try:
+            conn = self._open_conn(imaplib.IMAP4_SSL, imaplib.IMAP4, settings, context_arg="ssl_context")
+            conn.login(username, password)
+            conn.logout()
+            return True, None
+            
+        except imaplib.IMAP4.error as e:
+            error_msg = str(e)
+            for pattern, message in _IMAP_AUTH_ERRORS:
+                if pattern.search(error_msg):
+                    return False, message
+            return False, f"IMAP error: {error_msg}"
+    
     def _test_pop3_auth(self, settings: ServerSettings, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """Test POP3 authentication."""
         try:
-            if settings.security == SecurityType.TLS_SSL:
-                conn = poplib.POP3_SSL(settings.server, settings.port, timeout=self.timeout)
-            else:
-                conn = poplib.POP3(settings.server, settings.port, timeout=self.timeout)
-                if settings.security == SecurityType.STARTTLS:
-                    conn.stls()
-            
+            conn = self._open_conn(poplib.POP3_SSL, poplib.POP3, settings, starttls="stls")
             conn.user(username)
             conn.pass_(password)
             conn.quit()
             return True, None
             
         except poplib.error_proto as e:
-            error_msg = str(e).lower()
-            if "authentication failed" in error_msg or "invalid" in error_msg:
+            error_msg = str(e)
+            if _POP3_AUTH_FAIL_RE.search(error_msg):
                 return False, "Authentication failed. Please check your credentials."
-            else:
-                return False, f"POP3 error: {str(e)}"
-                
-        except socket.timeout:
-            return False, "Connection timed out."
-            
-        except socket.gaierror:
-            return False, "Server not found. Please check the server address."
-            
-        except ssl.SSLError as e:
-            return False, f"SSL/TLS error: {str(e)}"
-            
-        except Exception as e:
-            return False, f"Connection error: {str(e)}"
+            return False, f"POP3 error: {error_msg}"
     
     def _test_smtp_auth(self, settings: ServerSettings, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """Test SMTP authentication."""
         try:
-            if settings.security == SecurityType.TLS_SSL:
-                conn = smtplib.SMTP_SSL(settings.server, settings.port, timeout=self.timeout)
-            else:
-                conn = smtplib.SMTP(settings.server, settings.port, timeout=self.timeout)
-                if settings.security == SecurityType.STARTTLS:
-                    conn.starttls()
-            
+            conn = self._open_conn(smtplib.SMTP_SSL, smtplib.SMTP, settings)
             conn.login(username, password)
             conn.quit()
             return True, None
@@ -416,27 +1285,15 @@ class ProtocolDetector:
             
         except smtplib.SMTPException as e:
             return False, f"SMTP error: {str(e)}"
-            
-        except socket.timeout:
-            return False, "Connection timed out."
-            
-        except socket.gaierror:
-            return False, "Server not found. Please check the server address."
-            
-        except ssl.SSLError as e:
-            return False, f"SSL/TLS error: {str(e)}"
-            
-        except Exception as e:
-            return False, f"Connection error: {str(e)}"
     
     def test_caldav_connection(self, server_url: str, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """Test CalDAV connection."""
         try:
             # Basic HTTP authentication test
-            response = requests.get(
+            response = self._http.get(
                 server_url,
                 auth=(username, password),
-                timeout=self.timeout,
+                timeout=(self.connect_timeout, self.http_timeout),
                 verify=True
             )
             
@@ -5,18 +5,25 @@ Provides SMTP client functionality for sending emails with authentication,
 security, and attachment support.
 """
 
-import smtplib
+from __future__ import annotations
+
 import email
-import email.mime.text
-import email.mime.multipart
-import email.mime.base
-import email.mime.image
-import email.encoders
-import ssl
+import email.utils
+import base64
+import contextlib
+import dataclasses
+import functools
+import io
 import socket
-import mimetypes
+import tempfile
 import os
-from typing import List, Optional, Dict, Any, Union, Tuple
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Iterator, Union, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
 from datetime import datetime
@@ -25,22 +32,78 @@ from ...utils.logging_setup import get_logger
 from ...data.models.accounts import Account, SecurityType
 from .credential_manager import CredentialManager
 
+# smtplib and the MIME classes are imported where they are used, so loading
+# the email package does not pay for them until a message is actually sent
+if TYPE_CHECKING:
+    import email.mime.base
+    import email.mime.multipart
+    import email.mime.text
+    import email.policy
+    import smtplib
+    import ssl
+
 logger = get_logger(__name__)
 
 
-@dataclass
+@functools.lru_cache(maxsize=1024)
+def _guess_content_type(filename: str) -> Optional[str]:
+    """Guess a MIME type from a file name, memoized per name."""
+    import mimetypes
+    return mimetypes.guess_type(filename)[0]
+
+
+@functools.lru_cache(maxsize=None)
+def _msgid_domain() -> str:
+    """Get the host name for Message-IDs, resolved once per process."""
+    # make_msgid() calls getfqdn() for every message, which may block on DNS
+    return socket.getfqdn()
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """Get the TLS context shared by all SMTP sessions, built on first use."""
+    import ssl
+    
+    # Building a context loads the system CA bundle, so do it once per process
+    return ssl.create_default_context()
+
+
+def _make_msgid() -> str:
+    """Generate a unique Message-ID."""
+    return f"<{uuid.uuid4().hex}@{_msgid_domain()}>"
+
+
+# Characters that make formataddr() quote a display name (RFC 5322 specials)
+_NAME_SPECIALS = re.compile(r'[][\\()<>@,:;".]')
+
+
+@dataclass(frozen=True, slots=True)
 class EmailAddress:
     """Email address with optional display name."""
     email: str
     name: Optional[str] = None
+    _formatted: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Formatted once; headers join many addresses per message
+        formatted = self.email
+        if self.name and self.name.isascii() and not _NAME_SPECIALS.search(self.name):
+            # Plain ASCII names need neither quoting nor encoding
+            formatted = f"{self.name} <{self.email}>"
+        elif self.name:
+            try:
+                # Quotes specials and RFC 2047-encodes non-ASCII names
+                formatted = email.utils.formataddr((self.name, self.email))
+            except UnicodeEncodeError:
+                # Internationalized address, only sent over SMTPUTF8
+                formatted = f"{self.name} <{self.email}>"
+        object.__setattr__(self, "_formatted", formatted)
     
     def __str__(self) -> str:
-        if self.name:
-            return f"{self.name} <{self.email}>"
-        return self.email
+        return self._formatted
 
 
-@dataclass
+@dataclass(slots=True)
 class EmailAttachment:
     """Email attachment for sending."""
     filename: str
@@ -52,12 +115,12 @@ class EmailAttachment:
     
     def __post_init__(self):
         if self.content_type is None and self.filename:
-            self.content_type, _ = mimetypes.guess_type(self.filename)
+            self.content_type = _guess_content_type(self.filename)
             if self.content_type is None:
                 self.content_type = 'application/octet-stream'
 
 
-@dataclass 
+@dataclass(slots=True)
 class OutgoingEmail:
     """Email message for sending."""
     subject: str
@@ -75,8 +138,14 @@ class OutgoingEmail:
     
     @property
     def all_recipients(self) -> List[EmailAddress]:
-        """Get all recipients (To, CC, BCC)."""
-        return self.to_addrs + self.cc_addrs + self.bcc_addrs
+        """Get all recipients (To, CC, BCC). Deprecated, use iter_all_recipients()."""
+        return list(self.iter_all_recipients())
+    
+    def iter_all_recipients(self) -> Iterator[EmailAddress]:
+        """Iterate over all recipients (To, CC, BCC) without copying the lists."""
+        yield from self.to_addrs
+        yield from self.cc_addrs
+        yield from self.bcc_addrs
 
 
 class SMTPClientError(Exception):
@@ -84,12 +153,234 @@ class SMTPClientError(Exception):
     pass
 
 
+class SMTPDeliveryUnknownError(SMTPClientError):
+    """The session failed after the whole message was sent; it may have been delivered."""
+    pass
+
+
+# Authenticated sessions are pooled per process so that a burst of sends
+# pays the TCP, TLS and AUTH handshakes once instead of per message
+_POOL_IDLE_TTL = 90  # seconds
+_POOL_MAX_MESSAGES = 10000
+
+
+@dataclass
+class _PooledConnection:
+    """Authenticated SMTP session with reuse bookkeeping."""
+    smtp: smtplib.SMTP
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    msg_count: int = 0
+    
+    def is_reusable(self) -> bool:
+        """Check whether the session is within its idle and message budget."""
+        return (time.monotonic() - self.last_used < _POOL_IDLE_TTL
+                and self.msg_count < _POOL_MAX_MESSAGES)
+    
+    def close(self):
+        """Quit the session, ignoring a server that is already gone."""
+        try:
+            self.smtp.quit()
+        except OSError:  # SMTPException is an OSError
+            pass
+        finally:
+            self.smtp.close()
+
+
+# Keepalive probes stop NAT and firewalls from silently dropping idle pooled
+# sessions; each value can be overridden in Account.advanced_settings
+_KEEPALIVE_DEFAULTS = {
+    'keepalive_idle': 30,  # seconds idle before the first probe
+    'keepalive_interval': 10,  # seconds between probes
+    'keepalive_count': 3,  # unanswered probes before the connection drops
+}
+
+
+def _enable_keepalive(sock: socket.socket, advanced_settings: Optional[Dict[str, Any]]):
+    """
+    Enable TCP keepalive on an SMTP socket.
+    
+    Args:
+        sock: Connected socket
+        advanced_settings: Account settings that may override the intervals
+    """
+    options = dict(_KEEPALIVE_DEFAULTS)
+    if isinstance(advanced_settings, dict):
+        options.update((key, int(value)) for key, value in advanced_settings.items()
+                       if key in _KEEPALIVE_DEFAULTS)
+    
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Linux names the idle option TCP_KEEPIDLE, macOS TCP_KEEPALIVE
+        idle = getattr(socket, 'TCP_KEEPIDLE', None) or getattr(socket, 'TCP_KEEPALIVE', None)
+        if idle:
+            sock.setsockopt(socket.IPPROTO_TCP, idle, options['keepalive_idle'])
+        if hasattr(socket, 'TCP_KEEPINTVL'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, options['keepalive_interval'])
+        if hasattr(socket, 'TCP_KEEPCNT'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, options['keepalive_count'])
+    except OSError as e:
+        logger.debug(f"Could not enable TCP keepalive: {e}")
+
+
+# Opening a session is retried with exponential backoff on transport
+# failures; both values can be overridden in Account.advanced_settings
+_RETRY_DEFAULTS = {
+    'connect_attempts': 4,  # tries before the error is reported
+    'connect_backoff': 0.5,  # seconds before the first retry, doubled per retry
+}
+_MAX_BACKOFF = 30  # seconds
+
+
+def _retry_options(advanced_settings: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Get the connect retry settings of an account."""
+    options = dict(_RETRY_DEFAULTS)
+    if isinstance(advanced_settings, dict):
+        options.update((key, float(value)) for key, value in advanced_settings.items()
+                       if key in _RETRY_DEFAULTS)
+    return options
+
+
+def _is_transient(error: Exception) -> bool:
+    """Check whether a connect error is a network failure worth retrying."""
+    import smtplib
+    import ssl
+    
+    if isinstance(error, ssl.SSLCertVerificationError):
+        return False
+    return isinstance(error, (
+        TimeoutError, ConnectionError, socket.gaierror, ssl.SSLError,
+        smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected
+    ))
+
+
+_POOL: Dict[tuple, List[_PooledConnection]] = {}
+_pool_lock = threading.Lock()
+
+
+def _acquire(key: tuple) -> Optional[_PooledConnection]:
+    """
+    Take a live pooled session, closing stale ones on the way.
+    
+    Args:
+        key: Pool key of the account
+    
+    Returns:
+        Optional[_PooledConnection]: Session ready for a new transaction, or None
+    """
+    while True:
+        with _pool_lock:
+            conns = _POOL.get(key)
+            if not conns:
+                return None
+            conn = conns.pop()
+        
+        if conn.is_reusable():
+            try:
+                # RSET drops any half-submitted transaction and proves the session is alive
+                code, _ = conn.smtp.rset()
+                if code == 250:
+                    conn.last_used = time.monotonic()
+                    return conn
+            except OSError:  # SMTPException is an OSError
+                pass
+        conn.close()
+
+
+def _release(key: tuple, conn: _PooledConnection):
+    """
+    Return a session to the pool, or close it once past its budget.
+    
+    Args:
+        key: Pool key of the account
+        conn: Session that is no longer checked out
+    """
+    expired = [] if conn.is_reusable() else [conn]
+    with _pool_lock:
+        if not expired:
+            _POOL.setdefault(key, []).append(conn)
+        for pool in _POOL.values():
+            expired.extend(c for c in pool if not c.is_reusable())
+            pool[:] = [c for c in pool if c.is_reusable()]
+    
+    for stale in expired:
+        stale.close()
+
+
+def close_pool():
+    """Close every pooled SMTP session, e.g. on shutdown."""
+    with _pool_lock:
+        conns = [conn for pool in _POOL.values() for conn in pool]
+        _POOL.clear()
+    
+    for conn in conns:
+        conn.close()
+
+
+# Attachments are base64-encoded while they are written to the DATA stream;
+# 57 raw bytes make one 76 column line, 1152 lines are read per step (~64 KiB)
+_B64_LINE_BYTES = 57
+_STREAM_CHUNK = _B64_LINE_BYTES * 1152
+_LEADING_DOT_RE = re.compile(rb'^\.', re.MULTILINE)
+
+# Large attachments on unencrypted sessions are encoded to a temporary file
+# once and handed to the kernel with sendfile() instead of copied through Python
+_SENDFILE_MIN_SIZE = 1024 * 1024
+
+# Per-thread read buffer reused for every attachment chunk
+_buffers = threading.local()
+
+
+def _read_buffer() -> memoryview:
+    """Get this thread's attachment read buffer."""
+    buf = getattr(_buffers, 'read', None)
+    if buf is None:
+        buf = _buffers.read = memoryview(bytearray(_STREAM_CHUNK))
+    return buf
+
+
+# RFC 5322 line length limit for bodies sent without transfer encoding
+_MAX_7BIT_LINE = 998
+
+
+def _make_text_part(content: str, subtype: str) -> email.mime.text.MIMEText:
+    """
+    Build a text part, skipping transfer encoding where it is not needed.
+    
+    ASCII content with short lines is sent as 7bit us-ascii, so it is not
+    run through the per-character base64 encoder; anything else is
+    encoded as UTF-8.
+    
+    Args:
+        content: Text of the part
+        subtype: MIME subtype, e.g. 'plain' or 'html'
+    
+    Returns:
+        email.mime.text.MIMEText: Text part
+    """
+    import email.mime.text
+    
+    if content.isascii() and max(map(len, content.splitlines()), default=0) <= _MAX_7BIT_LINE:
+        return email.mime.text.MIMEText(content, subtype, 'us-ascii')
+    return email.mime.text.MIMEText(content, subtype, 'utf-8')
+
+
+def _session_lost(error: Exception) -> bool:
+    """Check whether an SMTP error means the session itself is gone."""
+    import smtplib
+    
+    if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError)):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+
+
 class SMTPClient:
     """
     SMTP client for sending emails.
     
     Provides comprehensive SMTP functionality including authentication,
-    security, HTML/text emails, and attachment support.
+    security, HTML/text emails, and attachment support. Sessions are
+    borrowed from a process-wide pool and returned on disconnect.
     """
     
     def __init__(self, account: Account, credential_manager: CredentialManager):
@@ -103,8 +394,21 @@ class SMTPClient:
         self.account = account
         self.credential_manager = credential_manager
         self.smtp: Optional[smtplib.SMTP] = None
+        self._conn: Optional[_PooledConnection] = None
+        self._builder: Optional[ThreadPoolExecutor] = None
+        self._sender: Optional[ThreadPoolExecutor] = None
         self.logger = logger
     
+    @property
+    def _pool_key(self) -> tuple:
+        """Pool key; sessions are only shared for the same server and login."""
+        return (
+            self.account.outgoing_server,
+            self.account.outgoing_port,
+            self.account.outgoing_security,
+            self.account.outgoing_username or self.account.incoming_username
+        )
+    
     def connect(self) -> bool:
         """
         Connect to SMTP server.
@@ -116,23 +420,45 @@ class SMTPClient:
             if self.smtp:
                 self.disconnect()
             
-            # Create connection
-            if self.account.outgoing_security == SecurityType.TLS_SSL:
-                self.smtp = smtplib.SMTP_SSL(
-                    self.account.outgoing_server,
-                    self.account.outgoing_port,
-                    timeout=30
-                )
-            else:
-                self.smtp = smtplib.SMTP(
-                    self.account.outgoing_server,
-                    self.account.outgoing_port,
-                    timeout=30
-                )
-                
-                if self.account.outgoing_security == SecurityType.STARTTLS:
-                    self.smtp.starttls()
+            conn = _acquire(self._pool_key)
+            if conn is None:
+                conn = _PooledConnection(self._open_session())
             
+            self._conn, self.smtp = conn, conn.smtp
+            self.logger.info(f"Connected to SMTP server {self.account.outgoing_server}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"SMTP connection failed: {e}")
+            self.smtp = None
+            self._conn = None
+            return False
+    
+    def _open_session(self) -> smtplib.SMTP:
+        """
+        Open and authenticate a new SMTP session.
+        
+        Transport failures such as timeouts, refused connections and TLS
+        handshake errors are retried with exponential backoff; rejected
+        credentials are reported at once.
+        
+        Returns:
+            smtplib.SMTP: Authenticated session
+        """
+        options = _retry_options(self.account.advanced_settings)
+        attempts = max(1, int(options['connect_attempts']))
+        for attempt in range(attempts):
+            try:
+                smtp = self._open_transport()
+                break
+            except Exception as e:
+                if attempt == attempts - 1 or not _is_transient(e):
+                    raise
+                delay = min(_MAX_BACKOFF, options['connect_backoff'] * 2 ** attempt + random.random() * 0.25)
+                self.logger.info(f"SMTP connect attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        
+        try:
             # Authenticate if required
             if self.account.outgoing_auth_required:
                 password = self.credential_manager.retrieve_password(
@@ -142,31 +468,63 @@ class SMTPClient:
                     raise SMTPClientError("No password available")
                 
                 username = self.account.outgoing_username or self.account.incoming_username
-                self.smtp.login(username, password)
+                smtp.login(username, password)
             
-            self.logger.info(f"Connected to SMTP server {self.account.outgoing_server}")
-            return True
+            return smtp
             
-        except Exception as e:
-            self.logger.error(f"SMTP connection failed: {e}")
-            self.smtp = None
-            return False
+        except Exception:
+            smtp.close()
+            raise
+    
+    def _open_transport(self) -> smtplib.SMTP:
+        """Connect to the server and secure the session, without logging in."""
+        import smtplib
+        
+        # Create connection
+        if self.account.outgoing_security == SecurityType.TLS_SSL:
+            smtp = smtplib.SMTP_SSL(
+                self.account.outgoing_server,
+                self.account.outgoing_port,
+                timeout=30,
+                context=_ssl_context()
+            )
+        else:
+            smtp = smtplib.SMTP(
+                self.account.outgoing_server,
+                self.account.outgoing_port,
+                timeout=30
+            )
+        
+        try:
+            _enable_keepalive(smtp.sock, self.account.advanced_settings)
+            
+            if self.account.outgoing_security == SecurityType.STARTTLS:
+                smtp.starttls(context=_ssl_context())
+            
+            return smtp
+            
+        except Exception:
+            smtp.close()
+            raise
     
     def disconnect(self):
-        """Disconnect from SMTP server."""
+        """Disconnect from SMTP server, returning the session to the pool."""
         try:
-            if self.smtp:
-                try:
-                    self.smtp.quit()
-                except:
-                    pass
-                self.smtp = None
+            conn, self._conn, self.smtp = self._conn, None, None
+            if conn:
+                _release(self._pool_key, conn)
             
             self.logger.info("Disconnected from SMTP server")
             
         except Exception as e:
             self.logger.error(f"Error during disconnect: {e}")
     
+    def _drop_connection(self):
+        """Close the current session instead of returning it to the pool."""
+        conn, self._conn, self.smtp = self._conn, None, None
+        if conn:
+            conn.close()
+    
     def is_connected(self) -> bool:
         """Check if connected to server."""
         try:
@@ -190,22 +548,80 @@ class SMTPClient:
         Returns:
             bool: True if sent successfully
         """
-        if not self.is_connected():
+        return self._send_built(email_msg, None)
+    
+    def send_email_async(self, email_msg: OutgoingEmail) -> Future:
+        """
+        Send an email message without blocking the caller.
+        
+        The MIME structure is built on a worker pool while a single sender
+        thread, which owns the session from then on, transmits messages in
+        submission order; building the next message overlaps sending the
+        current one. Do not mix with send_email on the same client while
+        sends are pending.
+        
+        Args:
+            email_msg: Email message to send
+        
+        Returns:
+            Future: Resolves to the send_email result, or raises SMTPClientError
+        """
+        if self._sender is None:
+            self._builder = ThreadPoolExecutor(max_workers=os.cpu_count(),
+                                               thread_name_prefix="adelfa-mime")
+            self._sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adelfa-smtp")
+        
+        built = self._builder.submit(self._build_skeleton, email_msg)
+        return self._sender.submit(self._send_when_built, email_msg, built)
+    
+    def _send_when_built(self, email_msg: OutgoingEmail, built: Future) -> bool:
+        """Wait for a queued message to be built, then send it."""
+        try:
+            skeleton = built.result()
+        except Exception as e:
+            raise SMTPClientError(f"Failed to build email: {e}")
+        return self._send_built(email_msg, skeleton)
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the asynchronous send workers.
+        
+        Args:
+            wait: Whether to wait for queued messages to be sent
+        """
+        builder, sender = self._builder, self._sender
+        self._builder = self._sender = None
+        if sender is not None:
+            sender.shutdown(wait=wait, cancel_futures=not wait)
+            builder.shutdown(wait=wait, cancel_futures=not wait)
+    
+    def _send_built(self, email_msg: OutgoingEmail, skeleton) -> bool:
+        """Send a message, using its prebuilt MIME skeleton if given."""
+        if self._conn is not None and not self._conn.is_reusable():
+            # Past its idle or message budget; start a fresh session
+            self._drop_connection()
+        
+        if self._conn is None and not self.connect():
             raise SMTPClientError("Not connected to server")
         
         try:
-            # Build MIME message
-            mime_msg = self._build_mime_message(email_msg)
-            
             # Get recipient email addresses
-            recipients = [addr.email for addr in email_msg.all_recipients]
+            recipients = [addr.email for addr in email_msg.iter_all_recipients()]
             
-            # Send the message
-            refused = self.smtp.send_message(
-                mime_msg,
-                from_addr=email_msg.from_addr.email,
-                to_addrs=recipients
-            )
+            # The session is used without a NOOP round trip first; if it
+            # went away while idle, reconnect and send once more. Only
+            # failures before the DATA terminator reach this retry; later
+            # ones are raised as SMTPClientError by _stream_send.
+            try:
+                refused = self._stream_send(email_msg, recipients, skeleton)
+            except OSError as e:  # SMTPException is an OSError
+                if not _session_lost(e):
+                    raise
+                self.logger.info(f"SMTP session lost ({e}), reconnecting")
+                self._drop_connection()
+                if not self.connect():
+                    raise SMTPClientError("Reconnect failed")
+                refused = self._stream_send(email_msg, recipients, skeleton)
             
             if refused:
                 self.logger.warning(f"Some recipients refused: {refused}")
@@ -214,9 +630,267 @@ class SMTPClient:
             self.logger.info(f"Email sent successfully to {len(recipients)} recipients")
             return True
             
+        except SMTPClientError:
+            raise
         except Exception as e:
             raise SMTPClientError(f"Failed to send email: {e}")
     
+    def _stream_send(self, email_msg: OutgoingEmail, recipients: List[str],
+                     skeleton: Optional[email.mime.multipart.MIMEMultipart] = None) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send a message on the current session, streaming attachments.
+        
+        Headers and body parts are built with the email package; binary
+        attachments are base64-encoded chunk by chunk while they are written
+        to the DATA command, so memory use does not grow with their size.
+        
+        Args:
+            email_msg: Email message to send
+            recipients: Envelope recipient addresses
+            skeleton: Skeleton from _build_skeleton, built here if omitted
+        
+        Returns:
+            Dict[str, Tuple[int, bytes]]: Refused recipients, as from sendmail
+        """
+        import email.policy
+        import smtplib
+        import ssl
+        
+        smtp = self.smtp
+        from_addr = email_msg.from_addr.email
+        smtp.ehlo_or_helo_if_needed()
+        
+        policy = email.policy.SMTP
+        mail_options = []
+        if not all(addr.isascii() for addr in [from_addr, *recipients]):
+            if not smtp.has_extn('smtputf8'):
+                raise smtplib.SMTPNotSupportedError("Server does not support SMTPUTF8")
+            policy = email.policy.SMTPUTF8
+            mail_options = ['SMTPUTF8', 'BODY=8BITMIME']
+        
+        if skeleton is None:
+            skeleton = self._build_skeleton(email_msg)
+        
+        with contextlib.ExitStack() as files:
+            # Open attachment files before the transaction so a missing
+            # file fails the send without leaving the session inside DATA
+            streamed = [
+                (attachment, self._open_attachment(attachment, files))
+                for attachment in email_msg.attachments
+                if self._is_streamed(attachment)
+            ]
+            
+            refused = self._open_transaction(from_addr, mail_options, recipients)
+            
+            try:
+                use_sendfile = not isinstance(smtp.sock, ssl.SSLSocket)
+                for chunk in self._message_chunks(skeleton, streamed, policy, use_sendfile):
+                    if isinstance(chunk, bytes):
+                        smtp.send(chunk)
+                    else:
+                        smtp.sock.sendfile(chunk)
+                smtp.send(b".\r\n")
+            except Exception:
+                # The session is stuck inside DATA and cannot be reused
+                smtp.close()
+                raise
+            
+            # Past the terminator the server may already have queued the
+            # message, so failures here must not lead to a resend
+            try:
+                code, resp = smtp.getreply()
+            except OSError as e:
+                smtp.close()
+                raise SMTPDeliveryUnknownError(f"Connection lost after sending the message, delivery unknown: {e}")
+            if code != 250:
+                self._reset_transaction(code)
+                raise SMTPClientError(f"Server rejected the message: {code} {resp!r}")
+        
+        self._conn.msg_count += 1
+        self._conn.last_used = time.monotonic()
+        return refused
+    
+    def _open_transaction(self, from_addr: str, mail_options: List[str],
+                          recipients: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send the envelope and DATA command, leaving the session ready for the message.
+        
+        When the server offers PIPELINING (RFC 2920) MAIL, all RCPT commands
+        and DATA are written at once and their replies read afterwards, so
+        the envelope costs one round trip instead of one per recipient.
+        
+        Args:
+            from_addr: Envelope sender
+            mail_options: MAIL FROM parameters
+            recipients: Envelope recipient addresses
+        
+        Returns:
+            Dict[str, Tuple[int, bytes]]: Refused recipients
+        """
+        import smtplib
+        
+        smtp = self.smtp
+        if not smtp.has_extn('pipelining'):
+            code, resp = smtp.mail(from_addr, mail_options)
+            if code != 250:
+                self._reset_transaction(code)
+                raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+            
+            refused = {}
+            for recipient in recipients:
+                code, resp = smtp.rcpt(recipient)
+                if code not in (250, 251):
+                    refused[recipient] = (code, resp)
+                if code == 421:
+                    self._reset_transaction(code)
+                    raise smtplib.SMTPServerDisconnected(f"Server closed the session: {resp}")
+            if len(refused) == len(recipients):
+                self._reset_transaction(code)
+                raise smtplib.SMTPRecipientsRefused(refused)
+            
+            code, resp = smtp.docmd("data")
+            if code != 354:
+                self._reset_transaction(code)
+                raise smtplib.SMTPDataError(code, resp)
+            return refused
+        
+        if 'SMTPUTF8' in mail_options:
+            smtp.command_encoding = 'utf-8'
+        options = ''.join(f" {option}" for option in mail_options)
+        smtp.send(
+            f"MAIL FROM:{smtplib.quoteaddr(from_addr)}{options}\r\n"
+            + ''.join(f"RCPT TO:{smtplib.quoteaddr(recipient)}\r\n" for recipient in recipients)
+            + "DATA\r\n"
+        )
+        
+        mail_code, mail_resp = smtp.getreply()
+        refused = {}
+        for recipient in recipients:
+            code, resp = smtp.getreply()
+            if code not in (250, 251):
+                refused[recipient] = (code, resp)
+        data_code, data_resp = smtp.getreply()
+        
+        envelope_failed = mail_code != 250 or len(refused) == len(recipients)
+        if envelope_failed and data_code == 354:
+            # The server took DATA despite the failed envelope; end the empty message
+            smtp.send(b".\r\n")
+            data_code, data_resp = smtp.getreply()
+        
+        if mail_code != 250:
+            self._reset_transaction(mail_code)
+            raise smtplib.SMTPSenderRefused(mail_code, mail_resp, from_addr)
+        if len(refused) == len(recipients):
+            self._reset_transaction(data_code)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_code != 354:
+            self._reset_transaction(data_code)
+            raise smtplib.SMTPDataError(data_code, data_resp)
+        return refused
+    
+    def _reset_transaction(self, code: int):
+        """Abort a failed mail transaction so the session can be reused."""
+        import smtplib
+        
+        if code == 421:
+            self.smtp.close()
+            return
+        try:
+            self.smtp.rset()
+        except smtplib.SMTPServerDisconnected:
+            pass
+    
+    @staticmethod
+    def _is_streamed(attachment: EmailAttachment) -> bool:
+        """Check whether an attachment is base64-streamed instead of built in memory."""
+        return not attachment.content_type.startswith('text/')
+    
+    @staticmethod
+    def _open_attachment(attachment: EmailAttachment, files: contextlib.ExitStack):
+        """Get a binary reader for an attachment's data."""
+        if attachment.content:
+            return io.BytesIO(attachment.content)
+        if attachment.filepath:
+            return files.enter_context(open(attachment.filepath, 'rb'))
+        raise SMTPClientError(f"No content or filepath for attachment {attachment.filename}")
+    
+    @staticmethod
+    def _attachment_size(reader) -> int:
+        """Get the size of an attachment file, or 0 for in-memory content."""
+        if isinstance(reader, io.BytesIO):
+            return 0
+        return os.fstat(reader.fileno()).st_size
+    
+    def _build_skeleton(self, email_msg: OutgoingEmail) -> email.mime.multipart.MIMEMultipart:
+        """
+        Build the MIME message without the attachments that are streamed.
+        
+        Args:
+            email_msg: Email message to send
+        
+        Returns:
+            MIMEMultipart: Message to which streamed parts are appended
+        """
+        in_memory = [a for a in email_msg.attachments if not self._is_streamed(a)]
+        skeleton = self._build_mime_message(dataclasses.replace(email_msg, attachments=in_memory))
+        if len(in_memory) < len(email_msg.attachments) and skeleton.get_content_subtype() != 'mixed':
+            skeleton.set_type('multipart/mixed')
+        return skeleton
+    
+    def _message_chunks(self, skeleton: email.mime.multipart.MIMEMultipart,
+                        streamed: List[Tuple[EmailAttachment, Any]],
+                        policy: email.policy.Policy, use_sendfile: bool = False) -> Iterator[Any]:
+        """
+        Generate the dot-stuffed DATA payload of a message.
+        
+        Args:
+            skeleton: Message built by _build_skeleton
+            streamed: Attachments to stream, with an open reader for each
+            policy: Serialization policy
+            use_sendfile: Whether large attachments may be yielded as files
+        
+        Yields:
+            Consecutive pieces of the payload, as bytes or as a binary file
+            holding encoded lines to be sent with sendfile()
+        """
+        import email.mime.base
+        
+        data = skeleton.as_bytes(policy=policy)
+        if not streamed:
+            yield _LEADING_DOT_RE.sub(b'..', data)
+            return
+        
+        # Cut the serialized skeleton before its closing delimiter (or its
+        # empty placeholder part) and append the streamed parts in its place
+        boundary = b'--' + skeleton.get_boundary().encode('ascii')
+        if skeleton.get_payload():
+            data = data[:data.rindex(boundary + b'--')]
+        else:
+            data = data[:data.index(boundary)]
+        yield _LEADING_DOT_RE.sub(b'..', data)
+        
+        for attachment, reader in streamed:
+            maintype, subtype = attachment.content_type.split('/', 1)
+            part = email.mime.base.MIMEBase(maintype, subtype)
+            part['Content-Transfer-Encoding'] = 'base64'
+            self._set_attachment_headers(part, attachment)
+            yield boundary + b'\r\n' + _LEADING_DOT_RE.sub(b'..', part.as_bytes(policy=policy))
+            
+            # Base64 lines never start with a dot, so no stuffing is needed
+            buf = _read_buffer()
+            if use_sendfile and self._attachment_size(reader) >= _SENDFILE_MIN_SIZE:
+                with tempfile.TemporaryFile() as encoded:
+                    while size := reader.readinto(buf):
+                        encoded.write(base64.encodebytes(buf[:size]).replace(b'\n', b'\r\n'))
+                    encoded.seek(0)
+                    yield encoded
+                continue
+            
+            while size := reader.readinto(buf):
+                yield base64.encodebytes(buf[:size]).replace(b'\n', b'\r\n')
+        
+        yield boundary + b'--\r\n'
+    
     def send_test_email(self, to_email: str) -> bool:
         """
         Send a test email to verify connection.
@@ -252,6 +926,8 @@ class SMTPClient:
     
     def _build_mime_message(self, email_msg: OutgoingEmail) -> email.mime.multipart.MIMEMultipart:
         """Build MIME message from OutgoingEmail."""
+        import email.mime.multipart
+        
         # Create main message container
         if email_msg.attachments or (email_msg.text_content and email_msg.html_content):
             msg = email.mime.multipart.MIMEMultipart('mixed')
@@ -261,16 +937,16 @@ class SMTPClient:
         # Set headers
         msg['Subject'] = email_msg.subject
         msg['From'] = str(email_msg.from_addr)
-        msg['To'] = ', '.join(str(addr) for addr in email_msg.to_addrs)
+        msg['To'] = ', '.join([str(addr) for addr in email_msg.to_addrs])
         
         if email_msg.cc_addrs:
-            msg['Cc'] = ', '.join(str(addr) for addr in email_msg.cc_addrs)
+            msg['Cc'] = ', '.join([str(addr) for addr in email_msg.cc_addrs])
         
         if email_msg.reply_to:
             msg['Reply-To'] = str(email_msg.reply_to)
         
         msg['Date'] = email.utils.formatdate(localtime=True)
-        msg['Message-ID'] = email.utils.make_msgid()
+        msg['Message-ID'] = _make_msgid()
         
         # Set priority
         if email_msg.priority == 'high':
@@ -295,23 +971,23 @@ class SMTPClient:
             body_container = email.mime.multipart.MIMEMultipart('alternative')
             
             # Add text part
-            text_part = email.mime.text.MIMEText(email_msg.text_content, 'plain', 'utf-8')
+            text_part = _make_text_part(email_msg.text_content, 'plain')
             body_container.attach(text_part)
             
             # Add HTML part
-            html_part = email.mime.text.MIMEText(email_msg.html_content, 'html', 'utf-8')
+            html_part = _make_text_part(email_msg.html_content, 'html')
             body_container.attach(html_part)
             
             msg.attach(body_container)
             
         elif email_msg.html_content:
             # HTML only
-            html_part = email.mime.text.MIMEText(email_msg.html_content, 'html', 'utf-8')
+            html_part = _make_text_part(email_msg.html_content, 'html')
             msg.attach(html_part)
             
         elif email_msg.text_content:
             # Text only
-            text_part = email.mime.text.MIMEText(email_msg.text_content, 'plain', 'utf-8')
+            text_part = _make_text_part(email_msg.text_content, 'plain')
             msg.attach(text_part)
         
         # Add attachments
@@ -322,6 +998,10 @@ class SMTPClient:
     
     def _add_attachment_to_message(self, msg: email.mime.multipart.MIMEMultipart, attachment: EmailAttachment):
         """Add an attachment to the MIME message."""
+        import email.encoders
+        import email.mime.base
+        import email.mime.image
+        
         try:
             # Get attachment data
             if attachment.content:
@@ -337,11 +1017,7 @@ class SMTPClient:
             
             if maintype == 'text':
                 # Text attachment
-                mime_attachment = email.mime.text.MIMEText(
-                    data.decode('utf-8', errors='ignore'),
-                    subtype,
-                    'utf-8'
-                )
+                mime_attachment = _make_text_part(data.decode('utf-8', errors='ignore'), subtype)
             elif maintype == 'image':
                 # Image attachment
                 mime_attachment = email.mime.image.MIMEImage(data, subtype)
@@ -351,26 +1027,29 @@ class SMTPClient:
                 mime_attachment.set_payload(data)
                 email.encoders.encode_base64(mime_attachment)
             
-            # Set attachment headers
-            if attachment.is_inline and attachment.content_id:
-                mime_attachment.add_header(
-                    'Content-Disposition',
-                    'inline',
-                    filename=attachment.filename
-                )
-                mime_attachment.add_header('Content-ID', f'<{attachment.content_id}>')
-            else:
-                mime_attachment.add_header(
-                    'Content-Disposition',
-                    'attachment',
-                    filename=attachment.filename
-                )
-            
+            self._set_attachment_headers(mime_attachment, attachment)
             msg.attach(mime_attachment)
             
         except Exception as e:
             raise SMTPClientError(f"Failed to add attachment {attachment.filename}: {e}")
     
+    @staticmethod
+    def _set_attachment_headers(mime_attachment: email.mime.base.MIMEBase, attachment: EmailAttachment):
+        """Set the disposition headers of an attachment part."""
+        if attachment.is_inline and attachment.content_id:
+            mime_attachment.add_header(
+                'Content-Disposition',
+                'inline',
+                filename=attachment.filename
+            )
+            mime_attachment.add_header('Content-ID', f'<{attachment.content_id}>')
+        else:
+            mime_attachment.add_header(
+                'Content-Disposition',
+                'attachment',
+                filename=attachment.filename
+            )
+    
     def verify_connection(self) -> Tuple[bool, Optional[str]]:
         """
         Verify SMTP connection and authentication.
@@ -394,4 +1073,5 @@ class SMTPClient:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
+        self.shutdown()
         self.disconnect() 
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Drop cached message rows that store flags in the old JSON format.
+
+CachedMessage.flags used to hold a JSON list of flag names and now holds
+an ImapFlag bitmask. The rows are only a cache of server data, so the
+old ones are deleted and fetched again on the next folder sync instead
+of being converted.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from ...utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def drop_legacy_flag_rows(engine: Engine) -> int:
+    """
+    Delete cached messages whose flags column still holds JSON text.
+
+    Args:
+        engine: Database engine
+
+    Returns:
+        int: Number of rows deleted
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "DELETE FROM cached_messages WHERE typeof(flags) = 'text'"
+        ))
+
+    if result.rowcount:
+        logger.info(f"Dropped {result.rowcount} cached messages with JSON flags")
+    return result.rowcount
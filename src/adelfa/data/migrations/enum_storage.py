@@ -0,0 +1,49 @@
+"""
+Convert enum columns from member-name storage to SmallIntEnum codes.
+
+Databases created before enum columns became small integers hold member
+names such as 'TLS_SSL'; this rewrites them in place. Running it again
+on a converted database changes nothing.
+"""
+
+from sqlalchemy import String, case, type_coerce, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import MetaData
+
+from ...utils.logging_setup import get_logger
+from ..models.types import SmallIntEnum
+
+logger = get_logger(__name__)
+
+
+def upgrade_enum_columns(engine: Engine, metadata: MetaData) -> int:
+    """
+    Rewrite enum member names stored in SmallIntEnum columns as codes.
+
+    Args:
+        engine: Database engine
+        metadata: Metadata holding the model tables
+
+    Returns:
+        int: Number of rows updated
+    """
+    updated = 0
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            for column in table.columns:
+                if not isinstance(column.type, SmallIntEnum):
+                    continue
+
+                # Compare the raw stored text, bypassing the enum conversion
+                stored = type_coerce(column, String)
+                codes = {member.name: code for member, code in column.type._codes.items()}
+                result = conn.execute(
+                    update(table)
+                    .where(stored.in_(list(codes)))
+                    .values({column.name: case(codes, value=stored)})
+                )
+                updated += result.rowcount
+
+    if updated:
+        logger.info(f"Converted {updated} enum values to integer storage")
+    return updated
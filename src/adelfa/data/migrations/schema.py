@@ -0,0 +1,188 @@
+"""
+Bring existing tables up to date with the model metadata.
+
+create_all() creates missing tables but never alters existing ones, so
+columns added to a model later are appended here with ALTER TABLE,
+indexes are created, rebuilt or dropped to match the models, and tables
+whose foreign key actions changed are rebuilt.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable, MetaData
+
+from ...utils.logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def add_missing_columns(engine: Engine, metadata: MetaData) -> int:
+    """
+    Add model columns that are missing from existing tables.
+
+    Only nullable columns, or columns with a server default, can be
+    added to populated SQLite tables; others are reported and skipped.
+
+    Args:
+        engine: Database engine
+        metadata: Metadata holding the model tables
+
+    Returns:
+        int: Number of columns added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = 0
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.warning(f"Cannot add required column {table.name}.{column.name}")
+                    continue
+
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                logger.info(f"Added column {table.name}.{column.name}")
+                added += 1
+
+    return added
+
+
+def sync_indexes(engine: Engine, metadata: MetaData) -> int:
+    """
+    Make the indexes of existing tables match the model metadata.
+
+    Indexes are compared by their CREATE INDEX statement, so an index
+    whose columns or WHERE clause changed is rebuilt. Indexes on model
+    tables that no model declares any more are dropped. A unique index
+    that existing rows violate is reported and left out.
+
+    Args:
+        engine: Database engine
+        metadata: Metadata holding the model tables
+
+    Returns:
+        int: Number of indexes created, rebuilt or dropped
+    """
+    changed = 0
+    with engine.begin() as conn:
+        # Indexes backing constraints have no SQL and are left alone
+        existing = {
+            name: (table_name, " ".join(sql.split()))
+            for name, table_name, sql in conn.execute(text(
+                "SELECT name, tbl_name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+            ))
+        }
+
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                ddl = " ".join(str(CreateIndex(index).compile(dialect=engine.dialect)).split())
+                current = existing.pop(index.name, None)
+                if current is not None and current[1] == ddl:
+                    continue
+                if current is not None:
+                    conn.execute(text(f"DROP INDEX {index.name}"))
+                try:
+                    with conn.begin_nested():
+                        index.create(conn)
+                except IntegrityError:
+                    logger.error(f"Cannot create unique index {index.name}: duplicate rows in {table.name}")
+                    continue
+                logger.info(f"{'Rebuilt' if current else 'Created'} index {index.name}")
+                changed += 1
+
+        for name, (table_name, _) in existing.items():
+            if table_name in metadata.tables:
+                conn.execute(text(f"DROP INDEX {name}"))
+                logger.info(f"Dropped index {name}")
+                changed += 1
+
+    return changed
+
+
+def rebuild_foreign_keys(engine: Engine, metadata: MetaData) -> int:
+    """
+    Rebuild tables whose foreign keys differ from the model metadata.
+
+    SQLite cannot alter a foreign key, so a table whose ON DELETE actions
+    changed is recreated from the model, its rows copied over, and its
+    indexes and triggers restored. Columns no model declares any more
+    are not copied, so this runs after the data migrations.
+
+    Args:
+        engine: Database engine
+        metadata: Metadata holding the model tables
+
+    Returns:
+        int: Number of tables rebuilt
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    stale = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        declared = {
+            (tuple(fk.column_keys), fk.referred_table.name, (fk.ondelete or "").upper())
+            for fk in table.foreign_key_constraints
+        }
+        current = {
+            (tuple(fk['constrained_columns']), fk['referred_table'],
+             (fk.get('options', {}).get('ondelete') or "").upper())
+            for fk in inspector.get_foreign_keys(table.name)
+        }
+        if declared != current:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            stale.append((table, [column.name for column in table.columns if column.name in columns]))
+
+    if not stale:
+        return 0
+
+    preparer = engine.dialect.identifier_preparer
+    with engine.connect() as conn:
+        # Both pragmas are ignored inside a transaction. Foreign keys must
+        # be off so dropping a parent table does not cascade into children,
+        # and legacy renames leave references in other tables untouched.
+        conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+        conn.commit()
+
+        with conn.begin():
+            for table, columns in stale:
+                name = preparer.format_table(table)
+                temp = preparer.quote(f"{table.name}_rebuild")
+                column_list = ", ".join(preparer.quote(column) for column in columns)
+                # Indexes and triggers are dropped with the table
+                restore = [sql for (sql,) in conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                         "AND tbl_name = :name AND sql IS NOT NULL"),
+                    {"name": table.name}
+                )]
+
+                ddl = str(CreateTable(table).compile(dialect=engine.dialect)).strip()
+                conn.execute(text(ddl.replace(f"CREATE TABLE {name} ", f"CREATE TABLE {temp} ", 1)))
+                conn.execute(text(f"INSERT INTO {temp} ({column_list}) SELECT {column_list} FROM {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                conn.execute(text(f"ALTER TABLE {temp} RENAME TO {name}"))
+                for sql in restore:
+                    conn.execute(text(sql))
+                logger.info(f"Rebuilt table {table.name} with updated foreign keys")
+
+            orphans = conn.execute(text("PRAGMA foreign_key_check")).all()
+            if orphans:
+                logger.warning(f"{len(orphans)} rows reference missing parent rows")
+
+        conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+        conn.exec_driver_sql("PRAGMA foreign_keys = ON")
+        conn.commit()
+
+    return len(stale)
@@ -3,22 +3,26 @@ Data models for Adelfa PIM suite.
 """
 
 from .accounts import Account, AccountProvider, AccountConnectionTest
-from .calendar import Calendar, Event, Attendee, Reminder
-from .contacts import Contact, ContactGroup, ContactEmail, ContactPhone, ContactAddress, ContactGroupMembership
-from .notes import Note, Notebook, NoteAttachment, NoteTag
+from .calendar import Calendar, Event, EventRecurrenceException, Attendee, Reminder
+from .contacts import (
+    Contact, ContactGroup, ContactEmail, ContactPhone, ContactAddress, ContactGroupMembership, ContactPhoto
+)
+from .notes import Note, Notebook, NoteAttachment, NoteContent, NoteTag
 from .tasks import Task, TaskList, TaskPriority
 from .cache import CachedFolder, CachedMessage
 
 # Base class for all models
-from .accounts import Base
+from .base import Base, enable_foreign_keys
 
 __all__ = [
     'Base',
+    'enable_foreign_keys',
     'Account', 
     'AccountProvider',
     'AccountConnectionTest',
     'Calendar',
     'Event',
+    'EventRecurrenceException',
     'Attendee',
     'Reminder', 
     'Contact',
@@ -27,9 +31,11 @@ __all__ = [
     'ContactPhone',
     'ContactAddress',
     'ContactGroupMembership',
+    'ContactPhoto',
     'Note',
     'Notebook',
     'NoteAttachment',
+    'NoteContent',
     'NoteTag',
     'Task',
     'TaskList',
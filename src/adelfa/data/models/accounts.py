@@ -5,17 +5,16 @@ Defines SQLAlchemy models for email, calendar, and contact accounts
 with secure credential storage and multi-protocol support.
 """
 
-from datetime import datetime
 from typing import Optional, Dict, Any
 from sqlalchemy import (
     Column, Integer, String, DateTime, Text, Boolean, 
-    ForeignKey, Enum, JSON, UniqueConstraint, Index
+    ForeignKey, JSON, UniqueConstraint, Index, func
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import enum
 
-Base = declarative_base()
+from .types import SmallIntEnum
+from .base import Base, BulkInsertMixin
 
 
 class AccountType(enum.Enum):
@@ -26,6 +25,15 @@ class AccountType(enum.Enum):
     COMBINED = "combined"  # Accounts that support multiple protocols
 
 
+# Codes stored for each member by SmallIntEnum columns; never reuse or renumber one
+ACCOUNT_TYPE_CODES = {
+    AccountType.EMAIL: 0,
+    AccountType.CALENDAR: 1,
+    AccountType.CONTACTS: 2,
+    AccountType.COMBINED: 3,
+}
+
+
 class EmailProtocol(enum.Enum):
     """Enumeration for email protocols."""
     IMAP = "imap"
@@ -34,6 +42,14 @@ class EmailProtocol(enum.Enum):
     GMAIL_API = "gmail_api"
 
 
+EMAIL_PROTOCOL_CODES = {
+    EmailProtocol.IMAP: 0,
+    EmailProtocol.POP3: 1,
+    EmailProtocol.EXCHANGE_EWS: 2,
+    EmailProtocol.GMAIL_API: 3,
+}
+
+
 class SecurityType(enum.Enum):
     """Enumeration for connection security types."""
     NONE = "none"
@@ -42,6 +58,14 @@ class SecurityType(enum.Enum):
     AUTO = "auto"
 
 
+SECURITY_TYPE_CODES = {
+    SecurityType.NONE: 0,
+    SecurityType.STARTTLS: 1,
+    SecurityType.TLS_SSL: 2,
+    SecurityType.AUTO: 3,
+}
+
+
 class AuthMethod(enum.Enum):
     """Enumeration for authentication methods."""
     PASSWORD = "password"
@@ -51,6 +75,15 @@ class AuthMethod(enum.Enum):
     KERBEROS = "kerberos"
 
 
+AUTH_METHOD_CODES = {
+    AuthMethod.PASSWORD: 0,
+    AuthMethod.OAUTH2: 1,
+    AuthMethod.XOAUTH2: 2,
+    AuthMethod.NTLM: 3,
+    AuthMethod.KERBEROS: 4,
+}
+
+
 class AccountProvider(Base):
     """
     Account provider entity for common email/calendar/contact services.
@@ -72,15 +105,15 @@ class AccountProvider(Base):
     # Email configuration
     imap_server = Column(String(255))
     imap_port = Column(Integer)
-    imap_security = Column(Enum(SecurityType))
+    imap_security = Column(SmallIntEnum(SecurityType, SECURITY_TYPE_CODES))
     
     pop3_server = Column(String(255))
     pop3_port = Column(Integer)
-    pop3_security = Column(Enum(SecurityType))
+    pop3_security = Column(SmallIntEnum(SecurityType, SECURITY_TYPE_CODES))
     
     smtp_server = Column(String(255))
     smtp_port = Column(Integer)
-    smtp_security = Column(Enum(SecurityType))
+    smtp_security = Column(SmallIntEnum(SecurityType, SECURITY_TYPE_CODES))
     
     # Calendar/Contacts configuration
     caldav_server = Column(String(255))
@@ -96,14 +129,14 @@ class AccountProvider(Base):
     supports_contacts = Column(Boolean, default=False)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     def __repr__(self) -> str:
         return f"<AccountProvider(name='{self.name}', display_name='{self.display_name}')>"
 
 
-class Account(Base):
+class Account(BulkInsertMixin, Base):
     """
     Account entity representing an email, calendar, or contact account.
     
@@ -112,12 +145,12 @@ class Account(Base):
     __tablename__ = "accounts"
     
     id = Column(Integer, primary_key=True)
-    provider_id = Column(Integer, ForeignKey("account_providers.id"))
+    provider_id = Column(Integer, ForeignKey("account_providers.id", ondelete="SET NULL"))
     
     # Account identification
     name = Column(String(255), nullable=False)  # User-friendly name
     email_address = Column(String(320))  # Primary email address
-    account_type = Column(Enum(AccountType), default=AccountType.EMAIL)
+    account_type = Column(SmallIntEnum(AccountType, ACCOUNT_TYPE_CODES), default=AccountType.EMAIL)
     
     # General settings
     is_enabled = Column(Boolean, default=True)
@@ -125,18 +158,18 @@ class Account(Base):
     display_name = Column(String(255))  # Name to show in From field
     
     # Email configuration
-    email_protocol = Column(Enum(EmailProtocol))
+    email_protocol = Column(SmallIntEnum(EmailProtocol, EMAIL_PROTOCOL_CODES))
     
     # Incoming mail settings
     incoming_server = Column(String(255))
     incoming_port = Column(Integer)
-    incoming_security = Column(Enum(SecurityType))
+    incoming_security = Column(SmallIntEnum(SecurityType, SECURITY_TYPE_CODES))
     incoming_username = Column(String(255))
     
     # Outgoing mail settings  
     outgoing_server = Column(String(255))
     outgoing_port = Column(Integer)
-    outgoing_security = Column(Enum(SecurityType))
+    outgoing_security = Column(SmallIntEnum(SecurityType, SECURITY_TYPE_CODES))
     outgoing_username = Column(String(255))
     outgoing_auth_required = Column(Boolean, default=True)
     
@@ -151,7 +184,7 @@ class Account(Base):
     carddav_sync_enabled = Column(Boolean, default=False)
     
     # Authentication
-    auth_method = Column(Enum(AuthMethod), default=AuthMethod.PASSWORD)
+    auth_method = Column(SmallIntEnum(AuthMethod, AUTH_METHOD_CODES), default=AuthMethod.PASSWORD)
     
     # Secure credential storage (these reference keyring entries)
     incoming_password_key = Column(String(255))  # Keyring key for incoming password
@@ -164,28 +197,30 @@ class Account(Base):
     sync_frequency = Column(Integer, default=15)  # Minutes
     keep_messages_days = Column(Integer, default=30)  # Days to keep messages locally
     
-    # Advanced settings
-    advanced_settings = Column(JSON)  # Additional protocol-specific settings
+    # Advanced settings; deferred with last_error, loaded together on first access
+    advanced_settings = deferred(Column(JSON), group="details")  # Additional protocol-specific settings
     
     # Status tracking
     last_sync = Column(DateTime)
-    last_error = Column(Text)
+    last_error = deferred(Column(Text), group="details")
     connection_status = Column(String(50), default="not_tested")
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     provider = relationship("AccountProvider")
-    cached_folders = relationship("CachedFolder", back_populates="account", cascade="all, delete-orphan")
-    cached_messages = relationship("CachedMessage", back_populates="account", cascade="all, delete-orphan")
+    cached_folders = relationship("CachedFolder", back_populates="account", cascade="all, delete-orphan", passive_deletes=True)
+    cached_messages = relationship("CachedMessage", back_populates="account", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes for performance
     __table_args__ = (
         UniqueConstraint("email_address", "account_type", name="uq_account_email_type"),
         Index("idx_account_enabled", "is_enabled"),
-        Index("idx_account_default", "is_default"),
+        # At most one row is the default; the partial index holds just that row,
+        # and is_enabled lets get_default_account() prefer it over idx_account_enabled
+        Index("idx_account_default", "is_default", "is_enabled", sqlite_where=is_default == True),
         Index("idx_account_email", "email_address"),
     )
     
@@ -209,7 +244,7 @@ class AccountConnectionTest(Base):
     __tablename__ = "account_connection_tests"
     
     id = Column(Integer, primary_key=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
     
     # Test details
     test_type = Column(String(50), nullable=False)  # incoming, outgoing, caldav, carddav
@@ -218,11 +253,16 @@ class AccountConnectionTest(Base):
     response_time_ms = Column(Integer)
     
     # Test metadata
-    tested_at = Column(DateTime, default=datetime.utcnow)
-    client_info = Column(JSON)  # Details about the test environment
+    tested_at = Column(DateTime, default=func.now())
+    client_info = deferred(Column(JSON))  # Details about the test environment; not shown in history
     
     # Relationships
     account = relationship("Account")
     
+    # Newest results per account come straight off the index (id is the rowid)
+    __table_args__ = (
+        Index("idx_connection_test_account_tested", "account_id", "tested_at"),
+    )
+    
     def __repr__(self) -> str:
         return f"<AccountConnectionTest(account_id={self.account_id}, type='{self.test_type}', result='{self.test_result}')>" 
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Declarative base shared by all Adelfa PIM suite models.
+
+Every model registers with this one registry and MetaData, so relationships
+and foreign keys resolve across modules and create_all() builds every table.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import event, func, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base
+
+Base = declarative_base()
+
+
+def enable_foreign_keys(engine: Engine):
+    """
+    Enforce foreign keys on every connection of a SQLite engine.
+
+    SQLite ignores foreign keys, including their ON DELETE CASCADE
+    actions, unless each connection turns them on. Relationships to
+    child rows rely on those actions (passive_deletes), so every engine
+    used with the models needs this.
+
+    Args:
+        engine: Database engine
+    """
+    @event.listens_for(engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.close()
+
+
+class BulkInsertMixin:
+    """
+    Batched inserts for models filled in bulk by sync imports.
+
+    Rows go through one INSERT executed with all parameter sets at once
+    (a DBAPI executemany, or multi-row VALUES pages of the engine's
+    insertmanyvalues_page_size when rows are returned) instead of one
+    INSERT per flushed object.
+
+    Models set SYNC_KEY to the columns of their partial unique index on
+    synced rows to support bulk_upsert().
+    """
+    SYNC_KEY: Tuple[str, ...] = ()
+
+    @classmethod
+    def bulk_insert(cls, session: Session, rows: List[Dict[str, Any]]):
+        """
+        Insert many rows without building ORM objects.
+
+        Relationships are not followed; child rows such as attendees or
+        contact emails are inserted separately once the parent ids are
+        known. The caller commits.
+
+        Args:
+            session: Database session
+            rows: Column values per row
+        """
+        if not rows:
+            return
+
+        session.execute(insert(cls), rows)
+
+    @classmethod
+    def bulk_upsert(cls, session: Session, rows: List[Dict[str, Any]]):
+        """
+        Insert or update synced rows in a single executemany statement.
+
+        Rows are matched on SYNC_KEY, so a sync writes each object once
+        instead of looking it up first. Every row must carry the same
+        columns, including the SYNC_KEY ones; those columns are
+        overwritten on conflict. The caller commits.
+
+        Args:
+            session: Database session
+            rows: Column values per synced object
+        """
+        if not rows:
+            return
+
+        stmt = sqlite_insert(cls)
+        updated = {name: stmt.excluded[name] for name in rows[0] if name not in cls.SYNC_KEY}
+        if 'updated_at' in cls.__table__.c and 'updated_at' not in updated:
+            updated['updated_at'] = func.now()
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(cls.SYNC_KEY),
+            index_where=cls.server_id.is_not(None),
+            set_=updated
+        )
+        session.execute(stmt, rows)
@@ -2,12 +2,16 @@
 Cache models for storing email data locally.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, DateTime, Text, Boolean, ForeignKey, JSON,
+    UniqueConstraint, Index, func
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import relationship, Session
+import enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from .accounts import Base
+from .base import Base
 
 
 class CachedFolder(Base):
@@ -15,19 +19,59 @@ class CachedFolder(Base):
     __tablename__ = 'cached_folders'
     
     id = Column(Integer, primary_key=True)
-    account_id = Column(Integer, ForeignKey('accounts.id'), nullable=False)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), nullable=False)
     name = Column(String(255), nullable=False)
     delimiter = Column(String(10), default='/')
-    flags = Column(Text)  # JSON string of flags
+    flags = Column(JSON)  # List of flags
     exists = Column(Integer, default=0)
     recent = Column(Integer, default=0)
     unseen = Column(Integer, default=0)
     uidvalidity = Column(Integer, default=0)
     uidnext = Column(Integer, default=0)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=func.now())
     
     # Relationship to account
     account = relationship("Account", back_populates="cached_folders")
+    
+    # Folder lists are loaded per account, ordered by name
+    __table_args__ = (
+        Index('idx_cached_folder_account', 'account_id', 'name'),
+    )
+
+
+class ImapFlag(enum.IntFlag):
+    """IMAP system flags (RFC 3501), stored as a bitmask."""
+    SEEN = 1
+    ANSWERED = 2
+    FLAGGED = 4
+    DRAFT = 8
+    DELETED = 16
+    RECENT = 32
+
+
+# Flag name as sent by the server, e.g. \Seen, to its bit
+_FLAG_BITS = {f"\\{flag.name.capitalize()}": flag for flag in ImapFlag}
+
+
+def pack_flags(flags: Iterable[str]) -> Tuple[int, Optional[List[str]]]:
+    """
+    Split IMAP flags into a system flag bitmask and the remaining keywords.
+    
+    Args:
+        flags: Flag names from the server
+    
+    Returns:
+        Tuple of (ImapFlag bitmask, keyword list or None if there are none)
+    """
+    bits = 0
+    keywords = []
+    for name in flags:
+        bit = _FLAG_BITS.get(name)
+        if bit is None:
+            keywords.append(name)
+        else:
+            bits |= bit
+    return bits, keywords or None
 
 
 class CachedMessage(Base):
@@ -35,24 +79,81 @@ class CachedMessage(Base):
     __tablename__ = 'cached_messages'
     
     id = Column(Integer, primary_key=True)
-    account_id = Column(Integer, ForeignKey('accounts.id'), nullable=False)
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='CASCADE'), nullable=False)
     folder_name = Column(String(255), nullable=False)
     uid = Column(Integer, nullable=False)
     message_id = Column(String(255))
     subject = Column(Text)
     from_addr = Column(Text)
-    to_addrs = Column(Text)  # JSON string
-    cc_addrs = Column(Text)  # JSON string
+    to_addrs = Column(JSON)  # List of addresses
+    cc_addrs = Column(JSON)  # List of addresses
     date = Column(DateTime)
-    flags = Column(Text)  # JSON string of flags
+    flags = Column(SmallInteger, default=0)  # ImapFlag bitmask
+    keywords = Column(JSON)  # Non-system flags such as $Forwarded, NULL if none
     size = Column(Integer, default=0)
     has_attachments = Column(Boolean, default=False)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=func.now())
     
     # Relationship to account
     account = relationship("Account", back_populates="cached_messages")
     
-    # Unique constraint on account_id, folder_name, uid
+    # Unique constraint on account_id, folder_name, uid; its index also
+    # serves per-folder lookups, the second one folder listings by date
     __table_args__ = (
+        UniqueConstraint('account_id', 'folder_name', 'uid', name='uq_cached_msg_uid'),
+        Index('idx_cached_msg_date', 'account_id', 'folder_name', 'date'),
         {'sqlite_autoincrement': True},
-    ) 
\ No newline at end of file
+    )
+    
+    # Columns refreshed when a cached UID is fetched again
+    _UPSERT_COLUMNS = (
+        'subject', 'from_addr', 'to_addrs', 'cc_addrs', 'date',
+        'flags', 'keywords', 'size', 'has_attachments', 'last_updated'
+    )
+    
+    @property
+    def flag_names(self) -> List[str]:
+        """Get all flags of the message as IMAP flag names."""
+        bits = self.flags or 0
+        names = [name for name, bit in _FLAG_BITS.items() if bits & bit]
+        return names + list(self.keywords or [])
+    
+    @flag_names.setter
+    def flag_names(self, flags: Iterable[str]):
+        """Set the flag bitmask and keywords from IMAP flag names."""
+        self.flags, self.keywords = pack_flags(flags)
+    
+    @classmethod
+    def has_flag(cls, flag: ImapFlag):
+        """
+        Build a SQL condition matching messages with a system flag set.
+        
+        Args:
+            flag: Flag to test
+        
+        Returns:
+            SQL expression, negate it with ~ for messages without the flag
+        """
+        return cls.flags.op('&')(int(flag)) != 0
+    
+    @classmethod
+    def bulk_upsert(cls, session: Session, rows: List[Dict[str, Any]]):
+        """
+        Insert or update message rows in a single executemany statement.
+        
+        Rows are matched on (account_id, folder_name, uid); no ORM objects
+        are built, and the caller commits.
+        
+        Args:
+            session: Database session
+            rows: Column values per message
+        """
+        if not rows:
+            return
+        
+        stmt = insert(cls)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['account_id', 'folder_name', 'uid'],
+            set_={name: stmt.excluded[name] for name in cls._UPSERT_COLUMNS}
+        )
+        session.execute(stmt, rows)
@@ -5,17 +5,20 @@ Defines SQLAlchemy models for calendar events, recurring patterns,
 reminders, and calendar metadata.
 """
 
-from datetime import datetime, date, time
-from typing import Optional, List
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, FrozenSet, Optional, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Time, Text, Boolean, 
-    ForeignKey, Enum, JSON, UniqueConstraint, Index
+    ForeignKey, UniqueConstraint, Index, func, select
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship
+from sqlalchemy import event
+from sqlalchemy.sql import ColumnElement, Select
 import enum
 
-Base = declarative_base()
+from .base import Base, BulkInsertMixin
+from .types import SmallIntEnum
 
 
 class RecurrenceType(enum.Enum):
@@ -28,6 +31,17 @@ class RecurrenceType(enum.Enum):
     CUSTOM = "custom"
 
 
+# Codes stored for each member by SmallIntEnum columns; never reuse or renumber one
+RECURRENCE_TYPE_CODES = {
+    RecurrenceType.NONE: 0,
+    RecurrenceType.DAILY: 1,
+    RecurrenceType.WEEKLY: 2,
+    RecurrenceType.MONTHLY: 3,
+    RecurrenceType.YEARLY: 4,
+    RecurrenceType.CUSTOM: 5,
+}
+
+
 class EventStatus(enum.Enum):
     """Enumeration for event status."""
     TENTATIVE = "tentative"
@@ -35,6 +49,13 @@ class EventStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+EVENT_STATUS_CODES = {
+    EventStatus.TENTATIVE: 0,
+    EventStatus.CONFIRMED: 1,
+    EventStatus.CANCELLED: 2,
+}
+
+
 class AttendeeStatus(enum.Enum):
     """Enumeration for attendee response status."""
     NEEDS_ACTION = "needs-action"
@@ -44,6 +65,57 @@ class AttendeeStatus(enum.Enum):
     DELEGATED = "delegated"
 
 
+ATTENDEE_STATUS_CODES = {
+    AttendeeStatus.NEEDS_ACTION: 0,
+    AttendeeStatus.ACCEPTED: 1,
+    AttendeeStatus.DECLINED: 2,
+    AttendeeStatus.TENTATIVE: 3,
+    AttendeeStatus.DELEGATED: 4,
+}
+
+
+def utc_span(start_date: Optional[date], start_time: Optional[time] = None,
+             end_date: Optional[date] = None, end_time: Optional[time] = None,
+             is_all_day: bool = False, tz_name: Optional[str] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Convert an event's local date, time and timezone fields to UTC instants.
+    
+    All-day events, and events without an end time, last until the end of
+    their (last) day. Unknown timezones are treated as UTC.
+    
+    Args:
+        start_date: Local start date
+        start_time: Local start time, midnight if missing
+        end_date: Local end date, the start date if missing
+        end_time: Local end time
+        is_all_day: Whether the times are ignored
+        tz_name: IANA timezone name of the local fields
+    
+    Returns:
+        Tuple[Optional[datetime], Optional[datetime]]: Naive UTC start and
+        end, or (None, None) for events without a start date
+    """
+    if start_date is None:
+        return None, None
+    
+    try:
+        zone = ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = timezone.utc
+    
+    def to_utc(day: date, at: time) -> datetime:
+        local = datetime.combine(day, at, tzinfo=zone)
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    last_day = end_date or start_date
+    start = to_utc(start_date, time.min if is_all_day else (start_time or time.min))
+    if end_time is not None and not is_all_day:
+        end = to_utc(last_day, end_time)
+    else:
+        end = to_utc(last_day + timedelta(days=1), time.min)
+    return start, end
+
+
 class Calendar(Base):
     """
     Calendar entity representing a calendar collection.
@@ -68,17 +140,43 @@ class Calendar(Base):
     sync_token = Column(String(512))  # ETag or sync token
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    events = relationship("Event", back_populates="calendar", cascade="all, delete-orphan")
+    events = relationship("Event", back_populates="calendar", cascade="all, delete-orphan", passive_deletes=True)
+    
+    def needs_sync(self, server_token: Optional[str]) -> bool:
+        """
+        Check whether the calendar changed on the server since the last sync.
+        
+        When the server reports the recorded sync token (or CTag), no
+        event has changed and fetching and comparing events can be
+        skipped entirely.
+        
+        Args:
+            server_token: Sync token or CTag reported by the server
+        
+        Returns:
+            bool: True if events must be synchronized
+        """
+        return not server_token or server_token != self.sync_token
+    
+    def mark_synced(self, server_token: Optional[str]) -> None:
+        """
+        Record a completed sync.
+        
+        Args:
+            server_token: Sync token or CTag the events were synchronized at
+        """
+        self.sync_token = server_token
+        self.last_sync = datetime.utcnow()
     
     def __repr__(self) -> str:
         return f"<Calendar(id={self.id}, name='{self.name}')>"
 
 
-class Event(Base):
+class Event(BulkInsertMixin, Base):
     """
     Calendar event entity.
     
@@ -88,7 +186,7 @@ class Event(Base):
     __tablename__ = "events"
     
     id = Column(Integer, primary_key=True)
-    calendar_id = Column(Integer, ForeignKey("calendars.id"), nullable=False)
+    calendar_id = Column(Integer, ForeignKey("calendars.id", ondelete="CASCADE"), nullable=False)
     
     # Basic event information
     title = Column(String(512), nullable=False)
@@ -102,15 +200,16 @@ class Event(Base):
     end_time = Column(Time)
     is_all_day = Column(Boolean, default=False)
     timezone = Column(String(50), default="UTC")
+    start_utc = Column(DateTime)  # Derived from the fields above on flush, naive UTC
+    end_utc = Column(DateTime)    # Derived from the fields above on flush, naive UTC
     
     # Recurrence
-    recurrence_type = Column(Enum(RecurrenceType), default=RecurrenceType.NONE)
+    recurrence_type = Column(SmallIntEnum(RecurrenceType, RECURRENCE_TYPE_CODES), default=RecurrenceType.NONE)
     recurrence_rule = Column(String(512))  # RRULE string
-    recurrence_exceptions = Column(JSON)   # List of exception dates
-    recurrence_parent_id = Column(Integer, ForeignKey("events.id"))
+    recurrence_parent_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"))
     
     # Status and visibility
-    status = Column(Enum(EventStatus), default=EventStatus.CONFIRMED)
+    status = Column(SmallIntEnum(EventStatus, EVENT_STATUS_CODES), default=EventStatus.CONFIRMED)
     is_private = Column(Boolean, default=False)
     is_busy = Column(Boolean, default=True)  # For free/busy calculations
     
@@ -124,27 +223,195 @@ class Event(Base):
     last_modified = Column(DateTime)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     calendar = relationship("Calendar", back_populates="events")
-    attendees = relationship("Attendee", back_populates="event", cascade="all, delete-orphan")
-    reminders = relationship("Reminder", back_populates="event", cascade="all, delete-orphan")
-    recurrence_children = relationship("Event", remote_side=[id])
+    attendees = relationship("Attendee", back_populates="event", cascade="all, delete-orphan", passive_deletes=True,
+                             lazy="selectin")  # Shown with the event; one SELECT per query
+    reminders = relationship("Reminder", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
+    # Overridden occurrences go with their recurring event
+    recurrence_children = relationship("Event", cascade="all", passive_deletes=True)
+    exceptions = relationship("EventRecurrenceException", back_populates="event", cascade="all, delete-orphan", passive_deletes=True,
+                              lazy="selectin")  # Needed for every expansion; one SELECT per query
     
     # Indexes for performance
     __table_args__ = (
-        Index("idx_event_calendar_dates", "calendar_id", "start_date", "end_date"),
-        Index("idx_event_server_id", "server_id"),
+        # Range scans on start_date per calendar; the trailing columns make
+        # it a covering index for span_query()
+        Index("idx_event_calendar_dates", "calendar_id", "start_date",
+              "end_date", "start_time", "end_time", "is_all_day"),
+        # Sync key for bulk_upsert(); also serves lookups by server ID
+        Index("uq_event_server", "server_id", "calendar_id", unique=True,
+              sqlite_where=server_id.is_not(None)),
+        # Covers etag_map(); only synced events carry a server ID
+        Index("idx_event_calendar_server", "calendar_id", "server_id", "etag",
+              sqlite_where=server_id.is_not(None)),
         Index("idx_event_recurrence", "recurrence_parent_id"),
+        # Overlap queries in absolute time, see overlapping_clause()
+        Index("idx_event_utc_range", "calendar_id", "start_utc", "end_utc"),
+        # Series masters and single events, without overridden occurrences
+        Index("idx_event_masters", "calendar_id", "start_date",
+              sqlite_where=recurrence_parent_id.is_(None)),
     )
     
+    @property
+    def exception_dates(self) -> FrozenSet[date]:
+        """Dates on which the recurrence does not occur."""
+        return frozenset(exception.exception_date for exception in self.exceptions)
+    
+    def add_exception(self, exception_date: date) -> None:
+        """
+        Exclude a date from the recurrence.
+        
+        Args:
+            exception_date: Date to skip
+        """
+        if exception_date not in self.exception_dates:
+            self.exceptions.append(EventRecurrenceException(exception_date=exception_date))
+    
+    def remove_exception(self, exception_date: date) -> None:
+        """
+        Let the recurrence occur again on a previously excluded date.
+        
+        Args:
+            exception_date: Date to restore
+        """
+        for exception in self.exceptions:
+            if exception.exception_date == exception_date:
+                self.exceptions.remove(exception)
+                break
+    
+    @classmethod
+    def overlapping_clause(cls, start: datetime, end: datetime) -> ColumnElement:
+        """
+        Build the WHERE clause selecting events that overlap a time range.
+        
+        Compares the stored UTC instants, so events in any timezone are
+        found with one range scan of idx_event_utc_range per calendar.
+        
+        Args:
+            start: Range start, naive UTC
+            end: Range end (exclusive), naive UTC
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return (cls.start_utc < end) & (cls.end_utc > start)
+    
+    def refresh_utc_span(self) -> None:
+        """Recompute start_utc and end_utc from the local timing fields."""
+        self.start_utc, self.end_utc = utc_span(
+            self.start_date, self.start_time, self.end_date, self.end_time,
+            self.is_all_day, self.timezone
+        )
+    
+    @classmethod
+    def master_clause(cls) -> ColumnElement:
+        """
+        Build the WHERE clause selecting events that are not occurrences.
+        
+        Selects single events and recurrence masters, which expansion
+        starts from; overridden occurrences hang off their master through
+        recurrence_parent_id. Matches the idx_event_masters partial index.
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return cls.recurrence_parent_id.is_(None)
+    
+    @classmethod
+    def etag_map(cls, session: Session, calendar_id: int) -> Dict[str, Optional[str]]:
+        """
+        Get the ETag of every synced event in a calendar.
+        
+        Sync compares this with the ETags listed by the server and only
+        fetches events whose ETag differs; read from an index alone,
+        without loading events.
+        
+        Args:
+            session: Database session
+            calendar_id: Calendar to read
+        
+        Returns:
+            Dict[str, Optional[str]]: ETag per event server ID
+        """
+        rows = session.execute(
+            select(cls.server_id, cls.etag)
+            .where(cls.calendar_id == calendar_id, cls.server_id.is_not(None))
+        )
+        return dict(rows.all())
+    
+    # Identifies a synced event, see bulk_upsert()
+    SYNC_KEY = ("server_id", "calendar_id")
+    
+    # Columns stored in idx_event_calendar_dates
+    SPAN_COLUMNS = ("id", "start_date", "end_date", "start_time", "end_time", "is_all_day")
+    
+    @classmethod
+    def span_query(cls, calendar_id: int, start: date, end: date) -> Select:
+        """
+        Build a query for the timing of events overlapping a date range.
+        
+        Selects only SPAN_COLUMNS, so SQLite answers it from the calendar
+        date index without reading event rows; use it for month grids and
+        free/busy views, and load full events by id when opened.
+        
+        Args:
+            calendar_id: Calendar to search
+            start: First day of the range
+            end: Last day of the range
+        
+        Returns:
+            Select: Query yielding rows of SPAN_COLUMNS
+        """
+        return (
+            select(*(getattr(cls, name) for name in cls.SPAN_COLUMNS))
+            .where(
+                cls.calendar_id == calendar_id,
+                cls.start_date <= end,
+                func.coalesce(cls.end_date, cls.start_date) >= start
+            )
+            .order_by(cls.start_date)
+        )
+    
     def __repr__(self) -> str:
         return f"<Event(id={self.id}, title='{self.title}', start='{self.start_date}')>"
 
 
-class Attendee(Base):
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def _update_event_utc_span(mapper, connection, target: Event):
+    """Keep the UTC instants in step with the local timing fields."""
+    target.refresh_utc_span()
+
+
+class EventRecurrenceException(Base):
+    """
+    Recurrence exception entity.
+    
+    Marks a date on which a recurring event does not occur (EXDATE).
+    """
+    __tablename__ = "event_recurrence_exceptions"
+    
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
+    exception_date = Column(Date, nullable=False)
+    
+    # Relationships
+    event = relationship("Event", back_populates="exceptions")
+    
+    # The constraint's index also serves lookups by event and date
+    __table_args__ = (
+        UniqueConstraint("event_id", "exception_date", name="uq_event_exception_date"),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<EventRecurrenceException(event_id={self.event_id}, date='{self.exception_date}')>"
+
+
+class Attendee(BulkInsertMixin, Base):
     """
     Event attendee entity.
     
@@ -153,13 +420,13 @@ class Attendee(Base):
     __tablename__ = "attendees"
     
     id = Column(Integer, primary_key=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     
     # Attendee information
     name = Column(String(255))
     email = Column(String(320), nullable=False)  # RFC 5322 max length
     role = Column(String(50), default="REQ-PARTICIPANT")  # CHAIR, REQ-PARTICIPANT, OPT-PARTICIPANT
-    status = Column(Enum(AttendeeStatus), default=AttendeeStatus.NEEDS_ACTION)
+    status = Column(SmallIntEnum(AttendeeStatus, ATTENDEE_STATUS_CODES), default=AttendeeStatus.NEEDS_ACTION)
     
     # RSVP and delegation
     rsvp_required = Column(Boolean, default=True)
@@ -167,8 +434,8 @@ class Attendee(Base):
     delegated_from = Column(String(320))
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     event = relationship("Event", back_populates="attendees")
@@ -186,7 +453,7 @@ class Reminder(Base):
     __tablename__ = "reminders"
     
     id = Column(Integer, primary_key=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     
     # Reminder configuration
     minutes_before = Column(Integer, nullable=False)  # Minutes before event
@@ -198,11 +465,29 @@ class Reminder(Base):
     triggered_at = Column(DateTime)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     event = relationship("Event", back_populates="reminders")
     
+    # Polled by the reminder scheduler; holds only reminders yet to fire
+    __table_args__ = (
+        Index("idx_reminder_pending", "event_id", "minutes_before", sqlite_where=is_triggered == False),
+    )
+    
+    @classmethod
+    def pending_clause(cls) -> ColumnElement:
+        """
+        Build the WHERE clause selecting reminders that have not fired.
+        
+        Matches the idx_reminder_pending partial index. The due time
+        depends on the event start, so join Event to narrow it down.
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return cls.is_triggered == False
+    
     def __repr__(self) -> str:
         return f"<Reminder(event_id={self.event_id}, minutes_before={self.minutes_before})>" 
\ No newline at end of file
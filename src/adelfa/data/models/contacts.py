@@ -5,17 +5,38 @@ Defines SQLAlchemy models for contacts, groups, addresses,
 phone numbers, and other contact information.
 """
 
-from datetime import datetime, date
+from datetime import date
 from typing import Optional, List
+import hashlib
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Text, Boolean, 
-    ForeignKey, Enum, JSON, UniqueConstraint, Index
+    ForeignKey, JSON, LargeBinary, UniqueConstraint, Index, func, select
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import lazyload, load_only, relationship, selectinload
+from sqlalchemy import event
+from sqlalchemy.sql import Select
 import enum
 
-Base = declarative_base()
+from .base import Base, BulkInsertMixin
+from .types import SmallIntEnum
+
+
+# Name parts in display order; display_name is derived from them unless set
+NAME_PARTS = ("name_prefix", "first_name", "middle_name", "last_name", "name_suffix")
+
+# Address parts that formatted_address is derived from
+ADDRESS_PARTS = ("street", "city", "state", "postal_code", "country")
+
+
+def join_name(name_prefix=None, first_name=None, middle_name=None, last_name=None, name_suffix=None) -> str:
+    """Join the non-empty name parts with spaces."""
+    return " ".join(filter(None, (name_prefix, first_name, middle_name, last_name, name_suffix)))
+
+
+def _format_address(street=None, city=None, state=None, postal_code=None, country=None) -> str:
+    """Format address parts as street, "city, state, postal code" and country lines."""
+    city_line = ", ".join(filter(None, (city, state, postal_code)))
+    return "\n".join(filter(None, (street, city_line, country)))
 
 
 class PhoneType(enum.Enum):
@@ -28,6 +49,17 @@ class PhoneType(enum.Enum):
     OTHER = "other"
 
 
+# Codes stored for each member by SmallIntEnum columns; never reuse or renumber one
+PHONE_TYPE_CODES = {
+    PhoneType.HOME: 0,
+    PhoneType.WORK: 1,
+    PhoneType.MOBILE: 2,
+    PhoneType.FAX: 3,
+    PhoneType.PAGER: 4,
+    PhoneType.OTHER: 5,
+}
+
+
 class EmailType(enum.Enum):
     """Enumeration for email address types."""
     HOME = "home"
@@ -35,6 +67,13 @@ class EmailType(enum.Enum):
     OTHER = "other"
 
 
+EMAIL_TYPE_CODES = {
+    EmailType.HOME: 0,
+    EmailType.WORK: 1,
+    EmailType.OTHER: 2,
+}
+
+
 class AddressType(enum.Enum):
     """Enumeration for address types."""
     HOME = "home"
@@ -42,6 +81,13 @@ class AddressType(enum.Enum):
     OTHER = "other"
 
 
+ADDRESS_TYPE_CODES = {
+    AddressType.HOME: 0,
+    AddressType.WORK: 1,
+    AddressType.OTHER: 2,
+}
+
+
 class ContactGroup(Base):
     """
     Contact group entity for organizing contacts.
@@ -62,14 +108,14 @@ class ContactGroup(Base):
     sync_token = Column(String(512))  # ETag or sync token
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     def __repr__(self) -> str:
         return f"<ContactGroup(id={self.id}, name='{self.name}')>"
 
 
-class Contact(Base):
+class Contact(BulkInsertMixin, Base):
     """
     Contact entity representing a person or organization.
     
@@ -85,7 +131,7 @@ class Contact(Base):
     middle_name = Column(String(255))
     name_prefix = Column(String(50))     # Mr., Mrs., Dr., etc.
     name_suffix = Column(String(50))     # Jr., Sr., III, etc.
-    display_name = Column(String(512))   # Formatted full name
+    display_name = Column(String(512))   # Formatted full name, derived from the name parts unless set
     nickname = Column(String(255))
     
     # Organization information
@@ -102,9 +148,9 @@ class Contact(Base):
     notes = Column(Text)
     categories = Column(JSON)  # List of category strings
     
-    # Photo/avatar
+    # Photo/avatar; the image itself lives in ContactPhoto
     photo_url = Column(String(512))
-    photo_data = Column(Text)  # Base64 encoded image data
+    photo_etag = Column(String(64))  # SHA-1 of the photo bytes, None without a photo
     
     # Server synchronization
     server_id = Column(String(255))  # UID from vCard
@@ -113,22 +159,98 @@ class Contact(Base):
     server_url = Column(String(512))  # CardDAV server URL
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relationships
-    emails = relationship("ContactEmail", back_populates="contact", cascade="all, delete-orphan")
-    phones = relationship("ContactPhone", back_populates="contact", cascade="all, delete-orphan")
-    addresses = relationship("ContactAddress", back_populates="contact", cascade="all, delete-orphan")
-    group_memberships = relationship("ContactGroupMembership", back_populates="contact", cascade="all, delete-orphan")
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships; the collections shown with every contact are loaded
+    # for all contacts of a query in one SELECT each (pass lazyload() to opt out)
+    emails = relationship("ContactEmail", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True,
+                          lazy="selectin")
+    phones = relationship("ContactPhone", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True,
+                          lazy="selectin")
+    addresses = relationship("ContactAddress", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True,
+                             lazy="selectin")
+    group_memberships = relationship("ContactGroupMembership", back_populates="contact", cascade="all, delete-orphan", passive_deletes=True)
+    photo = relationship("ContactPhoto", uselist=False, back_populates="contact", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes for performance
     __table_args__ = (
         Index("idx_contact_name", "last_name", "first_name"),
         Index("idx_contact_company", "company"),
-        Index("idx_contact_server_id", "server_id"),
+        # Sync key for bulk_upsert(); also serves lookups by server ID
+        Index("uq_contact_server", "server_id", "server_url", unique=True,
+              sqlite_where=server_id.is_not(None)),
     )
     
+    # Identifies a synced contact, see bulk_upsert()
+    SYNC_KEY = ("server_id", "server_url")
+    
+    # Columns shown in contact lists; the name parts back get_full_name()
+    # for contacts without a display name
+    LIST_COLUMNS = ("id", "display_name", "company", "photo_etag") + NAME_PARTS
+    
+    @classmethod
+    def list_options(cls) -> tuple:
+        """
+        Get loader options for contact lists.
+        
+        Loads only LIST_COLUMNS and the email and phone fields a list row
+        shows, and skips addresses.
+        
+        Returns:
+            tuple: Options for Query.options()
+        """
+        return (
+            load_only(*(getattr(cls, name) for name in cls.LIST_COLUMNS)),
+            selectinload(cls.emails).load_only(ContactEmail.email, ContactEmail.email_type, ContactEmail.is_primary),
+            selectinload(cls.phones).load_only(ContactPhone.number, ContactPhone.phone_type, ContactPhone.is_primary),
+            lazyload(cls.addresses),
+        )
+    
+    @classmethod
+    def picker_query(cls) -> Select:
+        """
+        Build a query for contact pickers and address completion.
+        
+        Yields plain (id, display_name, company, email) rows, with the
+        primary email, or failing that the first one. Rows are not turned
+        into Contact objects, so thousands of contacts can be listed
+        cheaply; load a Contact by id once one is picked.
+        
+        Returns:
+            Select: Query yielding one row per contact, ordered by name
+        """
+        email = (
+            select(ContactEmail.email)
+            .where(ContactEmail.contact_id == cls.id)
+            .order_by(ContactEmail.is_primary.desc(), ContactEmail.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        return (
+            select(cls.id, cls.display_name, cls.company, email.label("email"))
+            .order_by(cls.display_name)
+        )
+    
+    def set_photo(self, data: Optional[bytes], mime_type: Optional[str] = None):
+        """
+        Set or remove the contact photo.
+        
+        Args:
+            data: Raw image bytes, or None to remove the photo
+            mime_type: Image MIME type
+        """
+        if data is None:
+            self.photo = None
+            self.photo_etag = None
+            return
+        
+        if self.photo is None:
+            self.photo = ContactPhoto()
+        self.photo.data = data
+        self.photo.mime_type = mime_type
+        self.photo_etag = hashlib.sha1(data).hexdigest()
+    
     def get_full_name(self) -> str:
         """
         Get the formatted full name of the contact.
@@ -139,24 +261,34 @@ class Contact(Base):
         if self.display_name:
             return self.display_name
         
-        parts = []
-        if self.name_prefix:
-            parts.append(self.name_prefix)
-        if self.first_name:
-            parts.append(self.first_name)
-        if self.middle_name:
-            parts.append(self.middle_name)
-        if self.last_name:
-            parts.append(self.last_name)
-        if self.name_suffix:
-            parts.append(self.name_suffix)
-        
-        return " ".join(parts) if parts else "Unknown"
+        # Rows written by bulk_insert() skip the derivation
+        return join_name(**{part: getattr(self, part) for part in NAME_PARTS}) or "Unknown"
     
     def __repr__(self) -> str:
         return f"<Contact(id={self.id}, name='{self.get_full_name()}')>"
 
 
+class ContactPhoto(Base):
+    """
+    Contact photo entity.
+    
+    Holds the raw image bytes in a table of their own, so contact queries
+    do not read them; a contact's photo is loaded only when accessed.
+    """
+    __tablename__ = "contact_photos"
+    
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # Raw image bytes, not base64
+    mime_type = Column(String(100))
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    contact = relationship("Contact", back_populates="photo")
+    
+    def __repr__(self) -> str:
+        return f"<ContactPhoto(contact_id={self.contact_id}, size={len(self.data or b'')})>"
+
+
 class ContactEmail(Base):
     """
     Contact email address entity.
@@ -166,20 +298,25 @@ class ContactEmail(Base):
     __tablename__ = "contact_emails"
     
     id = Column(Integer, primary_key=True)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=False)
     
     email = Column(String(320), nullable=False)  # RFC 5322 max length
-    email_type = Column(Enum(EmailType), default=EmailType.HOME)
+    email_type = Column(SmallIntEnum(EmailType, EMAIL_TYPE_CODES), default=EmailType.HOME)
     is_primary = Column(Boolean, default=False)
     label = Column(String(100))  # Custom label
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     contact = relationship("Contact", back_populates="emails")
     
+    # Serves loading a contact's emails and picking the primary one
+    __table_args__ = (
+        Index("idx_contact_email_contact", "contact_id", "is_primary", "email"),
+    )
+    
     def __repr__(self) -> str:
         return f"<ContactEmail(email='{self.email}', type='{self.email_type.value}')>"
 
@@ -193,16 +330,16 @@ class ContactPhone(Base):
     __tablename__ = "contact_phones"
     
     id = Column(Integer, primary_key=True)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=False)
     
     number = Column(String(50), nullable=False)
-    phone_type = Column(Enum(PhoneType), default=PhoneType.HOME)
+    phone_type = Column(SmallIntEnum(PhoneType, PHONE_TYPE_CODES), default=PhoneType.HOME)
     is_primary = Column(Boolean, default=False)
     label = Column(String(100))  # Custom label
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     contact = relationship("Contact", back_populates="phones")
@@ -220,7 +357,7 @@ class ContactAddress(Base):
     __tablename__ = "contact_addresses"
     
     id = Column(Integer, primary_key=True)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=False)
     
     # Address components
     street = Column(String(512))
@@ -229,13 +366,14 @@ class ContactAddress(Base):
     postal_code = Column(String(50))
     country = Column(String(255))
     
-    address_type = Column(Enum(AddressType), default=AddressType.HOME)
+    address_type = Column(SmallIntEnum(AddressType, ADDRESS_TYPE_CODES), default=AddressType.HOME)
     is_primary = Column(Boolean, default=False)
     label = Column(String(100))  # Custom label
+    formatted_address = Column(Text)  # Kept in sync with the address parts
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     contact = relationship("Contact", back_populates="addresses")
@@ -247,29 +385,34 @@ class ContactAddress(Base):
         Returns:
             str: Formatted address.
         """
-        parts = []
-        if self.street:
-            parts.append(self.street)
-        
-        city_line = []
-        if self.city:
-            city_line.append(self.city)
-        if self.state:
-            city_line.append(self.state)
-        if self.postal_code:
-            city_line.append(self.postal_code)
-        if city_line:
-            parts.append(", ".join(city_line))
-        
-        if self.country:
-            parts.append(self.country)
-        
-        return "\n".join(parts)
+        return self.formatted_address or ""
     
     def __repr__(self) -> str:
         return f"<ContactAddress(city='{self.city}', type='{self.address_type.value}')>"
 
 
+def _update_display_name(contact: Contact, value, oldvalue, initiator):
+    """Re-derive display_name when a name part changes, unless it was set explicitly."""
+    parts = {part: getattr(contact, part) for part in NAME_PARTS}
+    if contact.display_name and contact.display_name != join_name(**parts):
+        return
+    parts[initiator.key] = value
+    contact.display_name = join_name(**parts) or None
+
+
+def _update_formatted_address(address: ContactAddress, value, oldvalue, initiator):
+    """Reformat the stored address when one of its parts changes."""
+    parts = {part: getattr(address, part) for part in ADDRESS_PARTS}
+    parts[initiator.key] = value
+    address.formatted_address = _format_address(**parts)
+
+
+for _part in NAME_PARTS:
+    event.listen(getattr(Contact, _part), "set", _update_display_name)
+for _part in ADDRESS_PARTS:
+    event.listen(getattr(ContactAddress, _part), "set", _update_formatted_address)
+
+
 class ContactGroupMembership(Base):
     """
     Contact group membership entity.
@@ -279,11 +422,11 @@ class ContactGroupMembership(Base):
     __tablename__ = "contact_group_memberships"
     
     id = Column(Integer, primary_key=True)
-    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
-    group_id = Column(Integer, ForeignKey("contact_groups.id"), nullable=False)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), nullable=False)
+    group_id = Column(Integer, ForeignKey("contact_groups.id", ondelete="CASCADE"), nullable=False)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
     
     # Relationships
     contact = relationship("Contact", back_populates="group_memberships")
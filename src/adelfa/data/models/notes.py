@@ -8,12 +8,24 @@ from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, DateTime, Text, Boolean, 
-    ForeignKey, JSON, Index, UniqueConstraint
+    ForeignKey, JSON, Index, UniqueConstraint, Table, DDL, select, func, text, true
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, lazyload, load_only, relationship, object_session
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy import event
 
-Base = declarative_base()
+from .base import Base, BulkInsertMixin
+
+
+# Many-to-many link between notes and tags. The primary key serves lookups
+# by note; the reverse index serves filtering notes by tag.
+note_tag_link = Table(
+    "note_tag_link",
+    Base.metadata,
+    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("note_tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("idx_note_tag_link_tag", "tag_id", "note_id"),
+)
 
 
 class Notebook(Base):
@@ -32,7 +44,7 @@ class Notebook(Base):
     is_visible = Column(Boolean, default=True)
     
     # Organization
-    parent_notebook_id = Column(Integer, ForeignKey("notebooks.id"))
+    parent_notebook_id = Column(Integer, ForeignKey("notebooks.id", ondelete="CASCADE"))
     sort_order = Column(Integer, default=0)
     
     # Server synchronization fields (for future cloud sync)
@@ -42,13 +54,13 @@ class Notebook(Base):
     sync_token = Column(String(512))
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    notes = relationship("Note", back_populates="notebook", cascade="all, delete-orphan")
-    child_notebooks = relationship("Notebook", remote_side=[id], cascade="all, delete-orphan")
-    parent_notebook = relationship("Notebook", remote_side=[parent_notebook_id])
+    notes = relationship("Note", back_populates="notebook", cascade="all, delete-orphan", passive_deletes=True)
+    child_notebooks = relationship("Notebook", back_populates="parent_notebook", cascade="all, delete-orphan", passive_deletes=True)
+    parent_notebook = relationship("Notebook", remote_side=[id], back_populates="child_notebooks")
     
     def __repr__(self) -> str:
         return f"<Notebook(id={self.id}, name='{self.name}')>"
@@ -63,15 +75,14 @@ class Note(Base):
     __tablename__ = "notes"
     
     id = Column(Integer, primary_key=True)
-    notebook_id = Column(Integer, ForeignKey("notebooks.id"), nullable=False)
+    notebook_id = Column(Integer, ForeignKey("notebooks.id", ondelete="CASCADE"), nullable=False)
     
-    # Basic note information
+    # Basic note information; the text itself lives in NoteContent
     title = Column(String(512), nullable=False)
-    content = Column(Text)  # Rich text content (HTML)
-    plain_text_content = Column(Text)  # Plain text for searching
+    word_count = Column(Integer, default=0)  # Kept in sync with plain_text_content
+    char_count = Column(Integer, default=0)  # Kept in sync with plain_text_content
     
     # Organization and metadata
-    tags = Column(JSON)  # List of tag strings
     is_pinned = Column(Boolean, default=False)
     is_favorite = Column(Boolean, default=False)
     is_archived = Column(Boolean, default=False)
@@ -91,7 +102,7 @@ class Note(Base):
     
     # Version control (for tracking changes)
     version = Column(Integer, default=1)
-    previous_version_id = Column(Integer, ForeignKey("notes.id"))
+    previous_version_id = Column(Integer, ForeignKey("notes.id", ondelete="SET NULL"))
     
     # Server synchronization
     server_id = Column(String(255))
@@ -99,26 +110,121 @@ class Note(Base):
     last_modified = Column(DateTime)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    accessed_at = Column(DateTime, default=datetime.utcnow)  # Last viewed
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    accessed_at = Column(DateTime, default=func.now())  # Last viewed
     
     # Relationships
     notebook = relationship("Notebook", back_populates="notes")
-    attachments = relationship("NoteAttachment", back_populates="note", cascade="all, delete-orphan")
+    attachments = relationship("NoteAttachment", back_populates="note", cascade="all, delete-orphan", passive_deletes=True,
+                               lazy="selectin")  # Metadata only; one SELECT per query
     version_history = relationship("Note", remote_side=[id])
+    tags = relationship("NoteTag", secondary=note_tag_link, back_populates="notes",
+                        lazy="selectin")
+    body = relationship("NoteContent", uselist=False, back_populates="note", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes for performance
     __table_args__ = (
         Index("idx_note_notebook_title", "notebook_id", "title"),
-        Index("idx_note_tags", "tags"),
-        Index("idx_note_pinned", "is_pinned"),
+        # Partial indexes: pinned notes are listed per notebook, newest
+        # first, and only synced notes carry a server ID
+        Index("idx_note_pinned_live", "notebook_id", "updated_at",
+              sqlite_where=(is_pinned == True) & (is_deleted == False)),
         Index("idx_note_created", "created_at"),
         Index("idx_note_updated", "updated_at"),
-        Index("idx_note_server_id", "server_id"),
-        # Full-text search index on content (database-specific)
+        Index("idx_note_server_id", "server_id", sqlite_where=server_id.is_not(None)),
+        # Polled by the reminder scheduler; holds only notes with a reminder
+        Index("idx_note_reminder_pending", "reminder_date",
+              sqlite_where=(has_reminder == True) & reminder_date.is_not(None)),
+        # Full-text search uses the notes_fts table, see NoteContent
     )
     
+    # Columns shown in note lists; the body stays unloaded
+    LIST_COLUMNS = (
+        "id", "notebook_id", "title", "is_pinned", "is_favorite", "updated_at", "word_count"
+    )
+    
+    @classmethod
+    def list_options(cls) -> tuple:
+        """
+        Get loader options for note lists.
+        
+        Loads only LIST_COLUMNS and the tags; the body and attachments are
+        loaded when a note is opened.
+        
+        Returns:
+            tuple: Options for Query.options()
+        """
+        return (
+            load_only(*(getattr(cls, name) for name in cls.LIST_COLUMNS)),
+            lazyload(cls.attachments),
+        )
+    
+    @property
+    def content(self) -> Optional[str]:
+        """Rich text content (HTML)."""
+        return self.body.content if self.body else None
+    
+    @content.setter
+    def content(self, value: Optional[str]):
+        self._ensure_body().content = value
+    
+    @property
+    def plain_text_content(self) -> Optional[str]:
+        """Plain text content, used for searching and counting."""
+        return self.body.plain_text if self.body else None
+    
+    @plain_text_content.setter
+    def plain_text_content(self, value: Optional[str]):
+        self._ensure_body().plain_text = value
+        self.word_count = len(value.split()) if value else 0
+        self.char_count = len(value) if value else 0
+    
+    def _ensure_body(self) -> "NoteContent":
+        """Get the note body, creating it for new notes."""
+        if self.body is None:
+            self.body = NoteContent()
+        return self.body
+    
+    @classmethod
+    def due_reminder_clause(cls, now: datetime) -> ColumnElement:
+        """
+        Build the WHERE clause selecting notes whose reminder is due.
+        
+        Matches the idx_note_reminder_pending partial index.
+        
+        Args:
+            now: Time to compare reminder dates against
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return (cls.has_reminder == True) & (cls.reminder_date <= now)
+    
+    @classmethod
+    def search_clause(cls, terms: str) -> ColumnElement:
+        """
+        Build the WHERE clause selecting notes that match search terms.
+        
+        Titles and plain text are searched through the notes_fts index.
+        Every word must occur, as a word or a word prefix; blank terms
+        match every note.
+        
+        Args:
+            terms: Words to search for.
+            
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        if not terms.split():
+            return true()
+        
+        # Quote each word so FTS5 operators in user input are taken literally
+        match = " ".join('"{}"*'.format(word.replace('"', '""')) for word in terms.split())
+        return cls.id.in_(
+            text("SELECT rowid FROM notes_fts WHERE notes_fts MATCH :match").bindparams(match=match)
+        )
+    
     def get_word_count(self) -> int:
         """
         Get the word count of the note content.
@@ -126,9 +232,7 @@ class Note(Base):
         Returns:
             int: Number of words in the note.
         """
-        if not self.plain_text_content:
-            return 0
-        return len(self.plain_text_content.split())
+        return self.word_count or 0
     
     def get_character_count(self) -> int:
         """
@@ -137,21 +241,68 @@ class Note(Base):
         Returns:
             int: Number of characters in the note.
         """
-        if not self.plain_text_content:
-            return 0
-        return len(self.plain_text_content)
+        return self.char_count or 0
+    
+    @classmethod
+    def pinned_clause(cls) -> ColumnElement:
+        """
+        Build the WHERE clause selecting pinned notes that are not deleted.
+        
+        Matches the predicate of the idx_note_pinned_live partial index.
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return (cls.is_pinned == True) & (cls.is_deleted == False)
+    
+    @property
+    def tag_names(self) -> List[str]:
+        """Names of the tags on this note."""
+        return [tag.name for tag in self.tags]
+    
+    @classmethod
+    def with_tag(cls, tag: str) -> Select:
+        """
+        Build a query for notes carrying a tag.
+        
+        Args:
+            tag: Tag name to filter by.
+            
+        Returns:
+            Select: Query selecting the matching notes.
+        """
+        return (
+            select(cls)
+            .join(note_tag_link, note_tag_link.c.note_id == cls.id)
+            .join(NoteTag, NoteTag.id == note_tag_link.c.tag_id)
+            .where(NoteTag.name == tag)
+        )
     
     def add_tag(self, tag: str) -> None:
         """
         Add a tag to the note.
         
+        The existing NoteTag row is reused when the note belongs to a
+        session. Otherwise a new one is created, and it is swapped for the
+        stored tag of the same name when the note is flushed.
+        
         Args:
             tag: Tag to add.
         """
-        if not self.tags:
-            self.tags = []
-        if tag not in self.tags:
-            self.tags.append(tag)
+        if tag in self.tag_names:
+            return
+        
+        session = object_session(self)
+        note_tag = None
+        if session is not None:
+            with session.no_autoflush:
+                note_tag = session.scalars(select(NoteTag).where(NoteTag.name == tag)).first()
+        if note_tag is None:
+            note_tag = NoteTag(name=tag, usage_count=0)
+        
+        note_tag.usage_count = (note_tag.usage_count or 0) + 1
+        note_tag.last_used = datetime.utcnow()
+        self.tags.append(note_tag)
     
     def remove_tag(self, tag: str) -> None:
         """
@@ -160,14 +311,61 @@ class Note(Base):
         Args:
             tag: Tag to remove.
         """
-        if self.tags and tag in self.tags:
-            self.tags.remove(tag)
+        for note_tag in self.tags:
+            if note_tag.name == tag:
+                self.tags.remove(note_tag)
+                note_tag.usage_count = max((note_tag.usage_count or 0) - 1, 0)
+                break
     
     def __repr__(self) -> str:
         return f"<Note(id={self.id}, title='{self.title}')>"
 
 
-class NoteAttachment(Base):
+class NoteContent(Base):
+    """
+    Note body entity holding the text of a note.
+    
+    Kept out of the notes table so note lists never read note text; use
+    Note.content and Note.plain_text_content to access it.
+    """
+    __tablename__ = "note_contents"
+    
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(Text)  # Rich text content (HTML)
+    plain_text = Column(Text)  # Plain text for searching
+    
+    # Relationships
+    note = relationship("Note", back_populates="body")
+    
+    def __repr__(self) -> str:
+        return f"<NoteContent(note_id={self.note_id})>"
+
+
+# Full-text index over note titles and plain text, keyed by note ID and
+# maintained by triggers on both tables
+NOTE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(title, plain_text)",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_note_insert AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts (rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_note_title AFTER UPDATE OF title ON notes BEGIN "
+    "UPDATE notes_fts SET title = new.title WHERE rowid = new.id; END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_note_delete AFTER DELETE ON notes BEGIN "
+    "DELETE FROM notes_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_content_insert AFTER INSERT ON note_contents BEGIN "
+    "UPDATE notes_fts SET plain_text = new.plain_text WHERE rowid = new.note_id; END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_content_update AFTER UPDATE OF plain_text ON note_contents BEGIN "
+    "UPDATE notes_fts SET plain_text = new.plain_text WHERE rowid = new.note_id; END",
+    "CREATE TRIGGER IF NOT EXISTS notes_fts_content_delete AFTER DELETE ON note_contents BEGIN "
+    "UPDATE notes_fts SET plain_text = NULL WHERE rowid = old.note_id; END",
+)
+
+for _statement in NOTE_SEARCH_DDL:
+    event.listen(NoteContent.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(NoteContent.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"))
+
+
+class NoteAttachment(BulkInsertMixin, Base):
     """
     Note attachment entity for files attached to notes.
     
@@ -176,7 +374,7 @@ class NoteAttachment(Base):
     __tablename__ = "note_attachments"
     
     id = Column(Integer, primary_key=True)
-    note_id = Column(Integer, ForeignKey("notes.id"), nullable=False)
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
     
     # File information
     filename = Column(String(512), nullable=False)
@@ -199,12 +397,21 @@ class NoteAttachment(Base):
     etag = Column(String(255))
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     note = relationship("Note", back_populates="attachments")
     
+    # Sync key for bulk_upsert(); also serves lookups by server ID
+    __table_args__ = (
+        Index("uq_note_attachment_server", "server_id", "note_id", unique=True,
+              sqlite_where=server_id.is_not(None)),
+    )
+    
+    # Identifies a synced attachment, see bulk_upsert()
+    SYNC_KEY = ("server_id", "note_id")
+    
     def __repr__(self) -> str:
         return f"<NoteAttachment(id={self.id}, filename='{self.filename}')>"
 
@@ -227,8 +434,37 @@ class NoteTag(Base):
     last_used = Column(DateTime)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    notes = relationship("Note", secondary=note_tag_link, back_populates="tags")
     
     def __repr__(self) -> str:
-        return f"<NoteTag(name='{self.name}', usage_count={self.usage_count})>" 
\ No newline at end of file
+        return f"<NoteTag(name='{self.name}', usage_count={self.usage_count})>"
+
+
+@event.listens_for(Session, "before_flush")
+def _merge_new_note_tags(session: Session, flush_context, instances):
+    """Replace new NoteTag objects with the stored or pending tag of the same name."""
+    new_tags = [obj for obj in session.new if isinstance(obj, NoteTag)]
+    if not new_tags:
+        return
+    
+    with session.no_autoflush:
+        kept = {
+            tag.name: tag
+            for tag in session.scalars(select(NoteTag).where(NoteTag.name.in_({t.name for t in new_tags})))
+        }
+    for tag in new_tags:
+        existing = kept.setdefault(tag.name, tag)
+        if existing is tag:
+            continue
+        
+        existing.usage_count = (existing.usage_count or 0) + (tag.usage_count or 0)
+        existing.last_used = tag.last_used or existing.last_used
+        for note in list(tag.notes):
+            note.tags.remove(tag)
+            if existing not in note.tags:
+                note.tags.append(existing)
+        session.expunge(tag)
@@ -4,17 +4,19 @@ Tasks data models for Adelfa PIM suite.
 Defines SQLAlchemy models for tasks, task lists, and task management.
 """
 
-from datetime import datetime, date
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy import (
     Column, Integer, String, DateTime, Date, Text, Boolean, 
-    ForeignKey, Enum, JSON, Index, Float
+    ForeignKey, JSON, Index, Float, bindparam, func, inspect, select
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship, selectinload
+from sqlalchemy.sql import ColumnElement
 import enum
+import warnings
 
-Base = declarative_base()
+from .base import Base, BulkInsertMixin
+from .types import SmallIntEnum
 
 
 class TaskPriority(enum.Enum):
@@ -25,6 +27,15 @@ class TaskPriority(enum.Enum):
     URGENT = "urgent"
 
 
+# Codes stored for each member by SmallIntEnum columns; never reuse or renumber one
+TASK_PRIORITY_CODES = {
+    TaskPriority.LOW: 0,
+    TaskPriority.NORMAL: 1,
+    TaskPriority.HIGH: 2,
+    TaskPriority.URGENT: 3,
+}
+
+
 class TaskStatus(enum.Enum):
     """Enumeration for task status."""
     NOT_STARTED = "not_started"
@@ -35,6 +46,20 @@ class TaskStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+TASK_STATUS_CODES = {
+    TaskStatus.NOT_STARTED: 0,
+    TaskStatus.IN_PROGRESS: 1,
+    TaskStatus.COMPLETED: 2,
+    TaskStatus.WAITING: 3,
+    TaskStatus.DEFERRED: 4,
+    TaskStatus.CANCELLED: 5,
+}
+
+
+# Statuses of tasks that can no longer become overdue
+CLOSED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+
 class TaskList(Base):
     """
     Task list entity for organizing tasks.
@@ -57,17 +82,17 @@ class TaskList(Base):
     sync_token = Column(String(512))  # ETag or sync token
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    tasks = relationship("Task", back_populates="task_list", cascade="all, delete-orphan")
+    tasks = relationship("Task", back_populates="task_list", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self) -> str:
         return f"<TaskList(id={self.id}, name='{self.name}')>"
 
 
-class Task(Base):
+class Task(BulkInsertMixin, Base):
     """
     Task entity representing a to-do item.
     
@@ -76,7 +101,7 @@ class Task(Base):
     __tablename__ = "tasks"
     
     id = Column(Integer, primary_key=True)
-    task_list_id = Column(Integer, ForeignKey("task_lists.id"), nullable=False)
+    task_list_id = Column(Integer, ForeignKey("task_lists.id", ondelete="CASCADE"), nullable=False)
     
     # Basic task information
     title = Column(String(512), nullable=False)
@@ -88,8 +113,8 @@ class Task(Base):
     completed_date = Column(Date)
     
     # Task properties
-    priority = Column(Enum(TaskPriority), default=TaskPriority.NORMAL)
-    status = Column(Enum(TaskStatus), default=TaskStatus.NOT_STARTED)
+    priority = Column(SmallIntEnum(TaskPriority, TASK_PRIORITY_CODES), default=TaskPriority.NORMAL)
+    status = Column(SmallIntEnum(TaskStatus, TASK_STATUS_CODES), default=TaskStatus.NOT_STARTED)
     percent_complete = Column(Integer, default=0)  # 0-100
     
     # Organization
@@ -97,7 +122,7 @@ class Task(Base):
     tags = Column(JSON)        # List of tag strings
     
     # Relationships
-    parent_task_id = Column(Integer, ForeignKey("tasks.id"))
+    parent_task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"))
     
     # Reminders
     has_reminder = Column(Boolean, default=False)
@@ -113,51 +138,167 @@ class Task(Base):
     last_modified = Column(DateTime)
     
     # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     task_list = relationship("TaskList", back_populates="tasks")
-    subtasks = relationship("Task", remote_side=[id], cascade="all, delete-orphan")
-    parent_task = relationship("Task", remote_side=[parent_task_id])
+    subtasks = relationship("Task", back_populates="parent_task", cascade="all, delete-orphan", passive_deletes=True)
+    parent_task = relationship("Task", remote_side=[id], back_populates="subtasks")
     
     # Indexes for performance
     __table_args__ = (
         Index("idx_task_list_status", "task_list_id", "status"),
-        Index("idx_task_due_date", "due_date"),
+        # Partial index: only open tasks are looked up by due date
+        Index("idx_task_due_date_open", "due_date", sqlite_where=status.not_in(CLOSED_STATUSES)),
         Index("idx_task_priority", "priority"),
-        Index("idx_task_server_id", "server_id"),
+        # Sync key for bulk_upsert(); also serves lookups by server ID
+        Index("uq_task_server", "server_id", "task_list_id", unique=True,
+              sqlite_where=server_id.is_not(None)),
+        # Polled by the reminder scheduler; holds only tasks with a reminder
+        Index("idx_task_reminder_pending", "reminder_date",
+              sqlite_where=(has_reminder == True) & reminder_date.is_not(None)),
     )
     
-    def is_overdue(self) -> bool:
+    # Identifies a synced task, see bulk_upsert()
+    SYNC_KEY = ("server_id", "task_list_id")
+    
+    def is_overdue(self, today: Optional[date] = None) -> bool:
         """
         Check if the task is overdue.
         
+        Args:
+            today: Date to compare the due date against, defaults to today
+        
         Returns:
             bool: True if task is overdue, False otherwise.
         """
-        if not self.due_date or self.status == TaskStatus.COMPLETED:
+        if not self.due_date or self.status in CLOSED_STATUSES:
             return False
-        return self.due_date < date.today()
+        return self.due_date < (today or date.today())
     
-    def get_completion_percentage(self) -> int:
+    @classmethod
+    def overdue_mask(cls, tasks: Iterable["Task"], today: Optional[date] = None) -> List[bool]:
+        """
+        Check many tasks for being overdue against a single date.
+        
+        Task lists call this instead of is_overdue() per row, so the
+        current date is read once per list rather than once per task.
+        To count overdue tasks, query with overdue_clause() instead.
+        
+        Args:
+            tasks: Tasks to check
+            today: Date to compare due dates against, defaults to today
+        
+        Returns:
+            List[bool]: Overdue flag per task, in the order given
+        """
+        today = today or date.today()
+        return [task.is_overdue(today) for task in tasks]
+    
+    @classmethod
+    def overdue_clause(cls, today: Optional[date] = None) -> ColumnElement:
+        """
+        Build the WHERE clause selecting overdue tasks.
+        
+        The closed statuses are rendered inline so SQLite can match the
+        clause against the idx_task_due_date_open partial index.
+        
+        Args:
+            today: Date to compare due dates against, defaults to today
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        closed = bindparam("closed_statuses", list(CLOSED_STATUSES), expanding=True,
+                           literal_execute=True, type_=cls.status.type)
+        return cls.status.not_in(closed) & (cls.due_date < (today or date.today()))
+    
+    @classmethod
+    def due_reminder_clause(cls, now: datetime) -> ColumnElement:
+        """
+        Build the WHERE clause selecting tasks whose reminder is due.
+        
+        Matches the idx_task_reminder_pending partial index.
+        
+        Args:
+            now: Time to compare reminder dates against
+        
+        Returns:
+            ColumnElement: Filter for Query.filter() or Select.where()
+        """
+        return (cls.has_reminder == True) & (cls.reminder_date <= now)
+    
+    @classmethod
+    def completion_map(cls, session: Session, task_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        Count completed and total subtasks for many tasks in one query.
+        
+        Args:
+            session: Database session
+            task_ids: IDs of the parent tasks
+        
+        Returns:
+            Dict[int, Tuple[int, int]]: (completed, total) subtask counts per
+            task ID; tasks without subtasks are absent
+        """
+        rows = session.execute(
+            select(
+                cls.parent_task_id,
+                func.count().filter(cls.status == TaskStatus.COMPLETED),
+                func.count()
+            ).where(cls.parent_task_id.in_(list(task_ids))).group_by(cls.parent_task_id)
+        )
+        return {parent_id: (completed, total) for parent_id, completed, total in rows}
+    
+    @classmethod
+    def list_options(cls) -> tuple:
+        """
+        Get loader options for task lists that show completion bars.
+        
+        Subtask statuses for all listed tasks arrive in one extra SELECT
+        instead of one per task.
+        
+        Returns:
+            tuple: Options for Query.options()
+        """
+        return (selectinload(cls.subtasks).load_only(cls.status),)
+    
+    def get_completion_percentage(self, subtask_counts: Optional[Tuple[int, int]] = None) -> int:
         """
         Get the completion percentage, considering subtasks.
         
+        When rendering many tasks, pass counts from completion_map() (with
+        (0, 0) for tasks missing from it), or load the tasks with
+        Task.list_options(); otherwise each call loads its subtasks separately.
+        
+        Args:
+            subtask_counts: (completed, total) subtask counts, if already known
+        
         Returns:
             int: Completion percentage (0-100).
         """
         if self.status == TaskStatus.COMPLETED:
             return 100
         
-        if not self.subtasks:
+        if subtask_counts is None:
+            state = inspect(self)
+            if state.session is not None and 'subtasks' in state.unloaded:
+                warnings.warn(
+                    "Task.subtasks loaded per task; use Task.completion_map() or Task.list_options()",
+                    RuntimeWarning, stacklevel=2
+                )
+            subtask_counts = (
+                sum(1 for subtask in self.subtasks if subtask.status == TaskStatus.COMPLETED),
+                len(self.subtasks)
+            )
+        
+        completed_subtasks, total_subtasks = subtask_counts
+        if not total_subtasks:
             return self.percent_complete
         
         # Calculate based on subtask completion
-        total_subtasks = len(self.subtasks)
-        completed_subtasks = sum(1 for subtask in self.subtasks if subtask.status == TaskStatus.COMPLETED)
-        
-        return int((completed_subtasks / total_subtasks) * 100) if total_subtasks > 0 else 0
+        return int((completed_subtasks / total_subtasks) * 100)
     
     def __repr__(self) -> str:
         return f"<Task(id={self.id}, title='{self.title}', status='{self.status.value}')>" 
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Custom column types for Adelfa PIM suite models.
+"""
+
+import enum
+from typing import Mapping, Optional, Type
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class SmallIntEnum(TypeDecorator):
+    """
+    Enum column stored as a small integer.
+
+    Each member is stored as the code given for it in ``codes``, so
+    members can be reordered or inserted without remapping stored rows;
+    a code must never be reused for another member. Unlike the generic
+    Enum type, rows hold a 2-byte integer instead of the member name, and
+    loading is a dict lookup. Member names written by the previous
+    VARCHAR storage are still read back.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: Type[enum.Enum], codes: Mapping[enum.Enum, int], *args, **kwargs):
+        """
+        Initialize the column type.
+
+        Args:
+            enum_class: Enum class stored in the column
+            codes: Stored code of every member of enum_class
+
+        Raises:
+            ValueError: If a member has no code or two members share one
+        """
+        super().__init__(*args, **kwargs)
+        if set(codes) != set(enum_class) or len(set(codes.values())) != len(codes):
+            raise ValueError(f"{enum_class.__name__} needs one distinct code per member")
+        self.enum_class = enum_class
+        self._codes = dict(codes)
+        self._members = {code: member for member, code in self._codes.items()}
+
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        """Convert an enum member (or member name) to its integer code."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = self.enum_class[value]
+        return self._codes[value]
+
+    def process_result_value(self, value, dialect) -> Optional[enum.Enum]:
+        """Convert a stored integer code back to its enum member."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Rows written while the column was a VARCHAR enum
+            if not value.isdigit():
+                return self.enum_class[value]
+            value = int(value)
+        return self._members[value]
+
+    def copy(self, **kwargs):
+        """Copy the type, keeping its enum class."""
+        return SmallIntEnum(self.enum_class, self._codes)
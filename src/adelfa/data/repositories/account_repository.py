@@ -5,17 +5,76 @@ Handles database operations for email, calendar, and contact accounts
 with secure credential management integration.
 """
 
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session, load_only, raiseload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import or_, bindparam, case, desc, exists, insert, inspect, select
 
 from ...utils.logging_setup import get_logger
 from ...core.email.credential_manager import get_credential_manager, CredentialStorageError
-from ..models.accounts import Account, AccountProvider, AccountConnectionTest, AccountType
+from ..models.accounts import Account, AccountConnectionTest, AccountType
 
 logger = get_logger(__name__)
 
+# Columns needed to list accounts; other attributes load on first access
+_SUMMARY_COLUMNS = (
+    Account.id, Account.name, Account.email_address, Account.display_name,
+    Account.is_enabled, Account.is_default
+)
+
+# Hot lookups are built once; only the bound values change per call, so
+# each execution reuses the cached compiled statement
+_ACCOUNT_BY_EMAIL = select(Account).where(
+    Account.email_address == bindparam("email_address")
+).limit(1)
+_DEFAULT_ACCOUNT = select(Account).where(
+    Account.is_default == True,
+    Account.is_enabled == True
+).limit(1)
+
+# Fields update_account() never writes, and fields stored in the keyring
+_PROTECTED_FIELDS = ("id", "created_at", "updated_at")
+_CREDENTIAL_FIELDS = frozenset({
+    "incoming_password", "outgoing_password", "caldav_password", "carddav_password", "oauth_tokens"
+})
+_COLUMN_FIELDS = frozenset(inspect(Account).column_attrs.keys())
+
+# Columns holding an account's keyring keys
+_CREDENTIAL_KEY_COLUMNS = (
+    Account.incoming_password_key, Account.outgoing_password_key, Account.caldav_password_key,
+    Account.carddav_password_key, Account.oauth2_token_key
+)
+
+# Password fields accepted by create/update, the columns holding their
+# keyring keys, and the password type the credential manager stores
+_PASSWORD_FIELDS = (
+    ("incoming_password", "incoming_password_key", "incoming"),
+    ("outgoing_password", "outgoing_password_key", "outgoing"),
+    ("caldav_password", "caldav_password_key", "caldav"),
+    ("carddav_password", "carddav_password_key", "carddav"),
+)
+
+
+def _run_concurrently(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Future]:
+    """
+    Run independent credential manager calls in parallel threads.
+    
+    Every keyring access is its own IPC round-trip to the secret service,
+    so an account's credentials are handled in about the time of one.
+    
+    Args:
+        calls: Zero-argument callables by name
+    
+    Returns:
+        Dict[str, Future]: Completed future per name
+    """
+    if not calls:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        return {name: executor.submit(call) for name, call in calls.items()}
+
 
 class AccountRepository:
     """
@@ -25,21 +84,37 @@ class AccountRepository:
     and connection test result tracking.
     """
     
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, strict_loading: bool = False):
         """
         Initialize the account repository.
         
         Args:
             session: SQLAlchemy session instance
+            strict_loading: If True, accounts returned by the list and
+                default lookups raise on any relationship the query did
+                not load, instead of lazily loading it. Meant for tests
+                and debugging to catch per-account queries.
         """
         self.session = session
+        self.strict_loading = strict_loading
+        self._account_ids_by_email: Dict[str, int] = {}
         self.credential_manager = get_credential_manager()
         self.logger = logger
     
+    def _loader_options(self, *options) -> tuple:
+        """Add raiseload('*') to a query's loader options in strict loading mode."""
+        if self.strict_loading:
+            return options + (raiseload("*"),)
+        return options
+    
     def create_account(self, account_data: Dict[str, Any]) -> Optional[Account]:
         """
         Create a new account with secure credential storage.
         
+        The account row is committed before its credentials are stored.
+        If the keyring fails, the account is kept with connection_status
+        "error" and the failure in last_error.
+        
         Args:
             account_data: Dictionary containing account information
         
@@ -82,65 +157,104 @@ class AccountRepository:
                 provider_id=account_data.get("provider_id")
             )
             
-            # Add to session and flush to get ID
+            # Commit the row first, so the SQLite write lock is not held
+            # across the keyring round-trips below
             self.session.add(account)
-            self.session.flush()
-            
-            # Store credentials securely
-            self._store_account_credentials(account, account_data)
-            
-            # Commit the transaction
             self.session.commit()
             
-            self.logger.info(f"Created account: {account.name} ({account.email_address})")
-            return account
-            
         except Exception as e:
             self.session.rollback()
             self.logger.error(f"Failed to create account: {e}")
             return None
+        
+        try:
+            # Store credentials securely
+            self._store_account_credentials(account, account_data)
+        except Exception as e:
+            # Keep the account and surface the failure like a failed connection
+            self.logger.error(f"Failed to store credentials for account {account.id}: {e}")
+            account.connection_status = "error"
+            account.last_error = f"Failed to store credentials: {e}"
+        
+        try:
+            # Short second transaction writing the keyring keys
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            self.logger.error(f"Failed to save credential keys for account {account.id}: {e}")
+        
+        self.logger.info(f"Created account: {account.name} ({account.email_address})")
+        return account
     
-    def _store_account_credentials(self, account: Account, account_data: Dict[str, Any]) -> None:
-        """Store account credentials securely."""
+    def create_accounts_bulk(self, accounts_data: List[Dict[str, Any]]) -> int:
+        """
+        Create many accounts at once, e.g. when importing a configuration.
+        
+        Accounts without passwords or OAuth tokens are inserted with one
+        batched INSERT instead of one flushed Account object each. Accounts
+        that carry credentials go through create_account() so their
+        secrets reach the keyring.
+        
+        Args:
+            accounts_data: Dictionaries of account information
+        
+        Returns:
+            int: Number of accounts created
+        """
+        rows = []
+        with_credentials = []
+        for account_data in accounts_data:
+            if _CREDENTIAL_FIELDS & account_data.keys():
+                with_credentials.append(account_data)
+            elif "name" not in account_data or "email_address" not in account_data:
+                self.logger.error(f"Skipping account without name or email address: {account_data}")
+            else:
+                rows.append({
+                    field: value for field, value in account_data.items()
+                    if field in _COLUMN_FIELDS and field not in _PROTECTED_FIELDS
+                })
+        
         try:
-            # Store incoming mail password
-            if "incoming_password" in account_data:
-                key = self.credential_manager.store_password(
-                    account.id, "incoming", account_data["incoming_password"]
-                )
-                account.incoming_password_key = key
-            
-            # Store outgoing mail password
-            if "outgoing_password" in account_data:
-                key = self.credential_manager.store_password(
-                    account.id, "outgoing", account_data["outgoing_password"]
-                )
-                account.outgoing_password_key = key
-            
-            # Store CalDAV password
-            if "caldav_password" in account_data:
-                key = self.credential_manager.store_password(
-                    account.id, "caldav", account_data["caldav_password"]
-                )
-                account.caldav_password_key = key
-            
-            # Store CardDAV password
-            if "carddav_password" in account_data:
-                key = self.credential_manager.store_password(
-                    account.id, "carddav", account_data["carddav_password"]
-                )
-                account.carddav_password_key = key
+            Account.bulk_insert(self.session, rows)
+            self.session.commit()
             
-            # Store OAuth tokens
-            if "oauth_tokens" in account_data:
-                key = self.credential_manager.store_oauth_tokens(
-                    account.id, account_data["oauth_tokens"]
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            self.logger.error(f"Failed to create accounts: {e}")
+            rows = []
+        
+        created = len(rows) + sum(
+            self.create_account(account_data) is not None for account_data in with_credentials
+        )
+        self.logger.info(f"Created {created} of {len(accounts_data)} accounts")
+        return created
+    
+    def _store_account_credentials(self, account: Account, account_data: Dict[str, Any]) -> None:
+        """Store account credentials securely."""
+        calls = {}
+        for password_field, key_field, password_type in _PASSWORD_FIELDS:
+            if password_field in account_data:
+                calls[key_field] = partial(
+                    self.credential_manager.store_password,
+                    account.id, password_type, account_data[password_field]
                 )
-                account.oauth2_token_key = key
-                
-        except CredentialStorageError as e:
-            self.logger.error(f"Failed to store credentials for account {account.id}: {e}")
-            raise
+        if "oauth_tokens" in account_data:
+            calls["oauth2_token_key"] = partial(
+                self.credential_manager.store_oauth_tokens, account.id, account_data["oauth_tokens"]
+            )
+        
+        # Keep the keys of every credential that was stored, even when
+        # another one failed, so no secret is left in the keyring unreferenced
+        errors = []
+        for key_field, future in _run_concurrently(calls).items():
+            try:
+                setattr(account, key_field, future.result())
+            except Exception as e:
+                self.logger.error(f"Failed to store {key_field} credential for account {account.id}: {e}")
+                errors.append(e)
+        
+        if errors:
+            raise errors[0]
     
     def get_account(self, account_id: int) -> Optional[Account]:
         """
@@ -153,7 +267,8 @@ class AccountRepository:
             Account: Account instance, or None if not found
         """
         try:
-            return self.session.query(Account).filter(Account.id == account_id).first()
+            # Served from the identity map without a SELECT when loaded
+            return self.session.get(Account, account_id)
         except SQLAlchemyError as e:
             self.logger.error(f"Failed to get account {account_id}: {e}")
             return None
@@ -169,25 +284,42 @@ class AccountRepository:
             Account: Account instance, or None if not found
         """
         try:
-            return self.session.query(Account).filter(
-                Account.email_address == email_address
-            ).first()
+            # A remembered id resolves through the identity map; it is
+            # checked against the address in case the account changed
+            account_id = self._account_ids_by_email.get(email_address)
+            if account_id is not None:
+                account = self.session.get(Account, account_id)
+                if account is not None and account.email_address == email_address:
+                    return account
+            
+            account = self.session.execute(
+                _ACCOUNT_BY_EMAIL, {"email_address": email_address}
+            ).scalar_one_or_none()
+            if account is not None:
+                self._account_ids_by_email[email_address] = account.id
+            return account
         except SQLAlchemyError as e:
             self.logger.error(f"Failed to get account by email {email_address}: {e}")
             return None
     
-    def get_all_accounts(self, enabled_only: bool = False) -> List[Account]:
+    def get_all_accounts(self, enabled_only: bool = False, summary: bool = False) -> List[Account]:
         """
         Get all accounts.
         
         Args:
             enabled_only: If True, return only enabled accounts
+            summary: If True, load only the columns needed to list accounts
         
         Returns:
             List[Account]: List of account instances
         """
         try:
-            query = self.session.query(Account)
+            if summary:
+                options = self._loader_options(load_only(*_SUMMARY_COLUMNS))
+            else:
+                # One SELECT for the providers of all listed accounts
+                options = self._loader_options(selectinload(Account.provider))
+            query = self.session.query(Account).options(*options)
             
             if enabled_only:
                 query = query.filter(Account.is_enabled == True)
@@ -209,7 +341,9 @@ class AccountRepository:
             List[Account]: List of matching accounts
         """
         try:
-            return self.session.query(Account).filter(
+            return self.session.query(Account).options(
+                *self._loader_options(selectinload(Account.provider))
+            ).filter(
                 Account.account_type == account_type,
                 Account.is_enabled == True
             ).order_by(Account.name).all()
@@ -226,15 +360,31 @@ class AccountRepository:
             Account: Default account, or None if not set
         """
         try:
-            return self.session.query(Account).filter(
-                Account.is_default == True,
-                Account.is_enabled == True
-            ).first()
+            stmt = _DEFAULT_ACCOUNT.options(*self._loader_options())
+            return self.session.execute(stmt).scalar_one_or_none()
             
         except SQLAlchemyError as e:
             self.logger.error(f"Failed to get default account: {e}")
             return None
     
+    def has_default_account(self) -> bool:
+        """
+        Check whether an enabled default account is set.
+        
+        Answered from idx_account_default without loading the account.
+        
+        Returns:
+            bool: True if a default account is set, False otherwise
+        """
+        try:
+            return self.session.query(
+                exists().where(Account.is_default == True, Account.is_enabled == True)
+            ).scalar()
+            
+        except SQLAlchemyError as e:
+            self.logger.error(f"Failed to check for default account: {e}")
+            return False
+    
     def set_default_account(self, account_id: int) -> bool:
         """
         Set an account as the default.
@@ -246,20 +396,19 @@ class AccountRepository:
             bool: True if successful, False otherwise
         """
         try:
-            # Clear existing default
-            self.session.query(Account).filter(
-                Account.is_default == True
-            ).update({"is_default": False})
+            found = self.session.query(Account.id).filter(Account.id == account_id).scalar()
+            if found is None:
+                return False
             
-            # Set new default
-            account = self.get_account(account_id)
-            if account:
-                account.is_default = True
-                self.session.commit()
-                self.logger.info(f"Set default account: {account.name}")
-                return True
+            # Move the default flag in one statement, touching only the
+            # current default and the new one
+            self.session.query(Account).filter(
+                or_(Account.is_default == True, Account.id == account_id)
+            ).update({"is_default": case((Account.id == account_id, True), else_=False)})
+            self.session.commit()
             
-            return False
+            self.logger.info(f"Set default account: {account_id}")
+            return True
             
         except SQLAlchemyError as e:
             self.session.rollback()
@@ -278,15 +427,22 @@ class AccountRepository:
             bool: True if successful, False otherwise
         """
         try:
+            fields = {field: value for field, value in updates.items() if field not in _PROTECTED_FIELDS}
+            if fields and fields.keys() <= _COLUMN_FIELDS and not _CREDENTIAL_FIELDS & updates.keys():
+                # Plain column changes go straight to one UPDATE
+                rows = self.session.query(Account).filter(Account.id == account_id).update(fields)
+                self.session.commit()
+                if rows:
+                    self.logger.info(f"Updated account: {account_id}")
+                return rows > 0
+            
             account = self.get_account(account_id)
             if not account:
                 return False
             
             # Update account fields
-            for field, value in updates.items():
-                if hasattr(account, field) and field not in [
-                    "id", "created_at", "updated_at"
-                ]:
+            for field, value in fields.items():
+                if hasattr(account, field):
                     setattr(account, field, value)
             
             # Handle credential updates
@@ -303,14 +459,7 @@ class AccountRepository:
     
     def _update_account_credentials(self, account: Account, updates: Dict[str, Any]) -> None:
         """Update account credentials."""
-        credential_fields = {
-            "incoming_password": "incoming_password_key",
-            "outgoing_password": "outgoing_password_key",
-            "caldav_password": "caldav_password_key",
-            "carddav_password": "carddav_password_key"
-        }
-        
-        for password_field, key_field in credential_fields.items():
+        for password_field, key_field, password_type in _PASSWORD_FIELDS:
             if password_field in updates:
                 current_key = getattr(account, key_field)
                 new_password = updates[password_field]
@@ -322,7 +471,6 @@ class AccountRepository:
                         self.logger.warning(f"Failed to update {password_field} for account {account.id}")
                 else:
                     # Store new credential
-                    password_type = password_field.replace("_password", "")
                     key = self.credential_manager.store_password(
                         account.id, password_type, new_password
                     )
@@ -358,23 +506,22 @@ class AccountRepository:
             bool: True if successful, False otherwise
         """
         try:
-            account = self.get_account(account_id)
-            if not account:
+            # Only the keyring keys are needed, not the whole account
+            row = self.session.query(
+                Account.name, Account.email_address, *_CREDENTIAL_KEY_COLUMNS
+            ).filter(Account.id == account_id).first()
+            if not row:
                 return False
             
             # Delete stored credentials
-            self._delete_account_credentials(account)
-            
-            # Delete connection test results
-            self.session.query(AccountConnectionTest).filter(
-                AccountConnectionTest.account_id == account_id
-            ).delete()
+            self._delete_account_credentials(row[2:])
             
-            # Delete the account
-            self.session.delete(account)
+            # Delete the account; connection tests and cached folders and
+            # messages go with it (ON DELETE CASCADE)
+            self.session.query(Account).filter(Account.id == account_id).delete()
             self.session.commit()
             
-            self.logger.info(f"Deleted account: {account.name} ({account.email_address})")
+            self.logger.info(f"Deleted account: {row.name} ({row.email_address})")
             return True
             
         except Exception as e:
@@ -382,22 +529,14 @@ class AccountRepository:
             self.logger.error(f"Failed to delete account {account_id}: {e}")
             return False
     
-    def _delete_account_credentials(self, account: Account) -> None:
-        """Delete all credentials for an account."""
-        credential_keys = [
-            account.incoming_password_key,
-            account.outgoing_password_key,
-            account.caldav_password_key,
-            account.carddav_password_key,
-            account.oauth2_token_key
-        ]
-        
-        for key in credential_keys:
-            if key:
-                try:
-                    self.credential_manager.delete_password(key)
-                except Exception as e:
-                    self.logger.warning(f"Failed to delete credential {key}: {e}")
+    def _delete_account_credentials(self, credential_keys: Iterable[Optional[str]]) -> None:
+        """Delete an account's credentials given its keyring keys."""
+        calls = {key: partial(self.credential_manager.delete_password, key) for key in credential_keys if key}
+        for key, future in _run_concurrently(calls).items():
+            try:
+                future.result()
+            except Exception as e:
+                self.logger.warning(f"Failed to delete credential {key}: {e}")
     
     def get_account_credentials(self, account: Account, credential_type: str) -> Optional[str]:
         """
@@ -423,6 +562,33 @@ class AccountRepository:
             self.logger.error(f"Failed to get {credential_type} credentials for account {account.id}: {e}")
             return None
     
+    def get_all_credentials(self, account: Account) -> Dict[str, Optional[str]]:
+        """
+        Get all stored passwords for an account with concurrent keyring reads.
+        
+        Args:
+            account: Account instance
+        
+        Returns:
+            Dict[str, Optional[str]]: Password per credential type (incoming,
+                outgoing, caldav, carddav), None where none is stored
+        """
+        credentials: Dict[str, Optional[str]] = {}
+        calls = {}
+        for _, key_field, credential_type in _PASSWORD_FIELDS:
+            credentials[credential_type] = None
+            credential_key = getattr(account, key_field)
+            if credential_key:
+                calls[credential_type] = partial(self.credential_manager.retrieve_password, credential_key)
+        
+        for credential_type, future in _run_concurrently(calls).items():
+            try:
+                credentials[credential_type] = future.result()
+            except Exception as e:
+                self.logger.error(f"Failed to get {credential_type} credentials for account {account.id}: {e}")
+        
+        return credentials
+    
     def get_account_oauth_tokens(self, account: Account) -> Optional[Dict[str, Any]]:
         """
         Get OAuth tokens for an account.
@@ -458,29 +624,58 @@ class AccountRepository:
         Returns:
             bool: True if recorded successfully, False otherwise
         """
+        return self.record_connection_tests(account_id, [{
+            "test_type": test_type,
+            "success": success,
+            "error_message": error_message,
+            "response_time_ms": response_time_ms
+        }])
+    
+    def record_connection_tests(self, account_id: int, results: List[Dict[str, Any]]) -> bool:
+        """
+        Record several connection test results for an account at once.
+        
+        All results are written by one executemany INSERT, and the account
+        status is updated in the same commit: "error" with the message of
+        the last failure if any test failed, "connected" otherwise.
+        
+        Args:
+            account_id: Account ID
+            results: Dictionaries with the record_connection_test() arguments
+                test_type, success, error_message and response_time_ms
+        
+        Returns:
+            bool: True if recorded successfully, False otherwise
+        """
+        if not results:
+            return True
+        
         try:
-            test_result = AccountConnectionTest(
-                account_id=account_id,
-                test_type=test_type,
-                test_result="success" if success else "failure",
-                error_message=error_message,
-                response_time_ms=response_time_ms
-            )
-            
-            self.session.add(test_result)
-            self.session.commit()
-            
-            # Update account connection status
+            # Core insert on the table: the ORM bulk path would split rows
+            # by which values are None and run them one by one
+            self.session.execute(insert(AccountConnectionTest.__table__), [
+                {
+                    "account_id": account_id,
+                    "test_type": result["test_type"],
+                    "test_result": "success" if result["success"] else "failure",
+                    "error_message": result.get("error_message"),
+                    "response_time_ms": result.get("response_time_ms")
+                }
+                for result in results
+            ])
+            
+            # Update account connection status in the same commit
             account = self.get_account(account_id)
             if account:
-                if success:
+                failures = [result for result in results if not result["success"]]
+                if failures:
+                    account.connection_status = "error"
+                    account.last_error = failures[-1].get("error_message")
+                else:
                     account.connection_status = "connected"
                     account.last_error = None
-                else:
-                    account.connection_status = "error"
-                    account.last_error = error_message
-                self.session.commit()
             
+            self.session.commit()
             return True
             
         except Exception as e:
@@ -510,7 +705,9 @@ class AccountRepository:
             if test_type:
                 query = query.filter(AccountConnectionTest.test_type == test_type)
             
-            return query.order_by(desc(AccountConnectionTest.tested_at)).limit(limit).all()
+            return query.order_by(
+                desc(AccountConnectionTest.tested_at), desc(AccountConnectionTest.id)
+            ).limit(limit).all()
             
         except SQLAlchemyError as e:
             self.logger.error(f"Failed to get connection test history: {e}")
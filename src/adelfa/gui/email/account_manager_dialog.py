@@ -922,7 +922,7 @@ class AccountManagerDialog(QDialog):
         self.account_list.clear()
         
         try:
-            accounts = self.account_manager.get_all_accounts(enabled_only=False)
+            accounts = self.account_manager.get_all_accounts(enabled_only=False, summary=True)
             
             for account in accounts:
                 item = QListWidgetItem()
@@ -49,6 +49,8 @@ class DetectionWorker(QThread):
                 success=False,
                 error_message=str(e)
             ))
+        finally:
+            self.detector.close()
 
 
 class ConnectionTestWorker(QThread):
@@ -72,6 +74,8 @@ class ConnectionTestWorker(QThread):
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
             self.test_completed.emit(False, str(e))
+        finally:
+            self.detector.close()
 
 
 class AccountSetupWizard(QWizard):
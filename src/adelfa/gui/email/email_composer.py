@@ -153,6 +153,7 @@ class EmailComposer(QDialog):
     """
     
     email_sent = pyqtSignal(bool)  # success
+    send_finished = pyqtSignal(bool, str)  # success, error message (from sender thread)
     
     def __init__(self, email_manager: EmailManager, accounts: List[Account], 
                  reply_to_message=None, parent=None):
@@ -387,6 +388,9 @@ class EmailComposer(QDialog):
         self.auto_save_timer = QTimer()
         self.auto_save_timer.timeout.connect(self.auto_save_draft)
         self.auto_save_timer.start(120000)  # 2 minutes
+        
+        # Background send results are delivered on the UI thread
+        self.send_finished.connect(self.on_send_finished)
     
     def setup_reply(self):
         """Setup the composer for replying to a message."""
@@ -495,6 +499,7 @@ class EmailComposer(QDialog):
     
     def send_email(self):
         """Send the email."""
+        sending = False
         try:
             # Validate required fields
             if not self.subject_edit.text().strip():
@@ -542,18 +547,10 @@ class EmailComposer(QDialog):
                 request_receipt=self.request_receipt_check.isChecked()
             )
             
-            # Send email
-            success = self.email_manager.send_email(email, account.id)
-            
-            if success:
-                self.status_bar.showMessage(_("email.composer.errors.sent_successfully"))
-                QMessageBox.information(self, _("email.composer.errors.success"), _("email.composer.errors.sent_successfully"))
-                self.email_sent.emit(True)
-                self.accept()
-            else:
-                self.status_bar.showMessage(_("email.composer.errors.send_failed"))
-                QMessageBox.warning(self, _("email.composer.errors.error"), _("email.composer.errors.send_failed"))
-                self.email_sent.emit(False)
+            # Send email in the background so the window stays responsive
+            future = self.email_manager.send_email_async(email, account.id)
+            future.add_done_callback(self._report_send_result)
+            sending = True
             
         except ValueError as e:
             QMessageBox.warning(self, _("email.composer.errors.validation_error"), str(e))
@@ -561,8 +558,35 @@ class EmailComposer(QDialog):
             QMessageBox.critical(self, _("email.composer.errors.error"), _("email.composer.errors.send_error").format(error=str(e)))
             self.email_sent.emit(False)
         finally:
-            self.send_button.setEnabled(True)
-            self.send_button.setText(_("email.composer.send_button"))
+            if not sending:
+                self.send_button.setEnabled(True)
+                self.send_button.setText(_("email.composer.send_button"))
+    
+    def _report_send_result(self, future):
+        """Forward a finished background send to the UI thread."""
+        try:
+            self.send_finished.emit(future.result(), "")
+        except Exception as e:
+            self.send_finished.emit(False, str(e))
+    
+    @pyqtSlot(bool, str)
+    def on_send_finished(self, success: bool, error: str):
+        """Handle the result of a background send."""
+        self.send_button.setEnabled(True)
+        self.send_button.setText(_("email.composer.send_button"))
+        
+        if success:
+            self.status_bar.showMessage(_("email.composer.errors.sent_successfully"))
+            QMessageBox.information(self, _("email.composer.errors.success"), _("email.composer.errors.sent_successfully"))
+            self.email_sent.emit(True)
+            self.accept()
+        elif error:
+            QMessageBox.critical(self, _("email.composer.errors.error"), _("email.composer.errors.send_error").format(error=error))
+            self.email_sent.emit(False)
+        else:
+            self.status_bar.showMessage(_("email.composer.errors.send_failed"))
+            QMessageBox.warning(self, _("email.composer.errors.error"), _("email.composer.errors.send_failed"))
+            self.email_sent.emit(False)
     
     def save_draft(self):
         """Save email as draft."""
@@ -1759,7 +1759,7 @@ class MessagePreviewWidget(QWebEngineView):
             import os
             
             attachment = self.current_message.attachments[attachment_index]
-            filename = attachment.get('filename', f'attachment_{attachment_index}')
+            filename = attachment.filename or f'attachment_{attachment_index}'
             
             # Ask user where to save the file
             save_path, _ = QFileDialog.getSaveFileName(
@@ -1796,14 +1796,13 @@ class MessagePreviewWidget(QWebEngineView):
             )
     
     def _get_attachment_content(self, attachment_index: int) -> Optional[bytes]:
-        """Get attachment content from the email (placeholder implementation)."""
-        # This would need to be implemented in the email manager
-        # to retrieve the actual attachment content from the IMAP server
+        """Fetch attachment content from the server on demand."""
         try:
-            if self.current_message and hasattr(self.current_message, 'get_attachment_content'):
-                return self.current_message.get_attachment_content(attachment_index)
-        except Exception:
-            pass
+            if self.current_message:
+                return self.current_message.attachments[attachment_index].load()
+        except Exception as e:
+            import logging
+            logging.getLogger(__name__).error(f"Failed to load attachment: {e}")
         return None
     
     def _build_attachments_html(self, attachments) -> str:
@@ -1815,9 +1814,9 @@ class MessagePreviewWidget(QWebEngineView):
         html_parts.append('<ul style="margin-left: 20px;">')
         
         for i, attachment in enumerate(attachments):
-            file_size = self._format_attachment_size(attachment.get('size', 0))
-            filename = attachment.get('filename', f'attachment_{i}')
-            content_type = attachment.get('content_type', 'application/octet-stream')
+            file_size = self._format_attachment_size(attachment.size or 0)
+            filename = attachment.filename or f'attachment_{i}'
+            content_type = attachment.content_type or 'application/octet-stream'
             
             # Determine if we can preview this attachment type
             is_previewable = self._is_previewable_type(content_type)
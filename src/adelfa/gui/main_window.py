@@ -816,7 +816,7 @@ class AdelfahMainWindow(QMainWindow):
     def _load_accounts(self):
         """Load saved email accounts."""
         try:
-            accounts = self.account_manager.get_all_accounts()
+            accounts = self.account_manager.get_all_accounts(summary=True)
             if accounts:
                 self.logger.info(f"Loaded {len(accounts)} email accounts")
             else:
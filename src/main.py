@@ -24,7 +24,10 @@ from PyQt6.QtGui import QIcon
 # Database imports
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from adelfa.data.models.accounts import Base
+from adelfa.data.models import Base, enable_foreign_keys
+from adelfa.data.migrations.cache_flags import drop_legacy_flag_rows
+from adelfa.data.migrations.enum_storage import upgrade_enum_columns
+from adelfa.data.migrations.schema import add_missing_columns, rebuild_foreign_keys, sync_indexes
 
 
 def setup_application(config: AppConfig) -> QApplication:
@@ -99,10 +102,20 @@ def setup_database() -> sessionmaker:
         logger.info(f"Using database at: {db_path}")
         
         # Create database engine
-        engine = create_engine(f"sqlite:///{db_path}", echo=False)
+        # Sync imports insert in batches; send them as multi-row VALUES
+        engine = create_engine(
+            f"sqlite:///{db_path}", echo=False, insertmanyvalues_page_size=1000
+        )
+        # Child rows are removed by ON DELETE CASCADE
+        enable_foreign_keys(engine)
         
         # Create all tables
         Base.metadata.create_all(engine)
+        add_missing_columns(engine, Base.metadata)
+        sync_indexes(engine, Base.metadata)
+        upgrade_enum_columns(engine, Base.metadata)
+        drop_legacy_flag_rows(engine)
+        rebuild_foreign_keys(engine, Base.metadata)
         
         # Create session factory
         Session = sessionmaker(bind=engine)
@@ -0,0 +1,59 @@
+"""
+Shared fixtures for the unit tests.
+
+Model tests run against a fresh in-memory SQLite database with every
+table created and foreign keys enforced, as in the application.
+"""
+
+from typing import Any, List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.adelfa.data.models import Base, enable_foreign_keys
+
+
+class StatementRecorder:
+    """SQL statements, with their parameters, executed on an engine."""
+
+    def __init__(self, engine: Engine):
+        self.executed: List[Tuple[str, Any]] = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.executed.append((statement, parameters))
+
+    @property
+    def statements(self) -> List[str]:
+        """SQL text of the executed statements."""
+        return [statement for statement, _ in self.executed]
+
+    def clear(self):
+        """Forget the statements recorded so far."""
+        self.executed.clear()
+
+
+@pytest.fixture
+def engine():
+    """In-memory database with all model tables and foreign keys on."""
+    engine = create_engine("sqlite://")
+    enable_foreign_keys(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    """Session bound to the test database."""
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def recorder(engine):
+    """Record statements executed from the point the fixture is requested."""
+    return StatementRecorder(engine)
@@ -9,13 +9,17 @@ import pytest
 import tempfile
 import os
 from unittest.mock import Mock, patch, MagicMock
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import InvalidRequestError
 
 from src.adelfa.core.email.protocol_detector import ProtocolDetector, DetectionResult, ServerSettings
-from src.adelfa.core.email.credential_manager import CredentialManager, CredentialStorageError
+from src.adelfa.core.email.credential_manager import (
+    CredentialManager, CredentialStorageError, get_credential_manager
+)
 from src.adelfa.data.repositories.account_repository import AccountRepository
-from src.adelfa.data.models.accounts import Base, Account, AccountType, EmailProtocol, SecurityType, AuthMethod
+from src.adelfa.data.models import CachedFolder
+from src.adelfa.data.models.accounts import (
+    Account, AccountConnectionTest, AccountProvider, AccountType, EmailProtocol, SecurityType, AuthMethod
+)
 
 
 class TestProtocolDetector:
@@ -23,6 +27,7 @@ class TestProtocolDetector:
     
     def setup_method(self):
         """Set up test fixtures."""
+        ProtocolDetector.clear_cache()
         self.detector = ProtocolDetector()
     
     def test_gmail_detection(self):
@@ -57,6 +62,39 @@ class TestProtocolDetector:
         assert imap_settings.server == "outlook.office365.com"
         assert imap_settings.port == 993
     
+    def test_provider_lookup_ignores_case(self):
+        """Test that known provider domains match case-insensitively."""
+        result = self.detector.detect_settings("First.Last@iCloud.COM")
+
+        assert result.success
+        assert result.provider_name == "iCloud"
+
+    def test_provider_configs_are_read_only(self):
+        """Test that shared provider settings cannot be modified."""
+        import dataclasses
+
+        with pytest.raises(TypeError):
+            ProtocolDetector.PROVIDER_CONFIGS["example.com"] = {}
+
+        settings = ProtocolDetector.PROVIDER_CONFIGS["gmail.com"]["imap"]
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            settings.port = 143
+
+    def test_detect_settings_many_deduplicates_domains(self):
+        """Test that batch detection runs once per distinct domain."""
+        generic = DetectionResult(success=True, caldav_url="https://example.com/dav")
+
+        with patch.object(self.detector, '_detect_generic_settings', return_value=generic) as mock_generic:
+            results = self.detector.detect_settings_many([
+                "a@example.com", "b@Example.com", "c@gmail.com", "broken"
+            ])
+
+        mock_generic.assert_called_once_with("example.com")
+        assert results["a@example.com"] is generic
+        assert results["b@Example.com"] is generic
+        assert results["c@gmail.com"].provider_name == "Gmail"
+        assert not results["broken"].success
+
     def test_unknown_provider_detection(self):
         """Test detection for unknown provider."""
         # Mock the generic detection methods to avoid actual network calls
@@ -75,6 +113,311 @@ class TestProtocolDetector:
         with pytest.raises(Exception):
             self.detector.detect_settings("invalid-email")
     
+    def test_parallel_probe_keeps_preference_order(self):
+        """Test that the most preferred working candidate wins."""
+        working = {("mail.example.com", 993), ("imap.example.com", 143)}
+
+        def probe(server, port, security):
+            return (server, port) in working
+
+        with patch.object(self.detector, '_lookup_srv', return_value=[]), \
+             patch.object(self.detector, '_resolves', return_value=True), \
+             patch.object(self.detector, '_test_imap_connection', side_effect=probe):
+            settings = self.detector._detect_imap_settings("example.com")
+
+        assert settings.server == "imap.example.com"
+        assert settings.port == 143
+        assert settings.security == SecurityType.STARTTLS
+
+    def test_parallel_probe_no_candidate(self):
+        """Test that detection returns None when every probe fails."""
+        with patch.object(self.detector, '_lookup_srv', return_value=[]), \
+             patch.object(self.detector, '_resolves', return_value=True), \
+             patch.object(self.detector, '_test_smtp_connection', return_value=False) as mock_probe:
+            assert self.detector._detect_smtp_settings("example.com") is None
+
+        assert mock_probe.call_count == 12
+
+    @patch('dns.resolver.resolve')
+    def test_srv_records_skip_probing(self, mock_resolve):
+        """Test that RFC 6186 SRV records are used without probing."""
+        def record(priority, weight, port, target):
+            return Mock(priority=priority, weight=weight, port=port,
+                        target=Mock(to_text=Mock(return_value=target)))
+
+        mock_resolve.return_value = [
+            record(20, 0, 993, "backup.example.net."),
+            record(10, 5, 993, "imap.example.net."),
+        ]
+
+        with patch.object(self.detector, '_test_imap_connection') as mock_probe:
+            settings = self.detector._detect_imap_settings("example.com")
+
+        mock_resolve.assert_called_once()
+        assert mock_resolve.call_args[0][:2] == ("_imaps._tcp.example.com", "SRV")
+        mock_probe.assert_not_called()
+        assert settings == ServerSettings("imap.example.net", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP)
+
+    @patch('dns.resolver.resolve')
+    def test_srv_missing_falls_back_to_probing(self, mock_resolve):
+        """Test that NXDOMAIN and "." targets fall through to probing."""
+        import dns.resolver
+        mock_resolve.side_effect = [
+            dns.resolver.NXDOMAIN(),
+            [Mock(priority=0, weight=0, port=0, target=Mock(to_text=Mock(return_value=".")))],
+        ]
+
+        with patch.object(self.detector, '_resolves', return_value=True), \
+             patch.object(self.detector, '_test_smtp_connection', return_value=False) as mock_probe:
+            assert self.detector._detect_smtp_settings("example.com") is None
+
+        assert mock_probe.call_count == 12
+
+    @patch('socket.getaddrinfo')
+    def test_unresolvable_hosts_are_not_probed(self, mock_getaddrinfo):
+        """Test that each candidate is resolved once and dropped if unknown."""
+        import socket
+
+        def getaddrinfo(host, port, **kwargs):
+            if host != "mail.example.com":
+                raise socket.gaierror("Name or service not known")
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.1', 0))]
+
+        mock_getaddrinfo.side_effect = getaddrinfo
+
+        with patch.object(self.detector, '_lookup_srv', return_value=[]), \
+             patch.object(self.detector, '_test_imap_connection', return_value=False) as mock_probe:
+            assert self.detector._detect_imap_settings("example.com") is None
+
+        assert mock_getaddrinfo.call_count == 4
+        assert {call[0][0] for call in mock_probe.call_args_list} == {"mail.example.com"}
+        assert mock_probe.call_count == 3
+
+    def test_successful_detection_is_cached(self):
+        """Test that a detected domain is not probed twice."""
+        with patch.object(self.detector, '_lookup_srv', return_value=[]), \
+             patch.object(self.detector, '_resolves', return_value=True), \
+             patch.object(self.detector, '_test_imap_connection', return_value=True) as mock_probe:
+            first = self.detector._detect_imap_settings("cached.example.com")
+            probes = mock_probe.call_count
+            second = ProtocolDetector()._detect_imap_settings("cached.example.com")
+
+        assert first == second
+        assert mock_probe.call_count == probes
+
+    @patch('src.adelfa.core.email.protocol_detector._ConnectedIMAP4_SSL')
+    @patch('src.adelfa.core.email.protocol_detector._happy_eyeballs_connect')
+    def test_failed_host_is_skipped(self, mock_connect, mock_imap):
+        """Test that recently unreachable endpoints are not retried."""
+        mock_imap.side_effect = OSError("unreachable")
+
+        assert not self.detector._test_imap_connection("dead.example.com", 993, SecurityType.TLS_SSL)
+        assert not self.detector._test_imap_connection("dead.example.com", 993, SecurityType.TLS_SSL)
+
+        assert mock_imap.call_count == 1
+        mock_connect.return_value.close.assert_called_once()
+
+    @patch('src.adelfa.core.email.protocol_detector._ConnectedSMTP_SSL')
+    @patch('src.adelfa.core.email.protocol_detector._happy_eyeballs_connect')
+    def test_unreachable_host_skips_handshake(self, mock_connect, mock_smtp):
+        """Test that a refused TCP connection never starts TLS."""
+        mock_connect.side_effect = ConnectionRefusedError()
+
+        assert not self.detector._test_smtp_connection("smtp.example.com", 465, SecurityType.TLS_SSL)
+
+        mock_connect.assert_called_once_with("smtp.example.com", 465, self.detector.connect_timeout)
+        mock_smtp.assert_not_called()
+
+    @patch('src.adelfa.core.email.protocol_detector._ConnectedIMAP4_SSL')
+    @patch('src.adelfa.core.email.protocol_detector._happy_eyeballs_connect')
+    def test_probe_only_swallows_network_errors(self, mock_connect, mock_imap):
+        """Test that protocol errors fail the probe but bugs propagate."""
+        import imaplib
+
+        mock_imap.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+        assert not self.detector._test_imap_connection("imap.example.com", 993, SecurityType.TLS_SSL)
+
+        mock_imap.side_effect = AttributeError("typo")
+        with pytest.raises(AttributeError):
+            self.detector._test_imap_connection("imap2.example.com", 993, SecurityType.TLS_SSL)
+
+    def test_probe_reuses_connected_socket(self):
+        """Test a plain IMAP probe over the pre-connected socket."""
+        import socket
+        import threading
+
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+
+        accepted = []
+
+        def serve_imap():
+            conn, _ = listener.accept()
+            accepted.append(conn)
+            with conn:
+                conn.sendall(b"* OK IMAP4rev1 ready\r\n")
+                while True:
+                    line = conn.recv(1024)
+                    if not line:
+                        break
+                    tag, command = line.split(b" ", 2)[:2]
+                    if command.upper().startswith(b"CAPABILITY"):
+                        conn.sendall(b"* CAPABILITY IMAP4rev1\r\n%s OK done\r\n" % tag)
+                    else:
+                        conn.sendall(b"* BYE\r\n%s OK bye\r\n" % tag)
+                        break
+
+        server = threading.Thread(target=serve_imap, daemon=True)
+        server.start()
+        try:
+            assert self.detector._test_imap_connection("127.0.0.1", port, SecurityType.NONE)
+        finally:
+            server.join(timeout=5)
+            listener.close()
+
+        assert len(accepted) == 1
+
+    def test_happy_eyeballs_interleaves_families(self):
+        """Test that address families alternate, resolver choice first."""
+        import socket
+        from src.adelfa.core.email.protocol_detector import _interleave_families
+
+        v6a = (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('2001:db8::1', 993, 0, 0))
+        v6b = (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('2001:db8::2', 993, 0, 0))
+        v4a = (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.1', 993))
+
+        assert _interleave_families([v6a, v6b, v4a]) == [v6a, v4a, v6b]
+
+    def test_dav_probes_share_http_session(self):
+        """Test that DAV probes go through the pooled session."""
+        with patch.object(self.detector, '_lookup_srv', return_value=[]), \
+             patch.object(self.detector._http, 'request', return_value=Mock(status_code=401)) as mock_request, \
+             patch('requests.get') as mock_requests_get:
+            caldav_url, carddav_url = self.detector._detect_dav_settings("example.com")
+
+        assert caldav_url == "https://example.com/.well-known/caldav"
+        assert carddav_url == "https://example.com/.well-known/carddav"
+        assert mock_request.called
+        mock_requests_get.assert_not_called()
+
+    def test_dav_probe_uses_propfind(self):
+        """Test that DAV probes send a depth 0 PROPFIND without following redirects."""
+        with patch.object(self.detector._http, 'request', return_value=Mock(status_code=405)) as mock_request:
+            assert not self.detector._test_url_accessibility("https://example.com/.well-known/caldav")
+
+        method, url = mock_request.call_args[0]
+        assert method == "PROPFIND"
+        assert mock_request.call_args[1]["headers"]["Depth"] == "0"
+        assert mock_request.call_args[1]["allow_redirects"] is False
+
+    def test_tls_probes_share_ssl_context(self):
+        """Test that HTTP and mail probes reuse shared SSL contexts."""
+        from src.adelfa.core.email import protocol_detector
+
+        adapter = self.detector._http.get_adapter("https://example.com")
+        assert adapter.poolmanager.connection_pool_kw["ssl_context"] is protocol_detector._HTTP_SSL_CTX
+        # HTTPS keeps verifying against requests' certifi bundle
+        assert protocol_detector._HTTP_SSL_CTX.get_ca_certs()
+
+        sock = Mock()
+        sock.gettimeout.return_value = 5
+        with patch('imaplib.IMAP4_SSL.open'), patch('imaplib.IMAP4._connect'):
+            conn = protocol_detector._ConnectedIMAP4_SSL(sock, "imap.example.com", 993)
+        assert conn.ssl_context is protocol_detector._SSL_CTX
+
+    def test_close_shuts_down_probe_pools(self):
+        """Test that closing a detector releases its threads and HTTP session."""
+        detector = ProtocolDetector()
+        with patch.object(detector._http, 'close') as close_session:
+            detector.close()
+        
+        assert detector._executor._shutdown
+        assert detector._phase_executor._shutdown
+        close_session.assert_called_once()
+    
+    def test_dav_probe_splits_connect_and_read_timeouts(self):
+        """Test that DAV probes bound connect and read separately."""
+        with patch.object(self.detector._http, 'request', return_value=Mock(status_code=207)) as mock_request:
+            assert self.detector._test_url_accessibility("https://example.com/.well-known/caldav")
+
+        assert mock_request.call_args[1]["timeout"] == (
+            self.detector.connect_timeout, self.detector.http_timeout
+        )
+
+    def test_generic_detection_runs_phases_concurrently(self):
+        """Test that IMAP, SMTP and DAV phases overlap."""
+        import threading
+        barrier = threading.Barrier(3, timeout=5)
+
+        def phase(result):
+            def run(domain):
+                barrier.wait()
+                return result
+            return run
+
+        imap = ServerSettings("imap.example.com", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP)
+        with patch.object(self.detector, '_detect_autoconfig', return_value=None), \
+             patch.object(self.detector, '_detect_imap_settings', side_effect=phase(imap)), \
+             patch.object(self.detector, '_detect_smtp_settings', side_effect=phase(None)), \
+             patch.object(self.detector, '_detect_dav_settings', side_effect=phase(("https://example.com/dav", None))):
+            result = self.detector._detect_generic_settings("example.com")
+
+        assert result.success
+        assert result.email_settings == {"imap": imap}
+        assert result.caldav_url == "https://example.com/dav"
+        assert result.carddav_url is None
+
+    def test_autoconfig_parsing(self):
+        """Test parsing of a Mozilla autoconfig document."""
+        document = b"""<?xml version="1.0"?>
+        <clientConfig version="1.1">
+          <emailProvider id="example.com">
+            <displayName>Example Mail</displayName>
+            <incomingServer type="pop3">
+              <hostname>pop.example.com</hostname><port>995</port><socketType>SSL</socketType>
+            </incomingServer>
+            <incomingServer type="imap">
+              <hostname>imap.%EMAILDOMAIN%</hostname><port>993</port><socketType>SSL</socketType>
+            </incomingServer>
+            <outgoingServer type="smtp">
+              <hostname>smtp.example.com</hostname><port>587</port><socketType>STARTTLS</socketType>
+            </outgoingServer>
+          </emailProvider>
+        </clientConfig>"""
+
+        result = self.detector._parse_autoconfig(document, "example.com")
+
+        assert result.provider_name == "Example Mail"
+        assert result.email_settings["imap"] == ServerSettings(
+            "imap.example.com", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP
+        )
+        assert result.email_settings["smtp"] == ServerSettings(
+            "smtp.example.com", 587, SecurityType.STARTTLS
+        )
+
+    def test_autoconfig_skips_mail_probing(self):
+        """Test that a complete autoconfig result skips IMAP/SMTP probing."""
+        autoconfig = DetectionResult(
+            success=True,
+            email_settings={
+                "imap": ServerSettings("imap.example.com", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP),
+                "smtp": ServerSettings("smtp.example.com", 465, SecurityType.TLS_SSL),
+            },
+            provider_name="Example Mail"
+        )
+
+        with patch.object(self.detector, '_detect_autoconfig', return_value=autoconfig), \
+             patch.object(self.detector, '_detect_imap_settings') as mock_imap, \
+             patch.object(self.detector, '_detect_smtp_settings') as mock_smtp, \
+             patch.object(self.detector, '_detect_dav_settings', return_value=(None, None)):
+            result = self.detector._detect_generic_settings("example.com")
+
+        mock_imap.assert_not_called()
+        mock_smtp.assert_not_called()
+        assert result.success
+        assert result.provider_name == "Example Mail"
+        assert set(result.email_settings) == {"imap", "smtp"}
+
     @patch('imaplib.IMAP4_SSL')
     def test_imap_connection_test(self, mock_imap):
         """Test IMAP connection testing."""
@@ -104,6 +447,116 @@ class TestProtocolDetector:
         assert not success
         assert "Authentication failed" in error
 
+    @patch('imaplib.IMAP4_SSL')
+    def test_imap_auth_error_messages(self, mock_imap):
+        """Test that IMAP server errors map to user-facing messages."""
+        import imaplib
+        settings = ServerSettings("imap.example.com", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP)
+
+        mock_imap.return_value.login.side_effect = imaplib.IMAP4.error("[AUTHENTICATIONFAILED] Invalid credentials (Failure)")
+        assert self.detector.test_connection(settings, "user", "pw") == (False, "Invalid credentials.")
+
+        mock_imap.return_value.login.side_effect = imaplib.IMAP4.error("LOGIN Authentication Failed")
+        success, error = self.detector.test_connection(settings, "user", "pw")
+        assert error.startswith("Authentication failed.")
+
+        mock_imap.return_value.login.side_effect = imaplib.IMAP4.error("LOGIN disabled")
+        assert self.detector.test_connection(settings, "user", "pw") == (False, "IMAP error: LOGIN disabled")
+
+    @patch('poplib.POP3')
+    def test_pop3_starttls_connection_test(self, mock_pop3):
+        """Test that POP3 credential tests upgrade with STLS before logging in."""
+        from src.adelfa.core.email.protocol_detector import _SSL_CTX
+        settings = ServerSettings("pop.example.com", 110, SecurityType.STARTTLS, EmailProtocol.POP3)
+
+        assert self.detector.test_connection(settings, "user", "pw") == (True, None)
+        mock_pop3.return_value.stls.assert_called_once_with(context=_SSL_CTX)
+        mock_pop3.return_value.pass_.assert_called_once_with("pw")
+
+    @patch('smtplib.SMTP_SSL')
+    def test_connection_test_maps_network_errors(self, mock_smtp):
+        """Test that network failures are reported the same for every protocol."""
+        import socket
+        settings = ServerSettings("smtp.example.com", 465, SecurityType.TLS_SSL)
+
+        mock_smtp.side_effect = socket.timeout()
+        assert self.detector.test_connection(settings, "user", "pw") == (False, "Connection timed out.")
+
+        mock_smtp.side_effect = socket.gaierror()
+        success, error = self.detector.test_connection(settings, "user", "pw")
+        assert error.startswith("Server not found.")
+
+
+
+class TestProtocolDetectorAsync:
+    """Test cases for the asyncio detection path."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        ProtocolDetector.clear_cache()
+        self.detector = ProtocolDetector()
+
+    def _serve(self, greeting: bytes):
+        """Run a probe against a local server sending the given greeting."""
+        import asyncio
+
+        async def run(service):
+            async def handle(reader, writer):
+                writer.write(greeting)
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await self.detector._probe_async("127.0.0.1", port, SecurityType.NONE, service)
+
+        return run
+
+    def test_probe_checks_greeting(self):
+        """Test that probes accept only the expected service greeting."""
+        import asyncio
+
+        assert asyncio.run(self._serve(b"* OK IMAP4rev1 ready\r\n")("imap"))
+        assert asyncio.run(self._serve(b"220 mail.example.com ESMTP\r\n")("smtp"))
+        assert not asyncio.run(self._serve(b"220 mail.example.com ESMTP\r\n")("imap"))
+
+    def test_predefined_provider(self):
+        """Test that known providers are answered without probing."""
+        import asyncio
+
+        result = asyncio.run(self.detector.detect_settings_async("someone@gmail.com"))
+
+        assert result.success
+        assert result.provider_name == "Gmail"
+
+    def test_generic_detection_prefers_first_candidate(self):
+        """Test asyncio probing keeps candidate preference order."""
+        import asyncio
+
+        async def probe(server, port, security, service):
+            await asyncio.sleep(0.05 if server == "imap.example.com" else 0)
+            return (server, port) in {("imap.example.com", 993), ("mail.example.com", 993), ("smtp.example.com", 587)}
+
+        async def resolves(server):
+            return True
+
+        async def no_srv(name):
+            return []
+
+        with patch.object(self.detector, '_detect_autoconfig', return_value=None), \
+             patch.object(self.detector, '_detect_dav_settings', return_value=(None, None)), \
+             patch.object(self.detector, '_lookup_srv_async', side_effect=no_srv), \
+             patch.object(self.detector, '_resolves_async', side_effect=resolves), \
+             patch.object(self.detector, '_probe_async', side_effect=probe):
+            result = asyncio.run(self.detector.detect_settings_async("user@example.com"))
+
+        assert result.success
+        assert result.email_settings["imap"] == ServerSettings(
+            "imap.example.com", 993, SecurityType.TLS_SSL, EmailProtocol.IMAP
+        )
+        assert result.email_settings["smtp"].server == "smtp.example.com"
+
 
 class TestCredentialManager:
     """Test cases for the CredentialManager class."""
@@ -116,6 +569,16 @@ class TestCredentialManager:
              patch('keyring.delete_password'):
             self.credential_manager = CredentialManager()
     
+    def test_get_credential_manager_is_shared(self):
+        """Test that the keyring is probed once per process."""
+        get_credential_manager.cache_clear()
+        try:
+            with patch('src.adelfa.core.email.credential_manager.CredentialManager') as mock_class:
+                assert get_credential_manager() is get_credential_manager()
+            mock_class.assert_called_once()
+        finally:
+            get_credential_manager.cache_clear()
+    
     @patch('keyring.set_password')
     @patch('keyring.get_password')
     def test_store_and_retrieve_password(self, mock_get, mock_set):
@@ -195,14 +658,11 @@ class TestCredentialManager:
 class TestAccountRepository:
     """Test cases for the AccountRepository class."""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup_repository(self, engine, session):
         """Set up test fixtures."""
-        # Create in-memory SQLite database for testing
-        self.engine = create_engine("sqlite:///:memory:")
-        Base.metadata.create_all(self.engine)
-        
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self.engine = engine
+        self.session = session
         
         # Mock the credential manager
         with patch('src.adelfa.data.repositories.account_repository.get_credential_manager') as mock_cm:
@@ -210,10 +670,6 @@ class TestAccountRepository:
             mock_cm.return_value = self.mock_credential_manager
             self.repository = AccountRepository(self.session)
     
-    def teardown_method(self):
-        """Clean up test fixtures."""
-        self.session.close()
-    
     def test_create_account(self):
         """Test creating a new account."""
         self.mock_credential_manager.store_password.return_value = "test_key_123"
@@ -243,6 +699,83 @@ class TestAccountRepository:
         # Check that credentials were stored
         assert self.mock_credential_manager.store_password.call_count == 2  # incoming and outgoing
     
+    def test_create_account_keyring_failure(self):
+        """Test that a keyring failure keeps the account and records the error."""
+        self.mock_credential_manager.store_password.side_effect = CredentialStorageError("locked")
+        
+        account = self.repository.create_account({
+            "name": "Test Account",
+            "email_address": "test@example.com",
+            "incoming_password": "secret"
+        })
+        
+        self.session.expire_all()
+        assert account.incoming_password_key is None
+        assert account.connection_status == "error"
+        assert "locked" in account.last_error
+    
+    def test_create_account_keeps_stored_keys_on_partial_failure(self):
+        """Test that credentials stored before another one failed stay referenced."""
+        def store_password(account_id, password_type, password):
+            if password_type == "incoming":
+                raise CredentialStorageError("locked")
+            return f"{password_type}_key"
+        
+        self.mock_credential_manager.store_password.side_effect = store_password
+        
+        account = self.repository.create_account({
+            "name": "Test Account",
+            "email_address": "test@example.com",
+            "incoming_password": "a",
+            "outgoing_password": "b"
+        })
+        
+        self.session.expire_all()
+        assert account.incoming_password_key is None
+        assert account.outgoing_password_key == "outgoing_key"
+        assert account.connection_status == "error"
+    
+    def test_create_account_stores_each_credential(self):
+        """Test that concurrently stored credentials land in the right key fields."""
+        self.mock_credential_manager.store_password.side_effect = (
+            lambda account_id, password_type, password: f"{password_type}_key"
+        )
+        self.mock_credential_manager.store_oauth_tokens.return_value = "oauth_key"
+        
+        account = self.repository.create_account({
+            "name": "Test Account",
+            "email_address": "test@example.com",
+            "incoming_password": "a",
+            "outgoing_password": "b",
+            "caldav_password": "c",
+            "carddav_password": "d",
+            "oauth_tokens": {"access_token": "e"}
+        })
+        
+        assert account.incoming_password_key == "incoming_key"
+        assert account.outgoing_password_key == "outgoing_key"
+        assert account.caldav_password_key == "caldav_key"
+        assert account.carddav_password_key == "carddav_key"
+        assert account.oauth2_token_key == "oauth_key"
+    
+    def test_create_accounts_bulk(self):
+        """Test importing accounts with and without credentials."""
+        self.mock_credential_manager.store_password.return_value = "key"
+        
+        created = self.repository.create_accounts_bulk([
+            {"name": f"Account {i}", "email_address": f"test{i}@example.com"} for i in range(3)
+        ] + [
+            {"name": "Secured", "email_address": "secure@example.com", "incoming_password": "secret"},
+            {"name": "Broken"}
+        ])
+        
+        assert created == 4
+        assert self.mock_credential_manager.store_password.call_count == 1
+        accounts = {account.name: account for account in self.repository.get_all_accounts()}
+        assert sorted(accounts) == ["Account 0", "Account 1", "Account 2", "Secured"]
+        assert accounts["Account 0"].sync_frequency == 15
+        assert accounts["Secured"].incoming_password_key == "key"
+    
     def test_get_account_by_email(self):
         """Test retrieving an account by email address."""
         # Create test account
@@ -259,6 +792,32 @@ class TestAccountRepository:
         assert retrieved is not None
         assert retrieved.email_address == "test@example.com"
     
+    def test_get_account_uses_identity_map(self, recorder):
+        """Test that an account already in the session is returned without a query."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.flush()
+        
+        recorder.clear()
+        assert self.repository.get_account(account.id) is account
+        assert not recorder.statements
+        assert self.repository.get_account(account.id + 1) is None
+    
+    def test_get_account_by_email_remembers_id(self, recorder):
+        """Test that repeated email lookups are served from the identity map."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        assert self.repository.get_account_by_email("test@example.com") is account
+        
+        recorder.clear()
+        assert self.repository.get_account_by_email("test@example.com") is account
+        assert not recorder.statements
+        
+        self.repository.update_account(account.id, {"email_address": "new@example.com"})
+        assert self.repository.get_account_by_email("test@example.com") is None
+        assert self.repository.get_account_by_email("new@example.com").id == account.id
+    
     def test_get_all_accounts(self):
         """Test retrieving all accounts."""
         # Create test accounts
@@ -277,6 +836,45 @@ class TestAccountRepository:
         assert len(enabled_accounts) == 1
         assert enabled_accounts[0].name == "Account 1"
     
+    def test_get_all_accounts_loads_providers(self, recorder):
+        """Test that account providers are loaded with the account list."""
+        provider = AccountProvider(name="example", display_name="Example")
+        self.session.add_all([
+            Account(name=f"Account {i}", email_address=f"test{i}@example.com", provider=provider)
+            for i in range(3)
+        ])
+        self.session.commit()
+        self.session.expire_all()
+        
+        recorder.clear()
+        accounts = self.repository.get_all_accounts()
+        assert {account.provider.name for account in accounts} == {"example"}
+        assert len(recorder.statements) == 2
+    
+    def test_delete_provider_keeps_accounts(self):
+        """Test that deleting a provider leaves its accounts without one."""
+        provider = AccountProvider(name="example", display_name="Example")
+        account = Account(name="Test Account", email_address="test@example.com", provider=provider)
+        self.session.add(account)
+        self.session.commit()
+        
+        self.session.delete(provider)
+        self.session.commit()
+        self.session.refresh(account)
+        assert account.provider_id is None
+    
+    def test_strict_loading_raises_on_lazy_load(self):
+        """Test that strict loading turns unplanned lazy loads into errors."""
+        self.session.add(Account(name="Account 1", email_address="test1@example.com"))
+        self.session.commit()
+        self.session.expire_all()
+        self.repository.strict_loading = True
+        
+        account = self.repository.get_all_accounts()[0]
+        assert account.provider is None
+        with pytest.raises(InvalidRequestError):
+            account.cached_folders
+    
     def test_set_default_account(self):
         """Test setting a default account."""
         # Create test accounts
@@ -305,6 +903,81 @@ class TestAccountRepository:
         assert not account1.is_default
         assert account2.is_default
     
+    def test_default_account_uses_partial_index(self, recorder):
+        """Test that default lookups read the one-row partial index."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        
+        recorder.clear()
+        self.repository.set_default_account(account.id)
+        self.repository.get_default_account()
+        
+        default_statements = [(sql, params) for sql, params in recorder.executed if "is_default = 1" in sql]
+        assert len(default_statements) == 2
+        for statement, parameters in default_statements:
+                plan = self.session.connection().exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                ).all()
+                assert "idx_account_default" in " ".join(row[-1] for row in plan)
+    
+    def test_has_default_account(self):
+        """Test checking for a default account without loading it."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        assert not self.repository.has_default_account()
+        
+        self.repository.set_default_account(account.id)
+        assert self.repository.has_default_account()
+        
+        self.repository.update_account(account.id, {"is_enabled": False})
+        assert not self.repository.has_default_account()
+    
+    def test_set_default_account_unknown_id(self):
+        """Test that an unknown account leaves the current default alone."""
+        account = Account(name="Account 1", email_address="test1@example.com", is_default=True)
+        self.session.add(account)
+        self.session.commit()
+        
+        assert not self.repository.set_default_account(account.id + 1)
+        
+        self.session.refresh(account)
+        assert account.is_default
+    
+    def test_update_account_columns(self, recorder):
+        """Test that plain column updates are written without loading the account."""
+        account = Account(name="Account 1", email_address="test1@example.com")
+        self.session.add(account)
+        self.session.commit()
+        account_id = account.id
+        self.session.expunge_all()
+        
+        recorder.clear()
+        assert self.repository.update_account(account_id, {"name": "Renamed", "sync_frequency": 5})
+        assert [statement.split()[0] for statement in recorder.statements] == ["UPDATE"]
+        
+        account = self.repository.get_account(account_id)
+        assert (account.name, account.sync_frequency) == ("Renamed", 5)
+        assert not self.repository.update_account(account_id + 1, {"name": "Missing"})
+    
+    def test_update_account_credentials(self):
+        """Test that new passwords are stored and existing ones updated."""
+        self.mock_credential_manager.store_password.return_value = "new_key"
+        account = Account(name="Test Account", email_address="test@example.com",
+                          incoming_password_key="in_key")
+        self.session.add(account)
+        self.session.commit()
+        
+        assert self.repository.update_account(account.id, {
+            "incoming_password": "changed",
+            "carddav_password": "added"
+        })
+        
+        self.mock_credential_manager.update_password.assert_called_once_with("in_key", "changed")
+        self.mock_credential_manager.store_password.assert_called_once_with(account.id, "carddav", "added")
+        assert account.carddav_password_key == "new_key"
+    
     def test_delete_account(self):
         """Test deleting an account."""
         self.mock_credential_manager.delete_password.return_value = True
@@ -330,6 +1003,50 @@ class TestAccountRepository:
         # Verify credentials were deleted
         self.mock_credential_manager.delete_password.assert_called()
     
+    def test_delete_account_continues_after_credential_error(self):
+        """Test that one failing credential delete does not stop the others."""
+        def delete_password(key):
+            if key == "key1":
+                raise CredentialStorageError("locked")
+            return True
+        
+        self.mock_credential_manager.delete_password.side_effect = delete_password
+        account = Account(name="Test Account", email_address="test@example.com",
+                          incoming_password_key="key1", outgoing_password_key="key2")
+        self.session.add(account)
+        self.session.commit()
+        
+        assert self.repository.delete_account(account.id)
+        deleted = {call.args[0] for call in self.mock_credential_manager.delete_password.call_args_list}
+        assert deleted == {"key1", "key2"}
+    
+    def test_delete_account_cascades_connection_tests(self):
+        """Test that connection test results are removed by the database."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        self.repository.record_connection_test(account.id, "incoming", True)
+        
+        assert self.repository.delete_account(account.id)
+        assert self.session.query(AccountConnectionTest).count() == 0
+    
+    def test_delete_account_loads_only_keys(self, recorder):
+        """Test that deleting reads the keyring keys and cascades cached folders."""
+        account = Account(name="Test Account", email_address="test@example.com",
+                          oauth2_token_key="oauth_key", cached_folders=[CachedFolder(name="INBOX")])
+        self.session.add(account)
+        self.session.commit()
+        account_id = account.id
+        self.session.expunge_all()
+        
+        recorder.clear()
+        assert self.repository.delete_account(account_id)
+        
+        assert "accounts.sync_frequency" not in recorder.statements[0]
+        assert not any("FROM cached_folders" in statement for statement in recorder.statements)
+        self.mock_credential_manager.delete_password.assert_called_once_with("oauth_key")
+        assert self.session.query(CachedFolder).count() == 0
+    
     def test_get_account_credentials(self):
         """Test retrieving account credentials."""
         self.mock_credential_manager.retrieve_password.return_value = "test_password"
@@ -345,6 +1062,25 @@ class TestAccountRepository:
         assert password == "test_password"
         self.mock_credential_manager.retrieve_password.assert_called_once_with("test_key_123")
     
+    def test_get_all_credentials(self):
+        """Test reading every stored password of an account at once."""
+        self.mock_credential_manager.retrieve_password.side_effect = lambda key: f"password for {key}"
+        
+        account = Account(
+            name="Test Account",
+            email_address="test@example.com",
+            incoming_password_key="in_key",
+            outgoing_password_key="out_key"
+        )
+        
+        assert self.repository.get_all_credentials(account) == {
+            "incoming": "password for in_key",
+            "outgoing": "password for out_key",
+            "caldav": None,
+            "carddav": None
+        }
+        assert self.mock_credential_manager.retrieve_password.call_count == 2
+    
     def test_record_connection_test(self):
         """Test recording connection test results."""
         # Create test account
@@ -374,6 +1110,53 @@ class TestAccountRepository:
         assert account.connection_status == "error"
         assert account.last_error == "Connection timeout"
     
+    def test_record_connection_tests_batch(self, recorder):
+        """Test recording all of an account's test results with one INSERT."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        
+        recorder.clear()
+        assert self.repository.record_connection_tests(account.id, [
+            {"test_type": "incoming", "success": True, "response_time_ms": 120},
+            {"test_type": "outgoing", "success": False, "error_message": "Refused"},
+            {"test_type": "caldav", "success": True},
+        ])
+        
+        assert sum(statement.startswith("INSERT") for statement in recorder.statements) == 1
+        history = self.repository.get_connection_test_history(account.id)
+        assert sorted(test.test_type for test in history) == ["caldav", "incoming", "outgoing"]
+        assert (account.connection_status, account.last_error) == ("error", "Refused")
+    
+    def test_record_connection_test_commits_once(self):
+        """Test that the test result and account status share one commit."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        
+        with patch.object(self.session, 'commit', wraps=self.session.commit) as mock_commit:
+            assert self.repository.record_connection_test(account.id, "outgoing", False, "Refused")
+        
+        mock_commit.assert_called_once()
+        assert account.connection_status == "error"
+    
+    def test_connection_test_history_uses_index(self, recorder):
+        """Test that the latest results are read in index order without sorting."""
+        account = Account(name="Test Account", email_address="test@example.com")
+        self.session.add(account)
+        self.session.commit()
+        
+        recorder.clear()
+        self.repository.get_connection_test_history(account.id)
+        
+        assert "client_info" not in recorder.statements[-1]
+        plan = self.session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {recorder.statements[-1]}", (account.id, 10, 0)
+        ).all()
+        details = " ".join(row[-1] for row in plan)
+        assert "idx_connection_test_account_tested" in details
+        assert "TEMP B-TREE" not in details
+    
     def test_get_connection_test_history(self):
         """Test retrieving connection test history."""
         # Create test account
@@ -0,0 +1,119 @@
+"""
+Unit tests for the asynchronous IMAP client.
+
+Runs coroutines against a mocked aioimaplib connection.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+from src.adelfa.core.email.async_imap_client import (
+    AsyncIMAPClient, AsyncIMAPLoop, _collect_literals, sync_folders
+)
+from src.adelfa.core.email.imap_client import IMAPClientError
+
+
+def _response(lines, result='OK'):
+    """Build an aioimaplib-style response."""
+    return SimpleNamespace(result=result, lines=lines)
+
+
+HEADER_A = b'Subject: First\r\nFrom: a@example.com\r\n\r\n'
+HEADER_B = b'Subject: Second\r\nFrom: b@example.com\r\n\r\n'
+
+
+class TestLiteralCollection:
+    """Test cases for pairing FETCH literals with UIDs."""
+
+    def test_uid_before_literal(self):
+        """Test responses where UID precedes the literal."""
+        lines = [
+            b'1 FETCH (UID 10 BODY[HEADER] {%d}' % len(HEADER_A), bytearray(HEADER_A), b')',
+            b'2 FETCH (UID 11 BODY[HEADER] {%d}' % len(HEADER_B), bytearray(HEADER_B), b')',
+            b'Fetch completed.'
+        ]
+
+        assert _collect_literals(lines) == {10: HEADER_A, 11: HEADER_B}
+
+    def test_uid_after_literal(self):
+        """Test responses where UID follows the literal."""
+        lines = [
+            b'1 FETCH (BODY[HEADER] {%d}' % len(HEADER_A), bytearray(HEADER_A), b' UID 10)',
+            b'Fetch completed.'
+        ]
+
+        assert _collect_literals(lines) == {10: HEADER_A}
+
+
+class TestAsyncIMAPClient:
+    """Test cases for AsyncIMAPClient operations."""
+
+    def setup_method(self):
+        """Set up a client with a mocked connection."""
+        account = Mock(email_address='user@example.com')
+        self.client = AsyncIMAPClient(account, Mock())
+        self.client.imap = Mock()
+        self.client.imap.select = AsyncMock(return_value=_response([b'42 EXISTS', b'SELECT completed.']))
+        self.client.imap.status = AsyncMock(
+            return_value=_response([b'INBOX (MESSAGES 42 UNSEEN 3 UIDNEXT 100)'])
+        )
+        self.client.imap.uid_search = AsyncMock(return_value=_response([b'10 11']))
+        self.client.imap.uid = AsyncMock(side_effect=self._fetch)
+
+    async def _fetch(self, command, uid_set, items):
+        """Return one header literal per requested UID."""
+        lines = []
+        for uid in uid_set.split(','):
+            header = HEADER_A if uid == '10' else HEADER_B
+            lines += [b'* FETCH (UID %s BODY[HEADER] {%d}' % (uid.encode(), len(header)),
+                      bytearray(header), b')']
+        return _response(lines + [b'Fetch completed.'])
+
+    def test_select_folder(self):
+        """Test folder counters from SELECT and STATUS."""
+        info = asyncio.run(self.client.select_folder('INBOX'))
+
+        assert info.exists == 42
+        assert info.unseen == 3
+        assert info.uidnext == 100
+        assert self.client.current_folder == 'INBOX'
+
+    def test_fetch_folder_headers_batches(self):
+        """Test that header batches are fetched and merged."""
+        headers = asyncio.run(self.client.fetch_folder_headers('INBOX', batch_size=1))
+
+        assert self.client.imap.uid.await_count == 2
+        assert headers[10].subject == 'First'
+        assert headers[11].from_addr == 'b@example.com'
+
+    def test_search_requires_folder(self):
+        """Test that searching without a selected folder fails."""
+        with pytest.raises(IMAPClientError):
+            asyncio.run(self.client.search_messages())
+
+    def test_sync_folders_isolates_failures(self):
+        """Test that one failing account does not abort the others."""
+        broken = AsyncIMAPClient(Mock(email_address='broken@example.com'), Mock())
+
+        results = asyncio.run(sync_folders([self.client, broken]))
+
+        assert set(results[0]) == {10, 11}
+        assert results[1] == {}
+
+
+class TestAsyncIMAPLoop:
+    """Test cases for the background event loop."""
+
+    def test_submit_from_another_thread(self):
+        """Test that coroutines run on the loop thread."""
+        loop = AsyncIMAPLoop()
+        try:
+            async def answer():
+                await asyncio.sleep(0)
+                return 42
+
+            assert loop.submit(answer()).result(timeout=5) == 42
+        finally:
+            loop.stop()
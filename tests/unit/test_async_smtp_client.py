@@ -0,0 +1,94 @@
+"""
+Unit tests for the asynchronous SMTP client.
+
+Runs coroutines against a mocked aiosmtplib session.
+"""
+
+import asyncio
+import aiosmtplib
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.adelfa.data.models.accounts import SecurityType
+from src.adelfa.core.email.async_smtp_client import AsyncSMTPClient
+from src.adelfa.core.email.smtp_client import (
+    EmailAddress, EmailAttachment, OutgoingEmail, SMTPClientError
+)
+
+
+def make_email(subject="Hello", **kwargs):
+    """Build a minimal outgoing message."""
+    return OutgoingEmail(
+        subject=subject,
+        from_addr=EmailAddress("user@example.com"),
+        to_addrs=[EmailAddress("to@example.com")],
+        text_content="Hi",
+        **kwargs
+    )
+
+
+class TestAsyncSMTPClient:
+    """Test cases for AsyncSMTPClient operations."""
+
+    def setup_method(self):
+        """Set up a client with a mocked session."""
+        account = Mock(
+            outgoing_server="smtp.example.com",
+            outgoing_port=465,
+            outgoing_security=SecurityType.TLS_SSL,
+            outgoing_username="user@example.com",
+            outgoing_auth_required=True
+        )
+        credentials = Mock()
+        credentials.retrieve_password.return_value = "secret"
+        self.client = AsyncSMTPClient(account, credentials)
+
+        self.session = Mock(is_connected=True)
+        self.session.connect = AsyncMock()
+        self.session.login = AsyncMock()
+        self.session.quit = AsyncMock()
+        self.session.send_message = AsyncMock(return_value=({}, "OK"))
+
+    def test_connect_uses_implicit_tls(self):
+        """Test that TLS/SSL accounts connect with implicit TLS and log in."""
+        with patch('aiosmtplib.SMTP', return_value=self.session) as mock_smtp:
+            assert asyncio.run(self.client.connect())
+
+        kwargs = mock_smtp.call_args.kwargs
+        assert kwargs["use_tls"] and not kwargs["start_tls"]
+        self.session.login.assert_awaited_once_with("user@example.com", "secret")
+        assert self.client.is_connected()
+
+    def test_connect_failure(self):
+        """Test that connection errors are reported as a failed connect."""
+        self.session.connect.side_effect = aiosmtplib.SMTPConnectError("refused")
+
+        with patch('aiosmtplib.SMTP', return_value=self.session):
+            assert not asyncio.run(self.client.connect())
+        assert not self.client.is_connected()
+
+    def test_send_email(self):
+        """Test sending one message with its envelope."""
+        self.client.smtp = self.session
+
+        assert asyncio.run(self.client.send_email(make_email()))
+
+        message = self.session.send_message.call_args.args[0]
+        assert message['Subject'] == "Hello"
+        assert self.session.send_message.call_args.kwargs["recipients"] == ["to@example.com"]
+
+    def test_send_requires_connection(self):
+        """Test that sending without a session raises."""
+        with pytest.raises(SMTPClientError):
+            asyncio.run(self.client.send_email(make_email()))
+
+    def test_send_many_reports_each_message(self):
+        """Test that one failing message does not stop the others."""
+        self.client.smtp = self.session
+        broken = make_email("Broken", attachments=[EmailAttachment("gone.pdf")])
+
+        results = asyncio.run(self.client.send_many([make_email("First"), broken, make_email("Last")]))
+
+        assert results == [True, False, True]
+        subjects = [call.args[0]['Subject'] for call in self.session.send_message.call_args_list]
+        assert subjects == ["First", "Last"]
@@ -0,0 +1,101 @@
+"""
+Unit tests for the SQLAlchemy-backed message cache.
+
+Runs against an in-memory SQLite database.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from src.adelfa.data.models import Account, Base
+from src.adelfa.data.models.cache import CachedMessage, ImapFlag
+from src.adelfa.data.migrations.cache_flags import drop_legacy_flag_rows
+from src.adelfa.data.migrations.schema import add_missing_columns
+from src.adelfa.core.cache_manager import CacheManager
+from src.adelfa.core.email.imap_client import EmailHeader, EmailMessage
+
+
+def make_message(uid, subject="Hello", flags=None):
+    """Build a fetched message with headers only."""
+    headers = EmailHeader(
+        message_id=f"<{uid}@example.com>",
+        subject=subject,
+        from_addr="from@example.com",
+        to_addrs=["to@example.com"],
+        date=datetime(2024, 1, 1, 12, uid % 60)
+    )
+    return EmailMessage(uid=uid, sequence_num=uid, folder="INBOX", headers=headers,
+                        flags=flags or [], size=100)
+
+
+class TestMessageCache:
+    """Test cases for caching message headers."""
+
+    @pytest.fixture(autouse=True)
+    def setup_cache(self, session):
+        """Create a cache for one account in a fresh database."""
+        self.session = session
+        self.session.add(Account(id=1, name="Work"))
+        self.session.commit()
+        self.cache = CacheManager(self.session)
+
+    def test_cache_messages_round_trip(self):
+        """Test that cached headers are returned as messages."""
+        self.cache.cache_messages(1, "INBOX", [make_message(1), make_message(2, flags=["\\Seen"])])
+
+        messages = self.cache.get_cached_messages(1, "INBOX")
+        assert sorted(m.uid for m in messages) == [1, 2]
+        by_uid = {m.uid: m for m in messages}
+        assert by_uid[2].flags == ["\\Seen"]
+        assert by_uid[1].headers.to_addrs == ["to@example.com"]
+
+    def test_cache_messages_updates_known_uids(self):
+        """Test that refetched UIDs update their row instead of duplicating it."""
+        self.cache.cache_messages(1, "INBOX", [make_message(1)])
+        self.cache.cache_messages(1, "INBOX", [make_message(1, "Changed", ["\\Seen"]), make_message(3)])
+
+        rows = self.session.query(CachedMessage).order_by(CachedMessage.uid).all()
+        assert [row.uid for row in rows] == [1, 3]
+        assert rows[0].subject == "Changed"
+        assert rows[0].flag_names == ["\\Seen"]
+        assert rows[0].message_id == "<1@example.com>"
+
+    def test_flags_stored_as_bitmask(self):
+        """Test that system flags become bits and other flags keywords."""
+        flags = ["\\Seen", "\\Flagged", "$Forwarded"]
+        self.cache.cache_messages(1, "INBOX", [make_message(1, flags=flags), make_message(2)])
+
+        row = self.session.query(CachedMessage).filter(CachedMessage.uid == 1).one()
+        assert row.flags == ImapFlag.SEEN | ImapFlag.FLAGGED
+        assert row.keywords == ["$Forwarded"]
+        assert self.cache.get_cached_messages(1, "INBOX")[-1].flags == flags
+
+        unseen = self.session.query(CachedMessage.uid).filter(~CachedMessage.has_flag(ImapFlag.SEEN))
+        assert [uid for uid, in unseen] == [2]
+
+
+class TestCacheMigrations:
+    """Test cases for upgrading an existing cache table."""
+
+    def test_legacy_table_upgraded(self):
+        """Test that a table from before the flag bitmask gets its new column and loses JSON rows."""
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE cached_messages (id INTEGER PRIMARY KEY, account_id INTEGER, "
+                "folder_name VARCHAR(255), uid INTEGER, flags JSON)"
+            ))
+            conn.execute(text(
+                "INSERT INTO cached_messages (account_id, folder_name, uid, flags) "
+                "VALUES (1, 'INBOX', 1, '[\"\\\\Seen\"]'), (1, 'INBOX', 2, 3)"
+            ))
+
+        assert add_missing_columns(engine, Base.metadata) > 0
+        columns = {column['name'] for column in inspect(engine).get_columns('cached_messages')}
+        assert 'keywords' in columns
+
+        assert drop_legacy_flag_rows(engine) == 1
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT uid FROM cached_messages")).scalars().all() == [2]
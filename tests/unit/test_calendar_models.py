@@ -0,0 +1,357 @@
+"""
+Unit tests for calendar models.
+
+Runs against an in-memory SQLite database.
+"""
+
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import text
+
+from src.adelfa.data.models import Attendee, Base, Calendar, Event, EventRecurrenceException, Reminder
+from src.adelfa.data.models.calendar import AttendeeStatus, RecurrenceType
+from src.adelfa.data.migrations.schema import rebuild_foreign_keys, sync_indexes
+
+
+class TestBulkInsert:
+    """Test cases for batched event and attendee imports."""
+
+    @pytest.fixture(autouse=True)
+    def setup_calendar(self, session, recorder):
+        """Create a database with one calendar."""
+        self.session = session
+        self.recorder = recorder
+        self.calendar = Calendar(name="Work")
+        self.session.add(self.calendar)
+        self.session.commit()
+        self.recorder.clear()
+
+    def test_bulk_insert_batches_rows(self):
+        """Test that events are inserted with multi-row statements."""
+        rows = [
+            {"calendar_id": self.calendar.id, "title": f"Event {i}", "start_date": date(2024, 1, 1)}
+            for i in range(120)
+        ]
+
+        Event.bulk_insert(self.session, rows)
+        self.session.commit()
+
+        inserts = [s for s in self.recorder.statements if s.startswith("INSERT INTO events")]
+        assert len(inserts) == 1
+        assert self.session.query(Event).count() == 120
+
+    def test_bulk_insert_children(self):
+        """Test inserting attendees for imported events with enum values."""
+        Event.bulk_insert(self.session, [{"calendar_id": self.calendar.id, "title": "Meeting"}])
+        event_id = self.session.query(Event.id).filter_by(title="Meeting").scalar()
+
+        Attendee.bulk_insert(self.session, [
+            {"event_id": event_id, "email": "a@example.com", "status": AttendeeStatus.ACCEPTED},
+            {"event_id": event_id, "email": "b@example.com"},
+        ])
+        self.session.commit()
+
+        attendees = self.session.get(Event, event_id).attendees
+        assert sorted(a.email for a in attendees) == ["a@example.com", "b@example.com"]
+        assert {a.status for a in attendees} == {AttendeeStatus.ACCEPTED, AttendeeStatus.NEEDS_ACTION}
+
+    def test_bulk_insert_nothing(self):
+        """Test that an empty import issues no statements."""
+        Event.bulk_insert(self.session, [])
+        assert not self.recorder.statements
+
+
+class TestEventSpans:
+    """Test cases for date-range queries on the calendar index."""
+
+    @pytest.fixture(autouse=True)
+    def setup_events(self, engine, session):
+        """Create a calendar with events spread over a few months."""
+        self.engine = engine
+        self.session = session
+        self.calendar = Calendar(name="Home")
+        self.session.add(self.calendar)
+        self.session.flush()
+        Event.bulk_insert(self.session, [
+            {"calendar_id": self.calendar.id, "title": "Holiday",
+             "start_date": date(2024, 1, 28), "end_date": date(2024, 2, 3)},
+            {"calendar_id": self.calendar.id, "title": "Dentist", "start_date": date(2024, 2, 14)},
+            {"calendar_id": self.calendar.id, "title": "Party", "start_date": date(2024, 3, 1)},
+        ])
+        self.session.commit()
+
+    def test_span_query_overlapping_events(self):
+        """Test that events overlapping the range are returned in start order."""
+        rows = self.session.execute(
+            Event.span_query(self.calendar.id, date(2024, 2, 1), date(2024, 2, 29))
+        ).all()
+        assert [row.start_date for row in rows] == [date(2024, 1, 28), date(2024, 2, 14)]
+
+    def test_span_query_covered_by_index(self):
+        """Test that the span query is answered from the index alone."""
+        stmt = Event.span_query(self.calendar.id, date(2024, 2, 1), date(2024, 2, 29))
+        sql = str(stmt.compile(self.engine, compile_kwargs={"literal_binds": True}))
+
+        plan = self.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "COVERING INDEX idx_event_calendar_dates" in plan[0][-1]
+
+
+class TestRecurrenceExceptions:
+    """Test cases for recurrence exception dates."""
+
+    @pytest.fixture(autouse=True)
+    def setup_event(self, session):
+        """Create a calendar with one recurring event."""
+        self.session = session
+        self.event = Event(calendar=Calendar(name="Work"), title="Standup",
+                           start_date=date(2024, 1, 1), recurrence_type=RecurrenceType.DAILY)
+        self.session.add(self.event)
+        self.session.commit()
+
+    def test_add_and_remove_exceptions(self):
+        """Test that exception dates are stored once and can be removed."""
+        self.event.add_exception(date(2024, 1, 5))
+        self.event.add_exception(date(2024, 1, 5))
+        self.event.add_exception(date(2024, 1, 8))
+        self.session.commit()
+        event_id = self.event.id
+        self.session.expunge_all()
+
+        event = self.session.get(Event, event_id)
+        assert event.exception_dates == {date(2024, 1, 5), date(2024, 1, 8)}
+
+        event.remove_exception(date(2024, 1, 5))
+        self.session.commit()
+        assert self.session.query(EventRecurrenceException).count() == 1
+
+
+class TestPendingReminders:
+    """Test cases for the pending-reminder partial index."""
+
+    def test_pending_clause_uses_partial_index(self, engine, session):
+        """Test that only untriggered reminders are selected, via the partial index."""
+        session.add(Event(calendar=Calendar(name="Work"), title="Review", reminders=[
+            Reminder(minutes_before=15),
+            Reminder(minutes_before=60, is_triggered=True),
+        ]))
+        session.commit()
+
+        query = session.query(Reminder.minutes_before).filter(Reminder.pending_clause())
+        assert query.all() == [(15,)]
+
+        sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "idx_reminder_pending" in plan[0][-1]
+
+
+class TestCalendarSync:
+    """Test cases for skipping unchanged calendars during sync."""
+
+    @pytest.fixture(autouse=True)
+    def setup_calendar(self, session):
+        """Create a calendar with synced and local events."""
+        self.session = session
+        self.calendar = Calendar(name="Shared", events=[
+            Event(title="Synced", server_id="a@example.com", etag='"1"'),
+            Event(title="Also synced", server_id="b@example.com", etag='"7"'),
+            Event(title="Local only"),
+        ])
+        self.session.add(self.calendar)
+        self.session.commit()
+
+    def test_needs_sync(self):
+        """Test that an unchanged sync token skips the sync."""
+        assert self.calendar.needs_sync("token-1")
+
+        self.calendar.mark_synced("token-1")
+        assert self.calendar.last_sync is not None
+        assert not self.calendar.needs_sync("token-1")
+        assert self.calendar.needs_sync("token-2")
+        assert self.calendar.needs_sync(None)
+
+    def test_etag_map_read_from_index(self, recorder):
+        """Test that ETags of synced events are read from the covering index."""
+        etags = Event.etag_map(self.session, self.calendar.id)
+        assert etags == {"a@example.com": '"1"', "b@example.com": '"7"'}
+
+        statement, parameters = recorder.executed[-1]
+        plan = self.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        assert "COVERING INDEX idx_event_calendar_server" in plan[0][-1]
+
+
+class TestRecurrenceMasters:
+    """Test cases for selecting recurrence masters."""
+
+    def test_master_clause_uses_partial_index(self, engine, session):
+        """Test that overridden occurrences are left out, via the partial index."""
+        calendar = Calendar(name="Work")
+        master = Event(calendar=calendar, title="Weekly", start_date=date(2024, 1, 1),
+                       recurrence_type=RecurrenceType.WEEKLY)
+        master.recurrence_children.append(Event(calendar=calendar, title="Weekly (moved)",
+                                                start_date=date(2024, 1, 9)))
+        session.add(master)
+        session.commit()
+
+        query = (
+            session.query(Event.title)
+            .filter(Event.calendar_id == calendar.id, Event.master_clause(), Event.start_date >= date(2024, 1, 1))
+        )
+        assert query.all() == [("Weekly",)]
+
+        sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "idx_event_masters" in plan[0][-1]
+
+
+class TestEventUtcSpan:
+    """Test cases for UTC instants derived from local event times."""
+
+    @pytest.fixture(autouse=True)
+    def setup_calendar(self, engine, session):
+        """Create a calendar in a fresh database."""
+        self.engine = engine
+        self.session = session
+        self.calendar = Calendar(name="Travel")
+        self.session.add(self.calendar)
+
+    def test_span_derived_on_flush(self):
+        """Test that timed and all-day events get UTC instants when saved."""
+        meeting = Event(calendar=self.calendar, title="Rome call", start_date=date(2024, 7, 1),
+                        start_time=time(9, 0), end_time=time(10, 0), timezone="Europe/Rome")
+        holiday = Event(calendar=self.calendar, title="Holiday", start_date=date(2024, 7, 4),
+                        is_all_day=True, timezone="America/New_York")
+        self.session.add_all([meeting, holiday])
+        self.session.flush()
+
+        assert (meeting.start_utc, meeting.end_utc) == (datetime(2024, 7, 1, 7), datetime(2024, 7, 1, 8))
+        assert (holiday.start_utc, holiday.end_utc) == (datetime(2024, 7, 4, 4), datetime(2024, 7, 5, 4))
+
+        meeting.start_time = time(11, 0)
+        meeting.end_time = time(12, 0)
+        self.session.flush()
+        assert meeting.start_utc == datetime(2024, 7, 1, 9)
+
+    def test_overlapping_clause(self):
+        """Test selecting events across timezones by an absolute time range."""
+        self.session.add_all([
+            Event(calendar=self.calendar, title="Tokyo", start_date=date(2024, 7, 2),
+                  start_time=time(8, 0), end_time=time(9, 0), timezone="Asia/Tokyo"),
+            Event(calendar=self.calendar, title="London", start_date=date(2024, 7, 2),
+                  start_time=time(8, 0), end_time=time(9, 0), timezone="Europe/London"),
+        ])
+        self.session.commit()
+
+        query = self.session.query(Event.title).filter(
+            Event.calendar_id == self.calendar.id,
+            Event.overlapping_clause(datetime(2024, 7, 1, 22), datetime(2024, 7, 2, 1))
+        )
+        assert query.all() == [("Tokyo",)]
+
+        sql = str(query.statement.compile(self.engine, compile_kwargs={"literal_binds": True}))
+        plan = self.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "idx_event_utc_range" in plan[0][-1]
+
+
+class TestSyncUpsert:
+    """Test cases for writing synced events in one statement."""
+
+    @pytest.fixture(autouse=True)
+    def setup_calendar(self, engine, session):
+        """Create a calendar with one synced event."""
+        self.engine = engine
+        self.session = session
+        self.calendar = Calendar(name="Shared", events=[
+            Event(title="Old title", server_id="a@example.com", etag='"1"'),
+            Event(title="Local"),
+        ])
+        self.session.add(self.calendar)
+        self.session.commit()
+
+    def test_bulk_upsert_updates_and_inserts(self):
+        """Test that known server IDs are updated and new ones inserted."""
+        Event.bulk_upsert(self.session, [
+            {"calendar_id": self.calendar.id, "server_id": "a@example.com", "title": "New title", "etag": '"2"'},
+            {"calendar_id": self.calendar.id, "server_id": "b@example.com", "title": "Added", "etag": '"1"'},
+        ])
+        self.session.commit()
+
+        titles = {event.server_id: event.title for event in self.session.query(Event)}
+        assert titles == {"a@example.com": "New title", "b@example.com": "Added", None: "Local"}
+        assert Event.etag_map(self.session, self.calendar.id)["a@example.com"] == '"2"'
+
+    def test_duplicate_rows_skip_unique_index(self):
+        """Test that an existing database with duplicates still starts."""
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX uq_event_server"))
+            conn.execute(text(
+                f"INSERT INTO events (calendar_id, title, server_id) VALUES ({self.calendar.id}, 'Copy', 'a@example.com')"
+            ))
+
+        assert sync_indexes(self.engine, Base.metadata) == 0
+        with self.engine.connect() as conn:
+            names = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+        assert "uq_event_server" not in names
+
+
+class TestCascadeDeletes:
+    """Test cases for removing child rows with ON DELETE CASCADE."""
+
+    @pytest.fixture(autouse=True)
+    def setup_calendar(self, engine, session):
+        """Create a calendar with an event, attendee and reminder."""
+        self.engine = engine
+        self.session = session
+        self.calendar = Calendar(name="Work", events=[
+            Event(title="Review", attendees=[Attendee(email="a@example.com")],
+                  reminders=[Reminder(minutes_before=15)]),
+        ])
+        self.session.add(self.calendar)
+        self.session.commit()
+
+    def count(self, table):
+        """Count the rows of a table."""
+        return self.session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+    def test_delete_calendar_cascades_in_database(self, recorder):
+        """Test that deleting a calendar removes events without loading them."""
+        self.session.expire_all()
+
+        self.session.delete(self.session.get(Calendar, self.calendar.id))
+        self.session.commit()
+
+        assert not any("FROM events" in statement for statement in recorder.statements)
+        assert [self.count(table) for table in ("events", "attendees", "reminders")] == [0, 0, 0]
+
+    def test_delete_recurring_event_removes_overrides(self):
+        """Test that overridden occurrences are deleted with their recurring event."""
+        master = self.calendar.events[0]
+        master.recurrence_children.append(Event(calendar=self.calendar, title="Review (moved)"))
+        self.session.commit()
+
+        self.session.delete(master)
+        self.session.commit()
+        assert self.count("events") == 0
+
+    def test_rebuild_foreign_keys(self):
+        """Test that tables created without cascading keys are rebuilt."""
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+            conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+            conn.execute(text("ALTER TABLE attendees RENAME TO attendees_old"))
+            conn.execute(text(
+                "CREATE TABLE attendees (id INTEGER PRIMARY KEY, "
+                "event_id INTEGER NOT NULL REFERENCES events (id), email VARCHAR(255) NOT NULL, "
+                "name VARCHAR(255), legacy TEXT)"
+            ))
+            conn.execute(text("INSERT INTO attendees (id, event_id, email) SELECT id, event_id, email FROM attendees_old"))
+            conn.execute(text("DROP TABLE attendees_old"))
+            conn.commit()
+
+        assert rebuild_foreign_keys(self.engine, Base.metadata) == 1
+        assert rebuild_foreign_keys(self.engine, Base.metadata) == 0
+        assert self.count("attendees") == 1
+
+        self.session.execute(text("DELETE FROM events"))
+        self.session.commit()
+        assert self.count("attendees") == 0
@@ -0,0 +1,139 @@
+"""
+Unit tests for contact models.
+
+Runs against an in-memory SQLite database.
+"""
+
+import hashlib
+
+import pytest
+
+from src.adelfa.data.models import Contact, ContactAddress, ContactEmail, ContactPhone, ContactPhoto
+
+
+class TestContactLoading:
+    """Test cases for loading contacts with their details."""
+
+    @pytest.fixture(autouse=True)
+    def setup_contacts(self, session, recorder):
+        """Create a few contacts with emails and phones."""
+        self.session = session
+        self.recorder = recorder
+
+        for i in range(5):
+            self.session.add(Contact(
+                first_name=f"Contact {i}",
+                emails=[ContactEmail(email=f"c{i}@example.com", is_primary=True)],
+                phones=[ContactPhone(number=f"555-000{i}")]
+            ))
+        self.session.commit()
+        self.session.expunge_all()
+        self.recorder.clear()
+
+    def test_collections_loaded_per_query(self):
+        """Test that listing contacts does not query per contact."""
+        contacts = self.session.query(Contact).all()
+        rows = [(c.emails[0].email, c.phones[0].number, c.addresses) for c in contacts]
+
+        assert len(rows) == 5
+        assert len(self.recorder.statements) == 4  # contacts, emails, phones, addresses
+
+    def test_list_options(self):
+        """Test that list options skip addresses and unlisted columns."""
+        contacts = self.session.query(Contact).options(*Contact.list_options()).all()
+        emails = [c.emails[0].email for c in contacts]
+        names = [c.get_full_name() for c in contacts]
+
+        assert emails == [f"c{i}@example.com" for i in range(5)]
+        assert names == [f"Contact {i}" for i in range(5)]
+        assert len(self.recorder.statements) == 3
+        assert 'notes' not in contacts[0].__dict__
+
+
+class TestContactPhotos:
+    """Test cases for photos kept outside the contacts table."""
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, session):
+        """Use a fresh database."""
+        self.session = session
+
+    def test_photo_loaded_on_access(self):
+        """Test that contact queries leave the photo bytes unread."""
+        contact = Contact(first_name="Ann")
+        contact.set_photo(b"\x89PNG data", "image/png")
+        self.session.add(contact)
+        self.session.commit()
+        self.session.expunge_all()
+
+        contact = self.session.query(Contact).one()
+        assert 'photo' not in contact.__dict__
+        assert contact.photo.data == b"\x89PNG data"
+        assert contact.photo_etag == hashlib.sha1(b"\x89PNG data").hexdigest()
+
+        contact.set_photo(None)
+        self.session.commit()
+        assert self.session.query(ContactPhoto).count() == 0
+
+
+class TestDerivedNames:
+    """Test cases for display names and addresses derived on write."""
+
+    def test_display_name_follows_name_parts(self):
+        """Test that display_name tracks the name parts until set explicitly."""
+        contact = Contact(name_prefix="Dr.", first_name="Ada", last_name="Lovelace")
+        assert contact.display_name == "Dr. Ada Lovelace"
+
+        contact.middle_name = "King"
+        assert contact.get_full_name() == "Dr. Ada King Lovelace"
+
+        contact.display_name = "Countess of Lovelace"
+        contact.first_name = "Augusta"
+        assert contact.get_full_name() == "Countess of Lovelace"
+
+    def test_unnamed_contact(self):
+        """Test that contacts without a name stay unnamed in the database."""
+        contact = Contact(company="Acme")
+        assert contact.display_name is None
+        assert contact.get_full_name() == "Unknown"
+
+    def test_bulk_inserted_rows_fall_back(self, session):
+        """Test that contacts bulk-inserted without a display name are still named."""
+        Contact.bulk_insert(session, [{"first_name": "Grace", "last_name": "Hopper"}])
+        session.commit()
+
+        contact = session.query(Contact).one()
+        assert contact.display_name is None
+        assert contact.get_full_name() == "Grace Hopper"
+        assert ContactAddress().get_formatted_address() == ""
+
+    def test_formatted_address_stored(self):
+        """Test that the formatted address is kept with the address parts."""
+        address = ContactAddress(street="1 Main St", city="Springfield", state="IL", postal_code="62701")
+        assert address.formatted_address == "1 Main St\nSpringfield, IL, 62701"
+
+        address.country = "USA"
+        assert address.get_formatted_address() == "1 Main St\nSpringfield, IL, 62701\nUSA"
+
+
+class TestContactPicker:
+    """Test cases for listing contacts without building Contact objects."""
+
+    def test_picker_rows(self, session):
+        """Test that picker rows carry the name and preferred email."""
+        session.add_all([
+            Contact(first_name="Zed", emails=[
+                ContactEmail(email="zed@home.example"),
+                ContactEmail(email="zed@work.example", is_primary=True),
+            ]),
+            Contact(first_name="Amy", company="Acme", emails=[ContactEmail(email="amy@example.com")]),
+            Contact(company="No Name Inc."),
+        ])
+        session.commit()
+
+        rows = session.execute(Contact.picker_query()).all()
+        assert [(row.display_name, row.company, row.email) for row in rows] == [
+            (None, "No Name Inc.", None),
+            ("Amy", "Acme", "amy@example.com"),
+            ("Zed", None, "zed@work.example"),
+        ]
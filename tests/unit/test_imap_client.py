@@ -0,0 +1,463 @@
+"""
+Unit tests for the IMAP client.
+
+Tests response parsing and partial-fetch helpers without a live server.
+"""
+
+import base64
+import pytest
+from unittest.mock import Mock, patch
+
+from src.adelfa.data.models.accounts import SecurityType
+from src.adelfa.core.email.imap_client import (
+    IMAPClient, IMAPClientError, FolderInfo, _parse_imap_list, _join_fetch_response,
+    _fetch_item, _walk_body_structure, _parse_list_response,
+    _encode_modified_utf7, _decode_modified_utf7, _decode_header_value
+)
+
+
+MIXED_STRUCTURE = [
+    (b'1 (UID 5 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 120 4 NIL NIL NIL)'
+     b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "7BIT" 300 8 NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "b2") NIL NIL)'
+     b'("APPLICATION" "PDF" ("NAME" "report.pdf") NIL NIL "BASE64" 20000 NIL ("ATTACHMENT" ("FILENAME" {7}',
+     b'a"b.pdf'),
+    b')) NIL) "MIXED" ("BOUNDARY" "b1") NIL NIL))'
+]
+
+
+class TestBodyStructureParsing:
+    """Test cases for BODYSTRUCTURE parsing."""
+
+    def _parts(self, data):
+        """Parse a raw FETCH response into message parts."""
+        structure = _fetch_item(_parse_imap_list(_join_fetch_response(data)), b'BODYSTRUCTURE')
+        parts = []
+        _walk_body_structure(structure, '', parts)
+        return parts
+
+    def test_nested_multipart_numbering(self):
+        """Test part numbers of nested multipart messages."""
+        parts = self._parts(MIXED_STRUCTURE)
+
+        assert [p.part_number for p in parts] == ['1.1', '1.2', '2']
+        assert parts[0].content_type == 'text/plain'
+        assert parts[0].encoding == 'quoted-printable'
+        assert parts[1].content_type == 'text/html'
+
+    def test_attachment_from_literal(self):
+        """Test attachment disposition with a literal filename."""
+        attachment = self._parts(MIXED_STRUCTURE)[2]
+
+        assert attachment.is_attachment
+        assert attachment.filename == 'a"b.pdf'
+        assert attachment.size == 20000
+
+    def test_single_part_message(self):
+        """Test that a single part message is numbered 1."""
+        data = [b'1 (UID 7 BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "us-ascii") NIL NIL "7BIT" 42 2 NIL NIL NIL))']
+        parts = self._parts(data)
+
+        assert len(parts) == 1
+        assert parts[0].part_number == '1'
+        assert not parts[0].is_attachment
+
+
+class TestPartialFetch:
+    """Test cases for preview and attachment fetching."""
+
+    def setup_method(self):
+        """Set up a client with a mocked IMAP connection."""
+        self.client = IMAPClient(Mock(), Mock())
+        self.client.imap = Mock()
+        self.client.current_folder = 'INBOX'
+
+    def test_preview_fetches_only_text_part(self):
+        """Test that preview requests a byte range of the text part."""
+        self.client.imap.uid.side_effect = [
+            ('OK', MIXED_STRUCTURE),
+            ('OK', [(b'1 (UID 5 BODY[1.1]<0> {11}', b'Hello=20you'), b')'])
+        ]
+
+        preview = self.client.get_message_preview(5, max_bytes=1024)
+
+        assert preview == 'Hello you'
+        assert self.client.imap.uid.call_args[0][2] == '(BODY.PEEK[1.1]<0.1024>)'
+
+    def test_attachment_fetches_single_part(self):
+        """Test downloading and decoding one attachment part."""
+        encoded = base64.encodebytes(b'%PDF-1.4 data')
+        self.client.imap.uid.side_effect = [
+            ('OK', MIXED_STRUCTURE),
+            ('OK', [(b'1 (UID 5 BODY[2] {%d}' % len(encoded), encoded), b')'])
+        ]
+
+        assert self.client.get_attachment(5, '2') == b'%PDF-1.4 data'
+        assert self.client.imap.uid.call_args[0][2] == '(BODY.PEEK[2])'
+
+    def test_unknown_part_raises(self):
+        """Test that requesting a missing part raises an error."""
+        self.client.imap.uid.return_value = ('OK', MIXED_STRUCTURE)
+
+        with pytest.raises(IMAPClientError):
+            self.client.get_attachment(5, '9')
+
+
+class TestPartDecoding:
+    """Test cases for body part decoding."""
+
+    def setup_method(self):
+        """Set up a client without a connection."""
+        self.client = IMAPClient(Mock(), Mock())
+
+    def _body(self, raw: bytes):
+        """Parse raw message bytes into (text, html, attachments)."""
+        import email
+        return self.client._parse_body(email.message_from_bytes(raw))
+
+    def test_identity_encoding_ascii(self):
+        """Test that 7bit ASCII bodies are returned unchanged."""
+        text, html, _ = self._body(
+            b'Content-Type: text/plain; charset=us-ascii\r\n\r\nPlain body\r\n'
+        )
+
+        assert text == 'Plain body\r\n'
+        assert html is None
+
+    def test_8bit_latin1_body(self):
+        """Test that 8bit bodies are decoded with their declared charset."""
+        text, _, _ = self._body(
+            b'Content-Type: text/plain; charset=iso-8859-1\r\n'
+            b'Content-Transfer-Encoding: 8bit\r\n\r\ncaf\xe9'
+        )
+
+        assert text == 'café'
+
+    def test_base64_and_quoted_printable_parts(self):
+        """Test decoding of encoded parts in a multipart message."""
+        text, html, attachments = self._body(
+            b'Content-Type: multipart/alternative; boundary="b"\r\n\r\n'
+            b'--b\r\nContent-Type: text/plain; charset=utf-8\r\n'
+            b'Content-Transfer-Encoding: quoted-printable\r\n\r\ncaf=C3=A9\r\n'
+            b'--b\r\nContent-Type: text/html; charset=utf-8\r\n'
+            b'Content-Transfer-Encoding: base64\r\n\r\nPGI+aGk8L2I+\r\n'
+            b'--b--\r\n'
+        )
+
+        assert text.startswith('café')
+        assert html == '<b>hi</b>'
+        assert attachments == []
+
+    def test_unicode_str_payload_returned_directly(self):
+        """Test that already-decoded text payloads are not re-wrapped."""
+        import email.message
+        part = email.message.Message()
+        part['Content-Type'] = 'text/plain; charset=utf-8'
+        part.set_payload('naïve')
+
+        assert self.client._decode_part_content(part) == 'naïve'
+
+    def test_multipart_container_skipped(self):
+        """Test that a multipart container is never rendered as text."""
+        import email
+        msg = email.message_from_bytes(
+            b'Content-Type: multipart/mixed; boundary="b"\r\n\r\n'
+            b'--b\r\nContent-Type: text/plain\r\n\r\nx\r\n--b--\r\n'
+        )
+
+        assert self.client._decode_part_content(msg) == ""
+
+
+class TestCapabilities:
+    """Test cases for capability caching."""
+
+    def setup_method(self):
+        """Set up a client with a mocked IMAP connection."""
+        self.client = IMAPClient(Mock(), Mock())
+        self.client.imap = Mock()
+        self.client.current_folder = 'INBOX'
+
+    def test_load_capabilities(self):
+        """Test that the CAPABILITY response is cached as a set."""
+        self.client.imap.capability.return_value = ('OK', [b'IMAP4rev1 IDLE MOVE CONDSTORE'])
+        self.client._capabilities = self.client._load_capabilities(self.client.imap)
+
+        assert self.client.has_capability('move')
+        assert self.client.has_capability('IDLE')
+        assert not self.client.has_capability('QRESYNC')
+
+    def test_move_without_capability_uses_copy(self):
+        """Test that MOVE is not attempted when unsupported."""
+        self.client.imap.uid.return_value = ('OK', [b''])
+        self.client.imap.expunge.return_value = ('OK', [b''])
+
+        self.client.move_message(3, 'Archive')
+
+        commands = [call[0][0] for call in self.client.imap.uid.call_args_list]
+        assert 'move' not in commands
+        assert commands[0] == 'copy'
+
+    def test_move_with_capability(self):
+        """Test that a single UID MOVE is issued when supported."""
+        self.client._capabilities = frozenset({'MOVE'})
+        self.client.imap.uid.return_value = ('OK', [b''])
+
+        self.client.move_message(3, 'Archive')
+
+        self.client.imap.uid.assert_called_once_with('move', '3', '"Archive"')
+
+
+class TestIncrementalSync:
+    """Test cases for CONDSTORE/QRESYNC incremental sync."""
+
+    def setup_method(self):
+        """Set up a client with a mocked IMAP connection."""
+        self.client = IMAPClient(Mock(), Mock())
+        self.client.imap = Mock()
+        self.client.current_folder = 'INBOX'
+        self.client._capabilities = frozenset({'CONDSTORE', 'QRESYNC', 'ENABLE'})
+        self.client._enabled = frozenset({'CONDSTORE', 'QRESYNC'})
+
+    def test_sync_since_collects_changes(self):
+        """Test changed flags, vanished UIDs and new MODSEQ are reported."""
+        self.client.imap.uid.return_value = ('OK', [
+            b'3 (UID 12 FLAGS (\\Seen \\Flagged) MODSEQ (905))',
+            b'4 (UID 15 FLAGS () MODSEQ (910))'
+        ])
+        self.client.imap.response.return_value = ('VANISHED', [b'(EARLIER) 3:5,9'])
+
+        changes = self.client.sync_since(900)
+
+        self.client.imap.uid.assert_called_once_with(
+            'fetch', '1:*', '(UID FLAGS)', '(CHANGEDSINCE 900 VANISHED)'
+        )
+        assert changes.changed == {12: ['\\Seen', '\\Flagged'], 15: []}
+        assert changes.vanished == {3, 4, 5, 9}
+        assert changes.highestmodseq == 910
+
+    def test_folder_status_single_pass(self):
+        """Test that all STATUS counters are read from one response."""
+        self.client.imap.status.return_value = ('OK', [
+            b'"INBOX" (MESSAGES 231 RECENT 1 UIDNEXT 44292 UIDVALIDITY 1 UNSEEN 0 HIGHESTMODSEQ 7011)'
+        ])
+        info = FolderInfo(name='INBOX', delimiter='/', flags=[])
+
+        self.client._read_folder_status(info)
+
+        assert (info.exists, info.recent, info.unseen) == (231, 1, 0)
+        assert (info.uidvalidity, info.uidnext, info.highestmodseq) == (1, 44292, 7011)
+        assert 'HIGHESTMODSEQ' in self.client.imap.status.call_args[0][1]
+
+    def test_sync_since_without_changes(self):
+        """Test that an empty FETCH result keeps the given MODSEQ."""
+        self.client.imap.uid.return_value = ('OK', [None])
+        self.client.imap.response.return_value = ('VANISHED', [None])
+
+        changes = self.client.sync_since(900)
+
+        assert changes.changed == {}
+        assert changes.vanished == set()
+        assert changes.highestmodseq == 900
+
+    def test_sync_requires_condstore(self):
+        """Test that servers without CONDSTORE are rejected."""
+        self.client._capabilities = frozenset()
+
+        with pytest.raises(IMAPClientError):
+            self.client.sync_since(1)
+
+
+class TestFolderListParsing:
+    """Test cases for LIST response parsing."""
+
+    def test_quoted_name_with_spaces(self):
+        """Test a quoted folder name containing spaces."""
+        flags, delimiter, name = _parse_list_response(b'(\\HasNoChildren \\Sent) "/" "Sent Items"')
+
+        assert flags == ['\\HasNoChildren', '\\Sent']
+        assert delimiter == '/'
+        assert name == 'Sent Items'
+
+    def test_atom_name_and_nil_delimiter(self):
+        """Test unquoted names and NIL hierarchy delimiters."""
+        assert _parse_list_response(b'() "." INBOX') == ([], '.', 'INBOX')
+        assert _parse_list_response(b'(\\Noselect) NIL "Top"') == (['\\Noselect'], '', 'Top')
+
+    def test_literal_name(self):
+        """Test a folder name sent as a literal."""
+        parsed = _parse_list_response((b'() "/" {9}', b'Say "hi"!'))
+
+        assert parsed == ([], '/', 'Say "hi"!')
+
+    def test_modified_utf7_round_trip(self):
+        """Test decoding and encoding of international folder names."""
+        assert _parse_list_response(b'() "/" "Entw&APw-rfe &- Co"')[2] == 'Entwürfe & Co'
+        assert _encode_modified_utf7('Entwürfe & Co') == 'Entw&APw-rfe &- Co'
+        assert _decode_modified_utf7(_encode_modified_utf7('日本語')) == '日本語'
+
+
+class TestConnectionState:
+    """Test cases for connection state handling."""
+
+    def setup_method(self):
+        """Set up a client for an SSL account."""
+        account = Mock()
+        account.incoming_security = SecurityType.TLS_SSL
+        credential_manager = Mock()
+        credential_manager.retrieve_password.return_value = 'secret'
+        self.client = IMAPClient(account, credential_manager)
+
+    @patch('src.adelfa.core.email.imap_client.imaplib.IMAP4_SSL')
+    def test_reconnect_replaces_connection(self, mock_ssl):
+        """Test that reconnecting swaps connections and logs out the old one."""
+        old_connection, new_connection = Mock(), Mock()
+        new_connection.capability.return_value = ('OK', [b'IMAP4rev1 MOVE'])
+        mock_ssl.return_value = new_connection
+        self.client.imap = old_connection
+        self.client.current_folder = 'INBOX'
+
+        assert self.client.connect()
+
+        assert self.client.imap is new_connection
+        assert self.client.current_folder is None
+        assert self.client.has_capability('MOVE')
+        old_connection.logout.assert_called_once()
+
+    @patch('src.adelfa.core.email.imap_client.imaplib.IMAP4_SSL')
+    def test_failed_login_keeps_no_connection(self, mock_ssl):
+        """Test that a failed login closes the half-open connection."""
+        connection = Mock()
+        connection.login.side_effect = Exception("bad credentials")
+        mock_ssl.return_value = connection
+
+        assert not self.client.connect()
+
+        assert self.client.imap is None
+        connection.logout.assert_called_once()
+
+
+NESTED_MESSAGE = (
+    b'From: a@example.com\r\n'
+    b'Content-Type: multipart/mixed; boundary="outer"\r\n\r\n'
+    b'preamble\r\n'
+    b'--outer\r\n'
+    b'Content-Type: multipart/alternative; boundary="inner"\r\n\r\n'
+    b'--inner\r\nContent-Type: text/plain; charset=utf-8\r\n\r\nHello\r\n'
+    b'--inner\r\nContent-Type: text/html; charset=utf-8\r\n\r\n<p>Hello</p>\r\n'
+    b'--inner--\r\n'
+    b'--outer\r\n'
+    b'Content-Type: application/pdf; name="doc.pdf"\r\n'
+    b'Content-Disposition: attachment; filename="doc.pdf"\r\n'
+    b'Content-Transfer-Encoding: base64\r\n\r\n'
+    b'JVBERi0xLjQgZGF0YQ==\r\n'
+    b'--outer--\r\n'
+)
+
+
+class TestRawMimeSplitting:
+    """Test cases for the single-pass MIME splitter."""
+
+    def setup_method(self):
+        """Set up a client without a connection."""
+        self.client = IMAPClient(Mock(), Mock())
+
+    def test_nested_parts_are_found(self):
+        """Test that leaf parts of nested multiparts are yielded in order."""
+        from src.adelfa.core.email.imap_client import _iter_mime_parts
+
+        parts = [
+            (number, headers.get_content_type(), bytes(body))
+            for number, headers, body in _iter_mime_parts(NESTED_MESSAGE)
+        ]
+
+        assert parts == [
+            ('1.1', 'text/plain', b'Hello'),
+            ('1.2', 'text/html', b'<p>Hello</p>'),
+            ('2', 'application/pdf', b'JVBERi0xLjQgZGF0YQ=='),
+        ]
+
+    def test_attachment_not_decoded_by_default(self):
+        """Test that attachment bodies are only decoded on request."""
+        text, html, attachments = self.client._parse_body_bytes(NESTED_MESSAGE)
+
+        assert text == 'Hello'
+        assert html == '<p>Hello</p>'
+        assert attachments[0].filename == 'doc.pdf'
+        assert attachments[0].part_number == '2'
+        assert attachments[0].fetcher is None
+
+    def test_attachment_fetched_lazily(self):
+        """Test that attachment content is downloaded only on load()."""
+        self.client.imap = Mock()
+        self.client.current_folder = 'INBOX'
+        _, _, attachments = self.client._parse_body_bytes(NESTED_MESSAGE, folder='INBOX', uid=9)
+
+        self.client.imap.uid.assert_not_called()
+
+        self.client.imap.uid.return_value = ('OK', [(b'1 (UID 9 BODY[2] {20}', b'JVBERi0xLjQgZGF0YQ=='), b')'])
+        assert attachments[0].load() == b'%PDF-1.4 data'
+        self.client.imap.uid.assert_called_once_with('fetch', '9', '(BODY.PEEK[2])')
+
+    def test_attachment_decoded_on_request(self):
+        """Test that include_attachments decodes the attachment once."""
+        _, _, attachments = self.client._parse_body_bytes(NESTED_MESSAGE, include_attachments=True)
+
+        assert attachments[0].load() == b'%PDF-1.4 data'
+        assert attachments[0].size == len(b'%PDF-1.4 data')
+
+    def test_matches_email_parser(self):
+        """Test that results agree with the standard library parser."""
+        import email
+
+        expected = self.client._parse_body(email.message_from_bytes(NESTED_MESSAGE), True)
+        actual = self.client._parse_body_bytes(NESTED_MESSAGE, True)
+
+        assert actual[0].strip() == expected[0].strip()
+        assert actual[1].strip() == expected[1].strip()
+        assert actual[2][0].load() == expected[2][0].load()
+
+
+class TestHeaderDecoding:
+    """Test cases for header value decoding."""
+
+    def test_plain_ascii_passthrough(self):
+        """Test that unencoded ASCII headers are returned unchanged."""
+        assert _decode_header_value('Weekly report') == 'Weekly report'
+
+    def test_encoded_words(self):
+        """Test base64 and quoted-printable encoded words."""
+        assert _decode_header_value('=?utf-8?B?Q2Fmw6k=?= menu') == 'Café menu'
+        assert _decode_header_value('Re: =?ISO-8859-1?Q?caf=E9_au_lait?=') == 'Re: café au lait'
+
+    def test_adjacent_encoded_words_and_folding(self):
+        """Test that whitespace between encoded words and folds are dropped."""
+        value = '=?utf-8?Q?Hello_?=\r\n =?utf-8?Q?W=C3=B6rld?='
+
+        assert _decode_header_value(value) == 'Hello Wörld'
+
+    def test_raw_utf8_header(self):
+        """Test that raw 8-bit UTF-8 headers are decoded."""
+        raw = 'Grüße'.encode('utf-8').decode('ascii', 'surrogateescape')
+
+        assert _decode_header_value(raw) == 'Grüße'
+
+    def test_parse_headers_from_bytes(self):
+        """Test full header parsing from raw bytes."""
+        from src.adelfa.core.email.imap_client import _HEADER_PARSER
+
+        client = IMAPClient(Mock(), Mock())
+        msg = _HEADER_PARSER.parsebytes(
+            b'Message-ID: <1@example.com>\r\n'
+            b'Subject: =?utf-8?B?w4RwZmVs?=\r\n'
+            b'From: Ann <ann@example.com>\r\n'
+            b'To: bob@example.com, carl@example.com\r\n'
+            b'Date: Mon, 6 Jan 2025 10:00:00 +0000\r\n'
+            b'References: <a@x> <b@x>\r\n\r\n'
+        )
+
+        headers = client._parse_headers(msg)
+
+        assert headers.message_id == '<1@example.com>'
+        assert headers.subject == 'Äpfel'
+        assert headers.to_addrs == ['bob@example.com', 'carl@example.com']
+        assert headers.date.year == 2025
+        assert headers.references == ['<a@x>', '<b@x>']
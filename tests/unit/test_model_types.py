@@ -0,0 +1,120 @@
+"""
+Unit tests for custom model column types.
+
+Runs against an in-memory SQLite database.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from src.adelfa.data.models import Account, Base
+from src.adelfa.data.models.accounts import AccountType, SecurityType
+from src.adelfa.data.models.tasks import CLOSED_STATUSES, TASK_STATUS_CODES
+from src.adelfa.data.models.types import SmallIntEnum
+from src.adelfa.data.migrations.enum_storage import upgrade_enum_columns
+
+
+class TestSmallIntEnum:
+    """Test cases for integer-backed enum columns."""
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, engine, session):
+        """Use a fresh database."""
+        self.engine = engine
+        self.session = session
+
+    def test_members_stored_as_integers(self):
+        """Test that enum members round-trip through integer codes."""
+        self.session.add(Account(name="Work", incoming_security=SecurityType.TLS_SSL))
+        self.session.commit()
+
+        raw = self.session.execute(text("SELECT account_type, incoming_security FROM accounts")).one()
+        assert raw == (0, 2)
+
+        self.session.expire_all()
+        account = self.session.query(Account).filter(
+            Account.incoming_security == SecurityType.TLS_SSL
+        ).one()
+        assert account.account_type is AccountType.EMAIL
+        assert account.incoming_security is SecurityType.TLS_SSL
+
+    def test_legacy_names_upgraded(self):
+        """Test that member names from VARCHAR storage are converted."""
+        self.session.add(Account(name="Work"))
+        self.session.commit()
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE accounts SET incoming_security = 'STARTTLS'"))
+
+        assert upgrade_enum_columns(self.engine, Base.metadata) == 1
+        assert upgrade_enum_columns(self.engine, Base.metadata) == 0
+
+        raw = self.session.execute(text("SELECT incoming_security FROM accounts")).scalar()
+        assert raw == 1
+
+    def test_codes_independent_of_member_order(self):
+        """Test that members are stored under their declared codes, not their position."""
+        column_type = SmallIntEnum(SecurityType, {
+            SecurityType.AUTO: 7, SecurityType.NONE: 0, SecurityType.STARTTLS: 1, SecurityType.TLS_SSL: 2,
+        })
+        assert column_type.process_bind_param(SecurityType.AUTO, None) == 7
+        assert column_type.process_result_value(7, None) is SecurityType.AUTO
+
+        with pytest.raises(ValueError):
+            SmallIntEnum(SecurityType, {SecurityType.NONE: 0})
+        with pytest.raises(ValueError):
+            SmallIntEnum(SecurityType, dict.fromkeys(SecurityType, 0))
+
+    def test_partial_index_uses_stored_codes(self):
+        """Test that the open-task index excludes the codes of closed statuses."""
+        sql = self.session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'idx_task_due_date_open'"
+        )).scalar()
+        codes = ", ".join(str(TASK_STATUS_CODES[status]) for status in CLOSED_STATUSES)
+        assert sql.endswith(f"WHERE (status NOT IN ({codes}))")
+
+
+class TestAccountLoading:
+    """Test cases for deferred account columns."""
+
+    @pytest.fixture(autouse=True)
+    def setup_account(self, session):
+        """Create one account in a fresh database."""
+        self.session = session
+        self.session.add(Account(name="Work", advanced_settings={"connect_attempts": 2}))
+        self.session.commit()
+        self.session.expunge_all()
+
+    def test_details_loaded_on_access(self):
+        """Test that advanced_settings is left out of the account query."""
+        account = self.session.query(Account).one()
+        assert 'advanced_settings' not in account.__dict__
+        assert account.advanced_settings == {"connect_attempts": 2}
+        assert 'last_error' in account.__dict__
+
+
+class TestModelRegistry:
+    """Test cases for the shared declarative base."""
+
+    def test_all_models_share_metadata(self):
+        """Test that every model's table is created from one MetaData."""
+        configure_mappers()
+        tables = set(Base.metadata.tables)
+        assert {'accounts', 'cached_messages', 'events', 'contacts', 'notes', 'tasks'} <= tables
+
+
+class TestTimestampDefaults:
+    """Test cases for database-generated timestamps."""
+
+    def test_timestamps_generated_in_sql(self, session, recorder):
+        """Test that created_at and updated_at are filled in by the database."""
+        account = Account(name="Work")
+        session.add(account)
+        session.flush()
+
+        assert account.created_at is not None
+        assert account.updated_at is not None
+        _, parameters = recorder.executed[-1]
+        assert not any(isinstance(value, datetime) for value in parameters)
@@ -0,0 +1,218 @@
+"""
+Unit tests for note models.
+
+Runs against an in-memory SQLite database.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from src.adelfa.data.models import Note, Notebook, NoteTag
+
+
+class TestNoteCounts:
+    """Test cases for stored word and character counts."""
+
+    @pytest.fixture(autouse=True)
+    def setup_notebook(self, session):
+        """Create a database with one notebook."""
+        self.session = session
+        self.notebook = Notebook(name="Inbox")
+        self.session.add(self.notebook)
+
+    def test_counts_follow_plain_text(self):
+        """Test that counts are updated whenever the plain text is set."""
+        note = Note(title="Draft", plain_text_content="one two three")
+        assert note.get_word_count() == 3
+        assert note.get_character_count() == 13
+
+        note.plain_text_content = None
+        assert note.get_word_count() == 0
+        assert note.get_character_count() == 0
+
+    def test_counts_are_persisted(self):
+        """Test that loaded notes report counts without the text being touched."""
+        self.session.add(Note(notebook=self.notebook, title="Saved", plain_text_content="alpha beta"))
+        self.session.commit()
+        self.session.expunge_all()
+
+        word_count, char_count = self.session.execute(
+            text("SELECT word_count, char_count FROM notes")
+        ).one()
+        assert (word_count, char_count) == (2, 10)
+        assert self.session.query(Note).one().get_word_count() == 2
+
+
+class TestNoteTags:
+    """Test cases for tags linked through note_tag_link."""
+
+    @pytest.fixture(autouse=True)
+    def setup_notebook(self, session):
+        """Create a database with one notebook."""
+        self.session = session
+        self.notebook = Notebook(name="Inbox")
+        self.session.add(self.notebook)
+
+    def test_add_tag_reuses_existing_tag(self):
+        """Test that tagging two notes with one name shares the NoteTag row."""
+        first = Note(notebook=self.notebook, title="First")
+        second = Note(notebook=self.notebook, title="Second")
+        self.session.add_all([first, second])
+        self.session.flush()
+
+        first.add_tag("work")
+        first.add_tag("work")
+        self.session.flush()
+        second.add_tag("work")
+        self.session.commit()
+
+        tag = self.session.query(NoteTag).one()
+        assert tag.name == "work"
+        assert tag.usage_count == 2
+        assert first.tag_names == ["work"]
+
+    def test_transient_notes_share_existing_tag(self):
+        """Test that notes tagged before joining a session reuse the stored tag."""
+        self.session.add(Note(notebook=self.notebook, title="Tagged", tags=[NoteTag(name="work", usage_count=1)]))
+        self.session.commit()
+
+        first = Note(notebook=self.notebook, title="First")
+        second = Note(notebook=self.notebook, title="Second")
+        first.add_tag("work")
+        first.add_tag("home")
+        second.add_tag("home")
+        self.session.add_all([first, second])
+        self.session.commit()
+
+        counts = dict(self.session.execute(text("SELECT name, usage_count FROM note_tags")).all())
+        assert counts == {"work": 2, "home": 2}
+        assert sorted(first.tag_names) == ["home", "work"]
+        assert second.tags[0] is first.tags[first.tag_names.index("home")]
+
+    def test_remove_tag(self):
+        """Test that removing a tag unlinks it and updates its usage."""
+        note = Note(notebook=self.notebook, title="Note")
+        self.session.add(note)
+        note.add_tag("home")
+        note.add_tag("later")
+        self.session.commit()
+
+        note.remove_tag("home")
+        self.session.commit()
+
+        assert note.tag_names == ["later"]
+        assert self.session.query(NoteTag).filter_by(name="home").one().usage_count == 0
+
+    def test_with_tag_filters_notes(self):
+        """Test selecting notes by tag name."""
+        tagged = Note(notebook=self.notebook, title="Tagged")
+        self.session.add_all([tagged, Note(notebook=self.notebook, title="Plain")])
+        tagged.add_tag("urgent")
+        self.session.commit()
+
+        notes = self.session.scalars(Note.with_tag("urgent")).all()
+        assert [note.title for note in notes] == ["Tagged"]
+
+
+class TestPinnedNotes:
+    """Test cases for the pinned-notes partial index."""
+
+    def test_pinned_clause_uses_partial_index(self, engine, session):
+        """Test that pinned notes of a notebook are read from the partial index."""
+        notebook = Notebook(name="Inbox")
+        session.add_all([
+            Note(notebook=notebook, title="Pinned", is_pinned=True),
+            Note(notebook=notebook, title="Deleted", is_pinned=True, is_deleted=True),
+            Note(notebook=notebook, title="Plain"),
+        ])
+        session.commit()
+
+        query = (
+            session.query(Note)
+            .filter(Note.notebook_id == notebook.id, Note.pinned_clause())
+            .order_by(Note.updated_at.desc())
+        )
+        assert [note.title for note in query] == ["Pinned"]
+
+        sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "idx_note_pinned_live" in plan[0][-1]
+
+
+class TestNoteLoading:
+    """Test cases for loading notes for list views."""
+
+    def test_list_options_skip_bodies(self, session):
+        """Test that note lists leave the note bodies unloaded."""
+        session.add(Note(notebook=Notebook(name="Inbox"), title="Long", content="<p>body</p>",
+                         plain_text_content="body"))
+        session.commit()
+        session.expunge_all()
+
+        note = session.query(Note).options(*Note.list_options()).one()
+        assert note.title == "Long"
+        assert note.get_word_count() == 1
+        assert 'body' not in note.__dict__
+        assert note.content == "<p>body</p>"
+
+
+class TestNoteSearch:
+    """Test cases for full-text search over note titles and text."""
+
+    @pytest.fixture(autouse=True)
+    def setup_notes(self, session):
+        """Create a database with a few notes."""
+        self.session = session
+        notebook = Notebook(name="Inbox")
+        self.shopping = Note(notebook=notebook, title="Shopping", plain_text_content="milk and eggs")
+        self.session.add_all([
+            self.shopping,
+            Note(notebook=notebook, title="Ideas", plain_text_content="a milky way poster"),
+            Note(notebook=notebook, title="Untitled"),
+        ])
+        self.session.commit()
+
+    def search(self, terms):
+        """Return the titles of notes matching terms."""
+        return sorted(note.title for note in self.session.query(Note).filter(Note.search_clause(terms)))
+
+    def test_search_titles_and_text(self):
+        """Test that words and word prefixes match titles and text."""
+        assert self.search("milk") == ["Ideas", "Shopping"]
+        assert self.search("milk eggs") == ["Shopping"]
+        assert self.search("untit") == ["Untitled"]
+        assert self.search("   ") == ["Ideas", "Shopping", "Untitled"]
+
+    def test_search_follows_changes(self):
+        """Test that edits and deletes are reflected in the index."""
+        self.shopping.title = "Groceries"
+        self.shopping.plain_text_content = "bread"
+        self.session.commit()
+        assert self.search("groceries bread") == ["Groceries"]
+        assert self.search("eggs") == []
+
+        self.session.delete(self.shopping)
+        self.session.commit()
+        assert self.search("bread") == []
+
+    def test_search_syntax_taken_literally(self):
+        """Test that FTS query syntax in the terms does not raise."""
+        assert self.search('"milk" OR NOT (') == []
+
+
+class TestNoteVersions:
+    """Test cases for links between note versions."""
+
+    def test_delete_previous_version(self, session):
+        """Test that deleting an older version unlinks the notes pointing at it."""
+        old = Note(notebook=Notebook(name="Inbox"), title="Draft")
+        session.add(old)
+        session.flush()
+        new = Note(notebook=old.notebook, title="Final", version=2, previous_version_id=old.id)
+        session.add(new)
+        session.commit()
+
+        session.delete(old)
+        session.commit()
+        session.refresh(new)
+        assert new.previous_version_id is None
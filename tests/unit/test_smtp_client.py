@@ -0,0 +1,466 @@
+"""
+Unit tests for the SMTP client.
+
+Tests session pooling and message construction without a live server.
+"""
+
+import base64
+import dataclasses
+import email
+import email.utils
+import smtplib
+import pytest
+from unittest.mock import Mock, patch
+
+from src.adelfa.data.models.accounts import SecurityType
+from src.adelfa.core.email import smtp_client
+from src.adelfa.core.email.smtp_client import (
+    SMTPClient, SMTPClientError, SMTPDeliveryUnknownError, OutgoingEmail, EmailAddress,
+    EmailAttachment, close_pool
+)
+
+
+def make_account(**overrides):
+    """Build a mock account with SMTP settings."""
+    account = Mock()
+    account.outgoing_server = "smtp.example.com"
+    account.outgoing_port = 587
+    account.outgoing_security = SecurityType.STARTTLS
+    account.outgoing_username = "user@example.com"
+    account.outgoing_auth_required = True
+    account.outgoing_password_key = "key"
+    for name, value in overrides.items():
+        setattr(account, name, value)
+    return account
+
+
+def make_session():
+    """Build a mock SMTP session that accepts every command."""
+    session = Mock()
+    session.has_extn.return_value = False
+    session.rset.return_value = (250, b"OK")
+    session.mail.return_value = (250, b"OK")
+    session.rcpt.return_value = (250, b"OK")
+    session.docmd.return_value = (354, b"Go ahead")
+    session.getreply.return_value = (250, b"Queued")
+    return session
+
+
+def sent_bytes(session):
+    """Join everything written to a mock session's DATA stream."""
+    return b"".join(call.args[0] for call in session.send.call_args_list)
+
+
+def make_email():
+    """Build a minimal outgoing message."""
+    return OutgoingEmail(
+        subject="Hello",
+        from_addr=EmailAddress("user@example.com"),
+        to_addrs=[EmailAddress("to@example.com")],
+        text_content="Hi"
+    )
+
+
+class TestSMTPConnectionPool:
+    """Test cases for pooled SMTP sessions."""
+
+    def setup_method(self):
+        """Start every test with an empty pool."""
+        close_pool()
+        self.credentials = Mock()
+        self.credentials.retrieve_password.return_value = "secret"
+
+    def teardown_method(self):
+        """Drop sessions created by the test."""
+        close_pool()
+
+    @patch('smtplib.SMTP')
+    def test_session_reused_across_clients(self, mock_smtp):
+        """Test that a released session is handed to the next client."""
+        mock_smtp.return_value = make_session()
+
+        first = SMTPClient(make_account(), self.credentials)
+        assert first.send_email(make_email())
+        first.disconnect()
+
+        second = SMTPClient(make_account(), self.credentials)
+        assert second.send_email(make_email())
+
+        assert mock_smtp.call_count == 1
+        mock_smtp.return_value.login.assert_called_once_with("user@example.com", "secret")
+        mock_smtp.return_value.rset.assert_called_once()
+        mock_smtp.return_value.quit.assert_not_called()
+
+    @patch('time.sleep')
+    @patch('smtplib.SMTP')
+    def test_connect_retries_transport_errors(self, mock_smtp, mock_sleep):
+        """Test that timeouts are retried with growing delays."""
+        session = make_session()
+        mock_smtp.side_effect = [TimeoutError(), ConnectionRefusedError(), session]
+
+        client = SMTPClient(make_account(), self.credentials)
+        assert client.connect()
+
+        assert client.smtp is session
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert len(delays) == 2 and 0.5 <= delays[0] < delays[1] <= 2.25
+
+    @patch('time.sleep')
+    @patch('smtplib.SMTP')
+    def test_connect_gives_up_after_attempts(self, mock_smtp, mock_sleep):
+        """Test that the retry budget comes from the account settings."""
+        mock_smtp.side_effect = TimeoutError()
+
+        client = SMTPClient(make_account(advanced_settings={'connect_attempts': 2}), self.credentials)
+        assert not client.connect()
+        assert mock_smtp.call_count == 2
+
+    @patch('time.sleep')
+    @patch('smtplib.SMTP')
+    def test_authentication_failure_not_retried(self, mock_smtp, mock_sleep):
+        """Test that rejected credentials fail without reconnecting."""
+        session = make_session()
+        session.login.side_effect = smtplib.SMTPAuthenticationError(535, b"Bad credentials")
+        mock_smtp.return_value = session
+
+        client = SMTPClient(make_account(), self.credentials)
+        assert not client.connect()
+
+        assert mock_smtp.call_count == 1
+        mock_sleep.assert_not_called()
+        session.close.assert_called()
+
+    @patch('smtplib.SMTP_SSL')
+    @patch('smtplib.SMTP')
+    def test_tls_context_shared(self, mock_smtp, mock_smtp_ssl):
+        """Test that implicit TLS and STARTTLS sessions share one context."""
+        SMTPClient(make_account(), self.credentials).connect()
+        SMTPClient(make_account(outgoing_security=SecurityType.TLS_SSL, outgoing_port=465),
+                   self.credentials).connect()
+
+        context = mock_smtp.return_value.starttls.call_args.kwargs['context']
+        assert mock_smtp_ssl.call_args.kwargs['context'] is context
+
+    @patch('smtplib.SMTP')
+    def test_sessions_not_shared_between_logins(self, mock_smtp):
+        """Test that the pool is keyed by server and username."""
+        client = SMTPClient(make_account(), self.credentials)
+        assert client.connect()
+        client.disconnect()
+
+        other = SMTPClient(make_account(outgoing_username="other@example.com"), self.credentials)
+        assert other.connect()
+
+        assert mock_smtp.call_count == 2
+
+    @patch('smtplib.SMTP')
+    def test_stale_pooled_session_is_replaced(self, mock_smtp):
+        """Test that a pooled session failing RSET is closed, not reused."""
+        stale, fresh = make_session(), make_session()
+        stale.rset.side_effect = smtplib.SMTPServerDisconnected()
+        mock_smtp.side_effect = [stale, fresh]
+
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+        client.disconnect()
+        client.connect()
+
+        assert client.smtp is fresh
+        stale.close.assert_called()
+
+    @patch('smtplib.SMTP')
+    def test_send_retries_once_after_disconnect(self, mock_smtp):
+        """Test that a lost session is reopened transparently."""
+        stale, fresh = make_session(), make_session()
+        stale.mail.side_effect = smtplib.SMTPServerDisconnected()
+        mock_smtp.side_effect = [stale, fresh]
+
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+
+        assert client.send_email(make_email())
+        fresh.mail.assert_called_once()
+
+    @patch('smtplib.SMTP')
+    def test_send_does_not_retry_other_errors(self, mock_smtp):
+        """Test that rejected messages are reported without reconnecting."""
+        mock_smtp.return_value = make_session()
+        mock_smtp.return_value.getreply.return_value = (554, b"Rejected")
+
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+
+        with pytest.raises(SMTPClientError):
+            client.send_email(make_email())
+        assert mock_smtp.call_count == 1
+
+    @patch('smtplib.SMTP')
+    def test_no_resend_after_message_terminator(self, mock_smtp):
+        """Test that a session lost while awaiting the final reply is not resent."""
+        mock_smtp.return_value = make_session()
+        mock_smtp.return_value.getreply.side_effect = smtplib.SMTPServerDisconnected()
+
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+
+        with pytest.raises(SMTPDeliveryUnknownError):
+            client.send_email(make_email())
+        assert mock_smtp.call_count == 1
+        mock_smtp.return_value.mail.assert_called_once()
+
+    @patch('smtplib.SMTP')
+    def test_no_resend_after_421_final_reply(self, mock_smtp):
+        """Test that a 421 reply to the message itself does not trigger a resend."""
+        mock_smtp.return_value = make_session()
+        mock_smtp.return_value.getreply.return_value = (421, b"Shutting down")
+
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+
+        with pytest.raises(SMTPClientError):
+            client.send_email(make_email())
+        assert mock_smtp.call_count == 1
+
+    @patch('smtplib.SMTP')
+    def test_idle_session_used_without_noop(self, mock_smtp):
+        """Test that an idle session is not probed and is replaced if it died."""
+        idle, fresh = make_session(), make_session()
+        idle.mail.side_effect = ConnectionResetError()
+        mock_smtp.side_effect = [idle, fresh]
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+        client._conn.last_used -= 60
+
+        assert client.send_email(make_email())
+
+        idle.noop.assert_not_called()
+        fresh.getreply.assert_called_once()
+        assert mock_smtp.call_count == 2
+
+    @patch('smtplib.SMTP')
+    def test_session_retired_after_message_cap(self, mock_smtp):
+        """Test that sessions are not reused past the message budget."""
+        client = SMTPClient(make_account(), self.credentials)
+        client.connect()
+        client._conn.msg_count = smtp_client._POOL_MAX_MESSAGES
+        client.disconnect()
+
+        assert not smtp_client._POOL.get(client._pool_key)
+        mock_smtp.return_value.quit.assert_called_once()
+
+    @patch('smtplib.SMTP')
+    def test_keepalive_enabled_on_new_sessions(self, mock_smtp):
+        """Test that sessions get TCP keepalive with per-account overrides."""
+        import socket
+        sock = socket.socket()
+        mock_smtp.return_value.sock = sock
+        try:
+            client = SMTPClient(make_account(advanced_settings={'keepalive_idle': 45}), self.credentials)
+            assert client.connect()
+
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE) == 45
+        finally:
+            sock.close()
+
+
+class TestSMTPStreaming:
+    """Test cases for streaming messages to the DATA command."""
+
+    def setup_method(self):
+        """Attach a client to a mock session."""
+        self.session = make_session()
+        self.client = SMTPClient(make_account(), Mock())
+        self.client.smtp = self.session
+        self.client._conn = smtp_client._PooledConnection(self.session)
+
+    def test_attachment_streamed_in_chunks(self, tmp_path):
+        """Test that file attachments are encoded chunk by chunk and round-trip."""
+        payload = bytes(range(256)) * 600
+        path = tmp_path / "data.bin"
+        path.write_bytes(payload)
+        outgoing = make_email()
+        outgoing.attachments.append(EmailAttachment("data.bin", filepath=str(path)))
+
+        assert self.client._stream_send(outgoing, ["to@example.com"]) == {}
+
+        # Skeleton, part headers, three chunks, closing delimiter, end of data
+        assert self.session.send.call_count == 7
+        data = sent_bytes(self.session)
+        assert data.endswith(b"--\r\n.\r\n")
+        message = email.message_from_bytes(data[:-3])
+        text, attachment = message.get_payload()
+        assert text.get_content_type() == "text/plain"
+        assert attachment.get_filename() == "data.bin"
+        assert attachment.get_payload(decode=True) == payload
+
+    @patch.object(smtp_client, '_SENDFILE_MIN_SIZE', 0)
+    def test_large_attachment_uses_sendfile(self, tmp_path):
+        """Test that plain sessions hand encoded attachments to sendfile()."""
+        payload = bytes(range(256)) * 600
+        path = tmp_path / "data.bin"
+        path.write_bytes(payload)
+        outgoing = make_email()
+        outgoing.attachments.append(EmailAttachment("data.bin", filepath=str(path)))
+        sent = []
+        self.session.sock.sendfile.side_effect = lambda f: sent.append(f.read())
+
+        self.client._stream_send(outgoing, ["to@example.com"])
+
+        assert len(sent) == 1
+        assert b"\r\n" in sent[0] and b"\n" not in sent[0].replace(b"\r\n", b"")
+        assert base64.b64decode(sent[0]) == payload
+
+    def test_leading_dots_are_stuffed(self):
+        """Test that unencoded body lines starting with a dot are escaped."""
+        outgoing = make_email()
+        outgoing.text_content = "Hi\n.\n.hidden"
+
+        self.client._stream_send(outgoing, ["to@example.com"])
+
+        data = sent_bytes(self.session)
+        assert b"\r\n..\r\n..hidden" in data
+        assert data.count(b"\r\n.\r\n") == 1
+
+    def test_missing_attachment_fails_before_transaction(self):
+        """Test that unreadable attachments are reported before MAIL FROM."""
+        outgoing = make_email()
+        outgoing.attachments.append(EmailAttachment("gone.pdf", filepath="/nonexistent/gone.pdf"))
+
+        with pytest.raises(OSError):
+            self.client._stream_send(outgoing, ["to@example.com"])
+        self.session.mail.assert_not_called()
+
+    def test_all_recipients_refused(self):
+        """Test that a transaction without accepted recipients is reset."""
+        self.session.rcpt.return_value = (550, b"No such user")
+
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            self.client._stream_send(make_email(), ["to@example.com"])
+        self.session.rset.assert_called_once()
+        self.session.docmd.assert_not_called()
+
+    def test_pipelined_envelope(self):
+        """Test that PIPELINING sends the whole envelope in one write."""
+        self.session.has_extn.side_effect = lambda name: name == 'pipelining'
+        self.session.getreply.side_effect = [
+            (250, b"OK"), (250, b"OK"), (550, b"No such user"), (354, b"Go ahead"), (250, b"Queued")
+        ]
+
+        refused = self.client._stream_send(make_email(), ["to@example.com", "bad@example.com"])
+
+        assert refused == {"bad@example.com": (550, b"No such user")}
+        assert self.session.send.call_args_list[0].args[0] == (
+            "MAIL FROM:<user@example.com>\r\n"
+            "RCPT TO:<to@example.com>\r\n"
+            "RCPT TO:<bad@example.com>\r\n"
+            "DATA\r\n"
+        )
+        self.session.mail.assert_not_called()
+        self.session.rcpt.assert_not_called()
+
+    def test_pipelined_sender_refused(self):
+        """Test that a refused sender aborts a pipelined transaction."""
+        self.session.has_extn.side_effect = lambda name: name == 'pipelining'
+        self.session.getreply.side_effect = [(553, b"Bad sender"), (503, b"No MAIL"), (503, b"No RCPT")]
+
+        with pytest.raises(smtplib.SMTPSenderRefused):
+            self.client._stream_send(make_email(), ["to@example.com"])
+        self.session.rset.assert_called_once()
+        assert self.session.send.call_count == 1
+
+    def test_send_email_async_keeps_order(self):
+        """Test that background sends resolve in submission order on one session."""
+        subjects = [f"Message {i}" for i in range(5)]
+        emails = []
+        for subject in subjects:
+            outgoing = make_email()
+            outgoing.subject = subject
+            emails.append(outgoing)
+
+        futures = [self.client.send_email_async(outgoing) for outgoing in emails]
+        assert [future.result(timeout=5) for future in futures] == [True] * 5
+        self.client.shutdown()
+
+        sent = [email.message_from_bytes(call.args[0])['Subject']
+                for call in self.session.send.call_args_list if call.args[0] != b".\r\n"]
+        assert sent == subjects
+
+    def test_send_email_async_build_failure(self):
+        """Test that a message that cannot be built fails its future."""
+        broken = make_email()
+        broken.attachments = [EmailAttachment("gone.txt", content_type="text/plain")]
+
+        future = self.client.send_email_async(broken)
+        with pytest.raises(SMTPClientError):
+            future.result(timeout=5)
+        self.client.shutdown()
+        self.session.mail.assert_not_called()
+
+
+class TestMessageHelpers:
+    """Test cases for attachment and header helpers."""
+
+    def test_content_type_guessed_from_filename(self):
+        """Test MIME type detection with fallback."""
+        assert EmailAttachment("report.pdf").content_type == "application/pdf"
+        assert EmailAttachment("data.unknownext").content_type == "application/octet-stream"
+
+    def test_message_ids_are_unique(self):
+        """Test that Message-IDs do not repeat and resolve the host once."""
+        with patch('socket.getfqdn', return_value="host.example.com") as mock_fqdn:
+            smtp_client._msgid_domain.cache_clear()
+            first, second = smtp_client._make_msgid(), smtp_client._make_msgid()
+        smtp_client._msgid_domain.cache_clear()
+
+        assert first != second
+        assert first.endswith("@host.example.com>")
+        mock_fqdn.assert_called_once()
+
+    def test_message_dataclasses_are_slotted(self):
+        """Test that per-message objects carry no instance dict."""
+        outgoing = make_email()
+
+        assert not hasattr(outgoing, '__dict__')
+        assert not hasattr(outgoing.from_addr, '__dict__')
+        assert not hasattr(EmailAttachment("a.txt"), '__dict__')
+
+    def test_address_formatting(self):
+        """Test display names are quoted or encoded as needed."""
+        assert str(EmailAddress("a@example.com")) == "a@example.com"
+        assert str(EmailAddress("a@example.com", "Ann")) == "Ann <a@example.com>"
+        assert str(EmailAddress("a@example.com", "Doe, Ann")) == '"Doe, Ann" <a@example.com>'
+        assert str(EmailAddress("a@example.com", "Zoë")).startswith("=?utf-8?")
+
+    def test_address_is_immutable(self):
+        """Test that an address cannot change under its cached formatting."""
+        addr = EmailAddress("a@example.com", "Ann")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            addr.name = "Bob"
+        assert str(addr) == "Ann <a@example.com>"
+
+    def test_recipients_in_header_order(self):
+        """Test that recipients are iterated as To, CC, then BCC."""
+        outgoing = make_email()
+        outgoing.cc_addrs = [EmailAddress("cc@example.com")]
+        outgoing.bcc_addrs = [EmailAddress("bcc@example.com")]
+
+        emails = [addr.email for addr in outgoing.iter_all_recipients()]
+        assert emails == ["to@example.com", "cc@example.com", "bcc@example.com"]
+        assert outgoing.all_recipients == list(outgoing.iter_all_recipients())
+
+    def test_ascii_fast_path_matches_formataddr(self):
+        """Test that names formatted without formataddr come out the same."""
+        for name in ["Ann Lee", "Ann Q. Lee", 'Ann "Al" Lee', "Ann (work)", "Ann\\Lee", "O'Brien"]:
+            expected = email.utils.formataddr((name, "a@example.com"))
+            assert str(EmailAddress("a@example.com", name)) == expected
+
+    def test_ascii_text_parts_skip_transfer_encoding(self):
+        """Test that only non-ASCII or long-line text is encoded."""
+        ascii_part = smtp_client._make_text_part("Hello\nWorld", 'plain')
+        assert ascii_part['Content-Transfer-Encoding'] == '7bit'
+        assert ascii_part.get_content_charset() == 'us-ascii'
+
+        assert smtp_client._make_text_part("Grüße", 'plain')['Content-Transfer-Encoding'] == 'base64'
+        assert smtp_client._make_text_part("x" * 1000, 'html').get_content_charset() == 'utf-8'
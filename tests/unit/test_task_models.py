@@ -0,0 +1,155 @@
+"""
+Unit tests for task models.
+
+Runs against an in-memory SQLite database.
+"""
+
+import warnings
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from src.adelfa.data.models import Base, Task, TaskList
+from src.adelfa.data.models.tasks import TaskStatus
+from src.adelfa.data.migrations.schema import sync_indexes
+
+
+class TestTaskCompletion:
+    """Test cases for subtask-based completion."""
+
+    @pytest.fixture(autouse=True)
+    def setup_tasks(self, session, recorder):
+        """Create two parent tasks with subtasks."""
+        self.session = session
+        self.recorder = recorder
+
+        task_list = TaskList(name="Work")
+        first = Task(title="First", task_list=task_list, subtasks=[
+            Task(title="a", task_list=task_list, status=TaskStatus.COMPLETED),
+            Task(title="b", task_list=task_list),
+        ])
+        second = Task(title="Second", task_list=task_list, percent_complete=40)
+        self.session.add_all([first, second])
+        self.session.commit()
+        self.ids = (first.id, second.id)
+        self.session.expunge_all()
+        self.recorder.clear()
+
+    def test_completion_map(self):
+        """Test that subtask counts for many tasks come from one query."""
+        counts = Task.completion_map(self.session, self.ids)
+
+        assert counts == {self.ids[0]: (1, 2)}
+        assert len(self.recorder.statements) == 1
+
+    def test_counts_passed_in(self):
+        """Test that known counts are used without loading subtasks."""
+        tasks = self.session.query(Task).filter(Task.id.in_(self.ids)).order_by(Task.id).all()
+        counts = Task.completion_map(self.session, self.ids)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert [t.get_completion_percentage(counts.get(t.id, (0, 0))) for t in tasks] == [50, 40]
+        assert len(self.recorder.statements) == 2
+
+    def test_list_options_load_subtasks_up_front(self):
+        """Test that list_options() avoids a query per task."""
+        tasks = self.session.query(Task).options(*Task.list_options()).filter(
+            Task.id.in_(self.ids)).order_by(Task.id).all()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert [t.get_completion_percentage() for t in tasks] == [50, 40]
+        assert len(self.recorder.statements) == 2
+
+    def test_lazy_subtasks_warn(self):
+        """Test that loading subtasks per task is reported."""
+        task = self.session.get(Task, self.ids[0])
+
+        with pytest.warns(RuntimeWarning):
+            assert task.get_completion_percentage() == 50
+
+    def test_enums_stored_as_integers(self):
+        """Test that task enums are stored as small integer codes and filter on them."""
+        raw = self.session.execute(text("SELECT status, priority FROM tasks WHERE id = :id"),
+                                   {"id": self.ids[0]}).one()
+        assert raw == (0, 1)  # NOT_STARTED, NORMAL
+
+        done = self.session.query(Task.title).filter(Task.status == TaskStatus.COMPLETED).all()
+        assert done == [("a",)]
+
+
+class TestOverdueTasks:
+    """Test cases for the open-task partial index."""
+
+    @pytest.fixture(autouse=True)
+    def setup_tasks(self, engine, session):
+        """Create open, completed and cancelled tasks due in the past."""
+        self.engine = engine
+        self.session = session
+
+        task_list = TaskList(name="Home")
+        self.session.add_all([
+            Task(title=f"{status.name} task", task_list=task_list, status=status, due_date=date(2024, 1, 1))
+            for status in (TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+        ])
+        self.session.commit()
+
+    def test_overdue_clause_uses_partial_index(self, recorder):
+        """Test that the overdue query only returns open tasks, via the partial index."""
+        tasks = self.session.query(Task).filter(Task.overdue_clause(date(2024, 6, 1))).all()
+        assert [task.title for task in tasks] == ["IN_PROGRESS task"]
+
+        statement, parameters = recorder.executed[-1]
+        plan = self.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        assert "idx_task_due_date_open" in plan[0][-1]
+
+    def test_due_reminders(self):
+        """Test that due reminders are read from the reminder partial index."""
+        task = self.session.query(Task).filter_by(title="IN_PROGRESS task").one()
+        task.has_reminder = True
+        task.reminder_date = datetime(2024, 1, 1, 9, 0)
+        self.session.commit()
+
+        query = self.session.query(Task.title).filter(Task.due_reminder_clause(datetime(2024, 1, 1, 12, 0)))
+        assert query.all() == [("IN_PROGRESS task",)]
+        assert not self.session.query(Task).filter(Task.due_reminder_clause(datetime(2023, 12, 31))).all()
+
+        sql = str(query.statement.compile(self.engine, compile_kwargs={"literal_binds": True}))
+        plan = self.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert "idx_task_reminder_pending" in plan[0][-1]
+
+    def test_closed_tasks_not_overdue(self):
+        """Test that completed and cancelled tasks are never overdue."""
+        overdue = {task.title: task.is_overdue() for task in self.session.query(Task)}
+        assert overdue == {"IN_PROGRESS task": True, "COMPLETED task": False, "CANCELLED task": False}
+
+    def test_overdue_mask(self):
+        """Test that a list of tasks is checked against one date."""
+        tasks = self.session.query(Task).order_by(Task.title).all()
+        assert Task.overdue_mask(tasks) == [task.is_overdue() for task in tasks]
+        assert not any(Task.overdue_mask(tasks, today=date(2000, 1, 1)))
+
+
+class TestIndexSync:
+    """Test cases for bringing indexes of an existing database up to date."""
+
+    def test_sync_indexes(self, engine):
+        """Test that stale indexes are replaced and new ones created."""
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX idx_task_due_date_open"))
+            conn.execute(text("DROP INDEX idx_task_priority"))
+            conn.execute(text("CREATE INDEX idx_task_due_date ON tasks (due_date)"))
+            conn.execute(text("CREATE INDEX idx_task_priority ON tasks (priority, status)"))
+
+        assert sync_indexes(engine, Base.metadata) == 3
+        assert sync_indexes(engine, Base.metadata) == 0
+
+        with engine.connect() as conn:
+            indexes = dict(conn.execute(text(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks'"
+            )).all())
+        assert "idx_task_due_date" not in indexes
+        assert "WHERE" in indexes["idx_task_due_date_open"]
+        assert indexes["idx_task_priority"].endswith("(priority)")